@@ -0,0 +1,26 @@
+"""
+Importable builders for every part in this project.
+
+Each part is a pure `build_*(params) -> cq.Workplane` function taking a frozen
+parameter dataclass; exporting to STEP/STL is a separate step (`export_part`).
+"""
+
+from .export import export_part
+from .feature_tree import Feature, FeatureTree, ReplayResult
+from .features import MagnetRing, drill_magnet_ring
+from .female_thread import (
+    FemaleThreadParams,
+    build_female_thread,
+    build_female_thread_visual,
+    female_thread_features,
+)
+from .magnet_holes import MAGNET_HOLES_01_00_00, MagnetHolesParams, build_magnet_holes, magnet_holes_features
+from .male_thread import MaleThreadParams, build_male_thread, build_male_thread_visual, male_thread_features
+from .parts import PARTS, Part
+from .rangers_guard_sleeve import (
+    RANGERS_GUARD_SLEEVE_01_00_00,
+    RangersGuardSleeveParams,
+    build_rangers_guard_sleeve,
+    rangers_guard_sleeve_features,
+)
+from .topology import TopologyIndex
@@ -0,0 +1,266 @@
+"""
+How the parts sit in the assembled connector, and the assembled model.
+
+All parts share the Z axis. The sleeve's bottom is at z=0; the male piece
+goes in from the top, rod down, until its body rests on the floor of the male
+pocket; the female piece sits on the magnets sticking out of the male piece,
+its own magnets facing down. The two magnet stacks keep them apart by the
+magnet gap (0.3 mm with the default magnets).
+
+    python -m magnet_connector.assembly                       # assembly/connector.step and .glb
+    python -m magnet_connector.assembly --visual --explode 8 --render
+    python -m magnet_connector.assembly --set magnet.height=1.8 --formats step
+
+The STEP and GLB files hold the three pieces and every magnet, so that they
+barely grow with the magnet count: in the STEP file each magnet is a located
+reference to one shared disc, in the GLB file a node placing one shared disc
+mesh. `--explode` moves the pieces and magnet
+rings apart along the axis by that many mm each, for pictures; `--render`
+writes the drawing views of the assembly (needs pyvista).
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cadquery as cq
+import numpy as np
+
+from .cache import BuildCache, build_cached, build_uncached, load_model, mesh_cached
+from .export import DEFAULT_QUALITY, QUALITY_PRESETS, ExportReport, report_file
+from .features import Magnet, MagnetRing, magnet_protrusion
+from .female_thread import FemaleThreadParams
+from .male_thread import MaleThreadParams
+from .mesh import Mesh, concatenate, tessellate, write_glb_instances
+from .parts import PARTS
+from .rangers_guard_sleeve import RangersGuardSleeveParams
+from .sweep import with_overrides
+
+Vector = Tuple[float, float, float]
+
+ASSEMBLY_FORMATS = ("step", "glb")
+# Connector field holding the parameters of each piece, by name in PARTS
+PIECES = {"rangers_guard_sleeve": "sleeve", "male_thread": "male", "female_thread": "female"}
+VISUAL_PIECES = {"male_thread": "male_thread_visual", "female_thread": "female_thread_visual"}
+# Place of every piece and magnet ring in the exploded stack, times the explode distance
+EXPLODE_STEPS = {"rangers_guard_sleeve": 0, "male_thread": 1, "male_magnets": 2, "female_magnets": 3,
+                 "female_thread": 4}
+COLORS = {
+    "rangers_guard_sleeve": (0.35, 0.35, 0.38),
+    "male_thread": (0.85, 0.55, 0.15),
+    "female_thread": (0.2, 0.45, 0.75),
+    "magnet": (0.75, 0.75, 0.78),
+}
+
+
+@dataclass(frozen=True)
+class Connector:
+    """Parameters of every piece of the assembled connector."""
+
+    male: MaleThreadParams = field(default_factory=MaleThreadParams)
+    female: FemaleThreadParams = field(default_factory=FemaleThreadParams)
+    sleeve: RangersGuardSleeveParams = field(default_factory=RangersGuardSleeveParams)
+    magnet: Magnet = field(default_factory=Magnet)
+
+
+def magnet_gap(male: MaleThreadParams, female: FemaleThreadParams, magnet: Magnet = Magnet()) -> float:
+    return magnet_protrusion(male.magnets, magnet) + magnet_protrusion(female.magnets, magnet)
+
+
+def assembled_offsets(
+    male: MaleThreadParams = MaleThreadParams(),
+    female: FemaleThreadParams = FemaleThreadParams(),
+    sleeve: RangersGuardSleeveParams = RangersGuardSleeveParams(),
+    magnet: Magnet = Magnet(),
+) -> Dict[str, float]:
+    """Z offset of each part (by name in PARTS) in the assembled connector."""
+    male_z = sleeve.cylinder_height - sleeve.male_pocket_depth - male.rod_length
+    female_z = male_z + male.height + magnet_gap(male, female, magnet)
+    return {"rangers_guard_sleeve": 0.0, "male_thread": male_z, "female_thread": female_z}
+
+
+def stack_overhang(
+    male: MaleThreadParams = MaleThreadParams(),
+    female: FemaleThreadParams = FemaleThreadParams(),
+    sleeve: RangersGuardSleeveParams = RangersGuardSleeveParams(),
+    magnet: Magnet = Magnet(),
+) -> float:
+    """How far the female piece sticks out of the top of the sleeve (negative: sunk below it)."""
+    return assembled_offsets(male, female, sleeve, magnet)["female_thread"] + female.height - sleeve.cylinder_height
+
+
+def magnet_centers(ring: MagnetRing, floor: float, magnet: Magnet, downward: bool) -> List[Vector]:
+    """
+    Bottom centers of the magnets in the pockets of `ring`, stacked from the
+    pocket floor at z=`floor`, up or (`downward`) down. The pockets are where
+    `drill_magnet_ring` puts them, the first one on +X.
+    """
+    centers = []
+    for i in range(ring.count):
+        angle = 2 * math.pi * i / ring.count
+        x, y = ring.pitch_radius * math.cos(angle), ring.pitch_radius * math.sin(angle)
+        for k in range(magnet.per_hole):
+            z = floor - (k + 1) * magnet.height if downward else floor + k * magnet.height
+            centers.append((x, y, z))
+    return centers
+
+
+def placements(connector: Connector, explode: float = 0.0) -> Tuple[Dict[str, float], List[Vector]]:
+    """
+    Z offset of each piece (by name in PARTS) and the bottom center of every
+    magnet, moved apart by `explode` mm per step of EXPLODE_STEPS.
+    """
+    offsets = assembled_offsets(connector.male, connector.female, connector.sleeve, connector.magnet)
+    offsets = {name: z + EXPLODE_STEPS[name] * explode for name, z in offsets.items()}
+    male, female = connector.male, connector.female
+    male_floor = offsets["male_thread"] + male.height - male.magnets.hole_depth
+    female_floor = offsets["female_thread"] + female.magnets.hole_depth
+    # The rings move by their own steps, not their piece's
+    male_floor += (EXPLODE_STEPS["male_magnets"] - EXPLODE_STEPS["male_thread"]) * explode
+    female_floor += (EXPLODE_STEPS["female_magnets"] - EXPLODE_STEPS["female_thread"]) * explode
+    magnets = (magnet_centers(male.magnets, male_floor, connector.magnet, downward=False)
+               + magnet_centers(female.magnets, female_floor, connector.magnet, downward=True))
+    return offsets, magnets
+
+
+def _piece(name: str, connector: Connector, visual: bool):
+    """The part of PARTS for a piece, with the connector's parameters."""
+    part = PARTS[VISUAL_PIECES.get(name, name) if visual else name]
+    return replace(part, params=getattr(connector, PIECES[name]))
+
+
+def magnet_shape(magnet: Magnet) -> cq.Shape:
+    return cq.Workplane().circle(magnet.diameter / 2).extrude(magnet.height).val()
+
+
+def build_assembly(
+    connector: Connector = Connector(),
+    explode: float = 0.0,
+    visual: bool = False,
+    cache: Optional[BuildCache] = None,
+) -> cq.Assembly:
+    """
+    The assembled connector. Every magnet is the same shape object at its own
+    location, which cadquery exports as references to a single shape.
+    """
+    offsets, magnets = placements(connector, explode)
+    assembly = cq.Assembly(name="connector")
+    for name, z in offsets.items():
+        part = _piece(name, connector, visual)
+        model = build_uncached(part) if cache is None else load_model(build_cached(part, cache)[0])
+        assembly.add(model, name=name, loc=cq.Location(cq.Vector(0, 0, z)), color=cq.Color(*COLORS[name]))
+    shape, color = magnet_shape(connector.magnet), cq.Color(*COLORS["magnet"])
+    for i, center in enumerate(magnets):
+        assembly.add(shape, name=f"magnet_{i:02d}", loc=cq.Location(cq.Vector(*center)), color=color)
+    return assembly
+
+
+def assembly_mesh(
+    connector: Connector = Connector(),
+    explode: float = 0.0,
+    visual: bool = False,
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+) -> Mesh:
+    """One mesh of the assembled connector, e.g. for rendering. The magnet is tessellated once."""
+    offsets, magnets = placements(connector, explode)
+    meshes = []
+    for name, z in offsets.items():
+        mesh = mesh_cached(_piece(name, connector, visual), cache, quality)
+        meshes.append(Mesh(mesh.vertices + np.array([0, 0, z], dtype=np.float32), mesh.triangles))
+    preset = QUALITY_PRESETS[quality]
+    disc = tessellate(magnet_shape(connector.magnet), preset.tolerance, preset.angular_tolerance)
+    centers = np.asarray(magnets, dtype=np.float32)
+    count, vertices = len(centers), len(disc.vertices)
+    meshes.append(Mesh(
+        (disc.vertices[None] + centers[:, None]).reshape(-1, 3),
+        (disc.triangles[None] + (np.arange(count, dtype=np.uint32) * vertices)[:, None, None]).reshape(-1, 3),
+    ))
+    return concatenate(meshes)
+
+
+def write_assembly_glb(assembly: cq.Assembly, path: Path, quality: str = DEFAULT_QUALITY) -> None:
+    """GLB of `assembly`, each distinct shape (the magnet disc, once) tessellated once and instanced per child."""
+    preset = QUALITY_PRESETS[quality]
+    meshes, colors, instances, shared = [], [], [], {}
+    for child in assembly.children:
+        color = child.color.toTuple() if child.color else None
+        key = (id(child.obj), color)
+        if key not in shared:
+            shared[key] = len(meshes)
+            meshes.append(tessellate(child.obj, preset.tolerance, preset.angular_tolerance))
+            colors.append(color)
+        transform = child.loc.wrapped.Transformation()
+        matrix = np.eye(4)
+        matrix[:3] = [[transform.Value(i, j) for j in range(1, 5)] for i in range(1, 4)]
+        instances.append((shared[key], matrix))
+    write_glb_instances(meshes, instances, path, colors)
+
+
+def export_assembly(
+    assembly: cq.Assembly,
+    directory: Path,
+    stem: str = "connector",
+    formats: Sequence[str] = ASSEMBLY_FORMATS,
+    quality: str = DEFAULT_QUALITY,
+) -> List[ExportReport]:
+    directory.mkdir(parents=True, exist_ok=True)
+    reports = []
+    for fmt in formats:
+        path = directory / f"{stem}.{fmt}"
+        start = time.perf_counter()
+        if fmt == "step":
+            assembly.export(str(path), "STEP")
+        else:
+            write_assembly_glb(assembly, path, quality)
+        reports.append(report_file(path, time.perf_counter() - start))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.assembly", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--visual", action="store_true", help="the visual models, with detailed threads")
+    parser.add_argument("--explode", type=float, default=0.0, help="mm between the exploded pieces (default: 0)")
+    parser.add_argument("--formats", nargs="+", choices=ASSEMBLY_FORMATS, default=list(ASSEMBLY_FORMATS),
+                        help="file formats to write (default: step glb)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", dest="settings",
+                        help="parameter value, e.g. magnet.height=1.8 or male.magnets.count=16 (repeatable)")
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"tessellation preset of the GLB and the renders (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--out-dir", default="assembly", help="where to write the files (default: assembly)")
+    parser.add_argument("--render", action="store_true", help="also render the drawing views (needs pyvista)")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for setting in args.settings:
+        name, sep, value = setting.partition("=")
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {setting!r}")
+        overrides[name] = float(value)
+    try:
+        connector = with_overrides(Connector(), overrides)
+    except ValueError as e:
+        parser.error(str(e))
+    cache = None if args.no_cache else BuildCache()
+    out_dir = Path(args.out_dir)
+
+    start = time.perf_counter()
+    assembly = build_assembly(connector, args.explode, args.visual, cache)
+    print(f"Assembled {len(assembly.children)} pieces and magnets in {time.perf_counter() - start:.2f}s")
+    for report in export_assembly(assembly, out_dir, formats=args.formats, quality=args.quality):
+        print(report)
+    if args.render:
+        from .render import VIEWS, capture_views
+
+        mesh = assembly_mesh(connector, args.explode, args.visual, cache, args.quality)
+        for report in capture_views(mesh, VIEWS, out_dir / "renders"):
+            print(report)
+
+
+if __name__ == "__main__":
+    main()
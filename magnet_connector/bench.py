@@ -0,0 +1,280 @@
+"""
+Benchmarks of everything this repository generates, compared against a
+stored baseline so that slowdowns (e.g. after upgrading cadquery, OCP or
+cq_warehouse) are caught.
+
+    python -m magnet_connector.bench                   # run, compare with benchmarks/baseline.json
+    python -m magnet_connector.bench --save-baseline   # run and store the results as the baseline
+    python -m magnet_connector.bench --skip script --threshold-for "render/*=1.0"
+
+Benchmarks (the best of `--repeat` runs each):
+  - script/<path>:       every part script as-is, old/ included, in a temporary folder without the build cache.
+  - build_cold/<part>:   a build with empty in-memory feature and thread caches, threads not read from disk.
+  - build_warm/<part>:   the same build again, from the feature tree.
+  - thread/<thread>:     IsoThread generation of every distinct thread, without any cache.
+  - tessellate/<part>, export_<format>/<part>: the export stage, per format.
+  - composite/<part>:    the mesh of a visual model without its thread union (see visual.py), thread meshes cached.
+  - render/<part>:       the six technical drawing views (needs pyvista).
+
+The baseline holds timings of one machine, so it isn't committed: run with
+`--save-baseline` on the machine the benchmarks are compared on (before the
+change being measured), then without it after the change.
+
+A benchmark regresses when it is slower than its baseline by more than its
+relative threshold and by more than `--min-delta` seconds.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import runpy
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import threads
+from .cache import library_versions
+from .export import DEFAULT_QUALITY, MESH_FORMATS, export_with_mesh
+from .feature_tree import DEFAULT_TREE
+from .parts import PARTS, REPO_ROOT
+from .visual import composite_mesh, has_mesh_only_features
+
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+DEFAULT_THRESHOLD = 0.25  # 25% slower
+DEFAULT_MIN_DELTA = 0.05  # Seconds; ignore noise on very quick benchmarks
+GROUPS = ("script", "build", "thread", "export", "render")
+
+
+def part_scripts() -> List[Path]:
+    """Every script that builds a part: the part folders and old/."""
+    directories = {part.output_dir for part in PARTS.values()}
+    return sorted(path for directory in directories for path in directory.glob("*.py"))
+
+
+def _timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _clear_memory_caches() -> None:
+    DEFAULT_TREE.clear()
+    threads.clear_memory_cache()
+
+
+def run_script(script: Path) -> None:
+    """Run a part script in a temporary working directory, as `python <script> --no-cache` would."""
+    cwd, argv = os.getcwd(), sys.argv
+    with tempfile.TemporaryDirectory() as work, contextlib.redirect_stdout(io.StringIO()):
+        try:
+            os.chdir(work)
+            sys.argv = [str(script), "--no-cache"]
+            runpy.run_path(str(script), run_name="__main__")
+        finally:
+            os.chdir(cwd)
+            sys.argv = argv
+
+
+def bench_scripts(results: Dict[str, float]) -> None:
+    for script in part_scripts():
+        _clear_memory_caches()
+        results[f"script/{script.relative_to(REPO_ROOT).as_posix()}"] = _timed(lambda: run_script(script))
+
+
+def bench_builds(results: Dict[str, float]) -> None:
+    for name, part in PARTS.items():
+        _clear_memory_caches()
+        with threads.disk_cache_disabled():
+            results[f"build_cold/{name}"] = _timed(part.build)
+        results[f"build_warm/{name}"] = _timed(part.build)
+
+
+def distinct_threads() -> Dict[str, dict]:
+    """Name -> iso_thread arguments of every thread used by a part."""
+    found = {}
+    for part in PARTS.values():
+        for feature in part.features(part.params):
+            if feature.name == "thread":
+                inputs = feature.inputs
+                kind = "external" if inputs["external"] else "internal"
+                found[f"M{inputs['major_diameter']:g}x{inputs['pitch']:g}x{inputs['length']:g}_{kind}"] = inputs
+    return found
+
+
+def bench_threads(results: Dict[str, float]) -> None:
+    for name, inputs in distinct_threads().items():
+        threads.clear_memory_cache()
+        with tempfile.TemporaryDirectory() as empty:
+            results[f"thread/{name}"] = _timed(lambda: threads.iso_thread(**inputs, cache_dir=Path(empty)))
+
+
+def bench_exports(results: Dict[str, float], quality: str = DEFAULT_QUALITY) -> None:
+    formats = ("step", *MESH_FORMATS)
+    for name, part in PARTS.items():
+        model = part.build()
+        with tempfile.TemporaryDirectory() as out_dir:
+            reports, _ = export_with_mesh(model, part.stem, out_dir, formats, quality)
+        for fmt, report in zip(formats, reports):
+            results[f"export_{fmt}/{name}"] = report.seconds
+            if report.triangles is not None:
+                results[f"tessellate/{name}"] = report.tessellation_seconds
+        features = part.features(part.params)
+        if has_mesh_only_features(features):
+            composite_mesh(features, quality)  # Warm the thread meshes
+            results[f"composite/{name}"] = _timed(lambda: composite_mesh(features, quality))
+
+
+def bench_renders(results: Dict[str, float], quality: str = DEFAULT_QUALITY) -> None:
+    try:
+        import pyvista  # noqa: F401
+    except ImportError:
+        print("pyvista is not installed, skipping the render benchmarks", file=sys.stderr)
+        return
+    from .render import DRAWINGS, capture_views, part_mesh
+
+    for name, views in DRAWINGS.items():
+        mesh = part_mesh(name, quality=quality)
+        with tempfile.TemporaryDirectory() as out_dir:
+            results[f"render/{name}"] = _timed(lambda: capture_views(mesh, views, out_dir))
+
+
+def run_benchmarks(
+    groups: Sequence[str] = GROUPS,
+    repeat: int = 1,
+    quality: str = DEFAULT_QUALITY,
+) -> Dict[str, float]:
+    """Seconds per benchmark, the best of `repeat` runs."""
+    benches = {
+        "script": bench_scripts,
+        "build": bench_builds,
+        "thread": bench_threads,
+        "export": lambda results: bench_exports(results, quality),
+        "render": lambda results: bench_renders(results, quality),
+    }
+    best: Dict[str, float] = {}
+    for _ in range(repeat):
+        for group in groups:
+            results: Dict[str, float] = {}
+            benches[group](results)
+            for name, seconds in results.items():
+                best[name] = min(seconds, best.get(name, seconds))
+    return best
+
+
+def environment() -> dict:
+    return {
+        "versions": library_versions(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def threshold_for(name: str, thresholds: Sequence[Tuple[str, float]], default: float) -> float:
+    """Relative threshold of the last `thresholds` pattern matching `name`."""
+    for pattern, value in reversed(thresholds):
+        if fnmatch.fnmatch(name, pattern):
+            return value
+    return default
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+    thresholds: Sequence[Tuple[str, float]] = (),
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> Tuple[List[Tuple[str, Optional[float], float, str]], List[str]]:
+    """Rows of (benchmark, baseline seconds, seconds, status) and the names of the regressions."""
+    rows, regressions = [], []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            rows.append((name, None, seconds, "new"))
+            continue
+        limit = threshold_for(name, thresholds, threshold)
+        if seconds > before * (1 + limit) and seconds - before > min_delta:
+            status = "REGRESSED"
+            regressions.append(name)
+        elif seconds < before * (1 - limit) and before - seconds > min_delta:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, before, seconds, status))
+    return rows, regressions
+
+
+def format_rows(rows) -> str:
+    width = max(len(row[0]) for row in rows)
+    lines = [f"{'benchmark':<{width}}  {'baseline':>9}  {'now':>9}  {'change':>8}  status"]
+    for name, before, seconds, status in rows:
+        if before is None:
+            lines.append(f"{name:<{width}}  {'-':>9}  {seconds:>9.3f}  {'-':>8}  {status}")
+        else:
+            change = (seconds - before) / before * 100 if before else 0.0
+            lines.append(f"{name:<{width}}  {before:>9.3f}  {seconds:>9.3f}  {change:>+7.1f}%  {status}")
+    return "\n".join(lines)
+
+
+def _parse_threshold(text: str) -> Tuple[str, float]:
+    pattern, sep, value = text.rpartition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected PATTERN=FRACTION, got {text!r}")
+    return pattern, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help=f"baseline file (default: {DEFAULT_BASELINE.relative_to(REPO_ROOT)})")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    parser.add_argument("--skip", nargs="+", choices=GROUPS, default=[], help="benchmark groups to leave out")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark, the fastest counts")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed relative slowdown (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--threshold-for", type=_parse_threshold, action="append", default=[],
+                        metavar="PATTERN=FRACTION", help="threshold for benchmarks matching a glob (repeatable)")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+                        help=f"ignore slowdowns smaller than this many seconds (default: {DEFAULT_MIN_DELTA})")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error(f"--repeat must be at least 1, got {args.repeat}")
+
+    groups = [group for group in GROUPS if group not in args.skip]
+    results = run_benchmarks(groups, args.repeat)
+    document = {**environment(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2, sort_keys=True))
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(document, indent=2, sort_keys=True))
+        print(format_rows([(name, None, seconds, "saved") for name, seconds in results.items()]))
+        print(f"Baseline written to: {args.baseline}")
+        return
+    if not args.baseline.is_file():
+        print(format_rows([(name, None, seconds, "new") for name, seconds in results.items()]))
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    for name, version in document["versions"].items():
+        before = baseline.get("versions", {}).get(name)
+        if before != version:
+            print(f"Note: {name} changed since the baseline: {before} -> {version}")
+    rows, regressions = compare(results, baseline["results"], args.threshold, args.threshold_for, args.min_delta)
+    print(format_rows(rows))
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
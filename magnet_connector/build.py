@@ -0,0 +1,211 @@
+"""
+Build graph of everything generated in this repository:
+
+    part builders -> STEP/STL/mesh -> technical drawing base images
+
+    python -m magnet_connector                       # everything that is out of date
+    python -m magnet_connector drawings              # a target and what it depends on
+    python -m magnet_connector --force --jobs 2      # rebuild everything, 2 workers
+
+A node is skipped when the hash of its inputs (part parameters and builder
+source, plus the renderer's source for a drawing) matches the one
+recorded the last time it was built and its outputs still exist. Independent
+nodes run in parallel worker processes.
+
+A part whose geometry fingerprint (see fingerprint.py) matches the one in
+fingerprints.json keeps its existing STEP file ("unchanged"), so that
+rebuilding doesn't rewrite it with a new timestamp; its mesh files depend on
+the quality and the mesh code too, so they are always exported. The build
+only reads the index: `python -m magnet_connector.fingerprint --update`
+writes it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import render
+from .cache import CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, export_cached, part_key
+from .export import DEFAULT_FORMATS, DEFAULT_QUALITY, QUALITY_PRESETS
+from .feature_tree import source_digest
+from .fingerprint import Fingerprint, load_index, part_fingerprint
+from .parts import PARTS
+
+STAMPS_FILE = "stamps.json"
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    kind: str    # "part" or "drawings"
+    target: str  # Part name (for "drawings" nodes, the visual parts to render are the deps)
+    deps: Tuple[str, ...] = ()
+
+    @property
+    def outputs(self) -> List[Path]:
+        if self.kind == "part":
+            part = PARTS[self.target]
+            return [part.output_dir / f"{part.stem}.{fmt}" for fmt in DEFAULT_FORMATS]
+        return [render.drawing_dir(dep) / view.filename for dep in self.deps for view in render.DRAWINGS[dep]]
+
+
+GRAPH: Dict[str, Node] = {node.name: node for node in (
+    *(Node(name, "part", name) for name in PARTS),
+    # All drawings are rendered by one node, sharing a single render window
+    Node("drawings", "drawings", "", tuple(render.DRAWINGS)),
+)}
+
+
+def input_hash(node: Node, quality: str = DEFAULT_QUALITY) -> str:
+    if node.kind == "part":
+        return part_key(PARTS[node.target], quality=quality)
+    digest = hashlib.sha256()
+    digest.update(source_digest(render.draw_part).encode())
+    for dep in node.deps:
+        digest.update(part_key(PARTS[dep], quality=quality).encode())
+    return digest.hexdigest()
+
+
+def run_node(
+    node: Node,
+    cache_dir: Optional[str],
+    cache_bytes: int,
+    quality: str = DEFAULT_QUALITY,
+    expected: Optional[Fingerprint] = None,
+) -> Tuple[str, float]:
+    """
+    Build `node` (in a worker process). Returns its status and the wall time it
+    took. A part matching `expected` keeps its STEP file, its meshes are exported.
+    """
+    start = time.perf_counter()
+    cache = BuildCache(cache_dir, cache_bytes) if cache_dir else None
+    if node.kind != "part":
+        render.draw_parts(node.deps, cache, quality)
+        return "built", time.perf_counter() - start
+    part = PARTS[node.target]
+    step = part.output_dir / f"{part.stem}.step"
+    formats, status = DEFAULT_FORMATS, "built"
+    if expected is not None and step.exists() and not part_fingerprint(part, cache, quality).differences(expected):
+        print(f"{node.name}: geometry unchanged, keeping {step.name}")
+        formats, status = tuple(fmt for fmt in DEFAULT_FORMATS if fmt != "step"), "unchanged"
+    for report in export_cached(part, part.output_dir, formats, cache, quality)[0]:
+        print(report)
+    return status, time.perf_counter() - start
+
+
+def with_dependencies(targets: List[str]) -> List[str]:
+    """`targets` and everything they depend on, dependencies first."""
+    ordered: List[str] = []
+
+    def visit(name):
+        if name in ordered:
+            return
+        for dep in GRAPH[name].deps:
+            visit(dep)
+        ordered.append(name)
+
+    for name in targets:
+        visit(name)
+    return ordered
+
+
+def build(
+    targets: Optional[List[str]] = None,
+    jobs: int = os.cpu_count() or 1,
+    cache_dir: Optional[Path] = CACHE_DIR,
+    cache_bytes: int = DEFAULT_MAX_BYTES,
+    force: bool = False,
+    quality: str = DEFAULT_QUALITY,
+) -> Dict[str, Tuple[str, float]]:
+    """
+    Build `targets` (default: everything). Returns {node: (status, seconds)} with
+    status one of "built", "unchanged", "up to date", "failed" or "blocked".
+    """
+    stamps_path = Path(CACHE_DIR) / STAMPS_FILE
+    stamps = json.loads(stamps_path.read_text()) if stamps_path.is_file() else {}
+    fingerprints = load_index()
+    pending = with_dependencies(targets or list(GRAPH))
+    results: Dict[str, Tuple[str, float]] = {}
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in list(pending):
+                node = GRAPH[name]
+                if any(dep not in results for dep in node.deps):
+                    continue
+                pending.remove(name)
+                if any(results[dep][0] in ("failed", "blocked") for dep in node.deps):
+                    results[name] = ("blocked", 0.0)
+                    continue
+                digest = input_hash(node, quality)
+                if not force and stamps.get(name) == digest and all(p.exists() for p in node.outputs):
+                    results[name] = ("up to date", 0.0)
+                    continue
+                future = pool.submit(run_node, node, str(cache_dir) if cache_dir else None, cache_bytes, quality,
+                                     fingerprints.get(node.target))
+                running[future] = (name, digest)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, digest = running.pop(future)
+                try:
+                    status, seconds = future.result()
+                except Exception as e:
+                    print(f"{name} failed: {e}", file=sys.stderr)
+                    results[name] = ("failed", 0.0)
+                    continue
+                results[name] = (status, seconds)
+                stamps[name] = digest
+
+    stamps_path.parent.mkdir(parents=True, exist_ok=True)
+    stamps_path.write_text(json.dumps(stamps, indent=2, sort_keys=True))
+    return results
+
+
+def summary(results: Dict[str, Tuple[str, float]]) -> str:
+    width = max(len(name) for name in results)
+    lines = [f"{'node':<{width}}  {'status':<10}  {'seconds':>8}"]
+    for name, (status, seconds) in results.items():
+        lines.append(f"{name:<{width}}  {status:<10}  {seconds:>8.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help=f"nodes to build (default: all). One of: {', '.join(GRAPH)}")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the part build cache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 2**20,
+                        help="evict least recently used cache entries above this many MiB")
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"STL tessellation preset (default: {DEFAULT_QUALITY})")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error(f"--jobs must be at least 1, got {args.jobs}")
+    unknown = [name for name in args.targets if name not in GRAPH]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    results = build(args.targets, args.jobs, None if args.no_cache else CACHE_DIR,
+                    args.cache_size * 2**20, args.force, args.quality)
+    print(summary(results))
+    print(f"Total: {time.perf_counter() - start:.2f}s")
+    if any(status in ("failed", "blocked") for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Content-addressed cache of built parts.
+
+An entry is keyed on a hash of the part's parameters, the source code of the
+modules that build it and the cadquery/OCP/cq_warehouse versions. Each entry
+holds the exported STEP and mesh formats plus a serialized BREP, so a hit
+costs a file copy instead of a rebuild. Least recently used entries are evicted once the
+cache grows past its size cap.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import cadquery as cq
+
+from .export import (
+    DEFAULT_FORMATS,
+    DEFAULT_QUALITY,
+    MESH_FORMATS,
+    ExportReport,
+    export_with_mesh,
+    report_file,
+    tessellate_model,
+)
+from .feature_tree import source_digest
+from .mesh import Mesh, load_npz
+from .parts import REPO_ROOT, Part
+from .threads import disk_cache_disabled
+from .visual import composite_mesh, has_mesh_only_features
+
+CACHE_DIR = Path(os.environ.get("MAGNET_CONNECTOR_CACHE", REPO_ROOT / ".build_cache"))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Distribution names of the libraries whose version changes the generated geometry
+LIBRARIES = ("cadquery", "cadquery-ocp", "cq_warehouse")
+
+# Everything an entry can store, each written when first asked for. "brep" is
+# what `load_model` reads back.
+ENTRY_FORMATS = ("step", *MESH_FORMATS, "brep")
+MODEL_FORMATS = ("brep",)
+
+
+@lru_cache(maxsize=None)
+def library_versions() -> Dict[str, Optional[str]]:
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def part_key(part: Part, **extra) -> str:
+    """
+    Cache key of `part`. Anything else that changes the outputs (export settings)
+    goes in `extra`.
+    """
+    payload = {
+        "builder": f"{part.builder.__module__}.{part.builder.__qualname__}",
+        "params": type(part.params).__name__,
+        "values": dataclasses.asdict(part.params),
+        "source": source_digest(part.builder),
+        "versions": library_versions(),
+        "extra": extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+class BuildCache:
+    def __init__(self, directory: Union[str, Path] = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        # Part entries live next to the thread cache (see threads.py)
+        self.directory = Path(directory) / "parts"
+        self.max_bytes = max_bytes
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str, formats: Sequence[str] = ENTRY_FORMATS) -> Optional[Path]:
+        """Directory of the entry for `key` if it holds `formats`, or None on a miss."""
+        entry = self._entry(key)
+        if not all((entry / f"part.{fmt}").is_file() for fmt in formats):
+            return None
+        # The entry's mtime is its last use, for LRU eviction
+        os.utime(entry)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        model: Optional[cq.Workplane],
+        quality: str = DEFAULT_QUALITY,
+        formats: Sequence[str] = ENTRY_FORMATS,
+        mesh: Optional[Mesh] = None,
+    ) -> Path:
+        """
+        Export `formats` of `model` into the entry for `key` and return its
+        directory. Mesh formats are written from `mesh` if given, in which case
+        `model` is only needed for the others.
+        """
+        entry = self._entry(key)
+        staging = self.directory / f"{key}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        export_with_mesh(model, "part", staging, [fmt for fmt in formats if fmt != "brep"], quality, mesh)
+        if "brep" in formats:
+            model.val().exportBrep(str(staging / "part.brep"))
+        # File by file, so that an entry can be completed later; another process
+        # storing the same entry writes the same files
+        entry.mkdir(exist_ok=True)
+        for path in staging.iterdir():
+            os.replace(path, entry / path.name)
+        shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=entry)
+        return entry
+
+    def entries(self) -> List[Tuple[Path, float, int]]:
+        """(directory, last use, size in bytes) of every entry."""
+        if not self.directory.is_dir():
+            return []
+        result = []
+        for entry in self.directory.iterdir():
+            if not entry.is_dir() or ".tmp-" in entry.name:
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            result.append((entry, entry.stat().st_mtime, size))
+        return result
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Remove least recently used entries (except `keep`) until the cache fits in `max_bytes`."""
+        entries = sorted(self.entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for entry, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def build_uncached(part: Part) -> cq.Workplane:
+    """`part.build()` without any cache on disk, the thread cache included."""
+    with disk_cache_disabled():
+        return part.build()
+
+
+def load_model(entry: Path) -> cq.Workplane:
+    return cq.Workplane(obj=cq.Shape.importBrep(str(entry / "part.brep")))
+
+
+def _sources(
+    part: Part,
+    formats: Sequence[str],
+    quality: str,
+    entry: Optional[Path] = None,
+) -> Tuple[Optional[cq.Workplane], Optional[Mesh]]:
+    """
+    The model and the mesh to export `formats` of `part` from; None stands for
+    what isn't needed. What a partial cache `entry` already holds is read back
+    rather than rebuilt. Visual models get their mesh from the fast path (see
+    visual.py) and are only built as a B-rep for the other formats.
+    """
+    def stored(fmt: str) -> bool:
+        return entry is not None and (entry / f"part.{fmt}").is_file()
+
+    needs_mesh = any(fmt in MESH_FORMATS for fmt in formats)
+    mesh = None
+    if needs_mesh and stored("npz"):
+        mesh = load_npz(entry / "part.npz")
+    elif needs_mesh and has_mesh_only_features(part.features(part.params)):
+        mesh = composite_mesh(part.features(part.params), quality)
+    model = None
+    if any(fmt not in MESH_FORMATS for fmt in formats) or (needs_mesh and mesh is None):
+        model = load_model(entry) if stored("brep") else part.build()
+    return model, mesh
+
+
+def build_cached(
+    part: Part,
+    cache: BuildCache,
+    quality: str = DEFAULT_QUALITY,
+    formats: Sequence[str] = MODEL_FORMATS,
+) -> Tuple[Path, bool]:
+    """
+    Entry directory holding `formats` of `part` and whether it was a cache hit.
+    Only the formats missing from the entry are made.
+    """
+    key = part_key(part, quality=quality)
+    entry = cache.get(key, formats)
+    if entry is not None:
+        return entry, True
+    partial = cache._entry(key)
+    missing = [fmt for fmt in formats if not (partial / f"part.{fmt}").is_file()]
+    model, mesh = _sources(part, missing, quality, partial)
+    return cache.put(key, model, quality, missing, mesh), False
+
+
+def mesh_cached(part: Part, cache: Optional[BuildCache] = None, quality: str = DEFAULT_QUALITY) -> Mesh:
+    """
+    Mesh of `part`. From `cache` it is the buffers saved alongside the part's STL,
+    from the same tessellation, so nothing is re-tessellated or parsed.
+    """
+    if cache is None:
+        with disk_cache_disabled():
+            model, mesh = _sources(part, ("npz",), quality)
+        return mesh if mesh is not None else tessellate_model(model, quality)
+    entry, _ = build_cached(part, cache, quality, ("npz",))
+    return load_npz(entry / "part.npz")
+
+
+def export_cached(
+    part: Part,
+    directory: Union[str, Path],
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+) -> Tuple[List[ExportReport], bool]:
+    """
+    Like `export_part(part.build(), part.stem, directory, formats, quality)` but
+    served from `cache` when possible. Returns the export reports and whether
+    it was a cache hit.
+    """
+    if cache is None:
+        with disk_cache_disabled():
+            model, mesh = _sources(part, formats, quality)
+        return export_with_mesh(model, part.stem, directory, formats, quality, mesh)[0], False
+    entry, hit = build_cached(part, cache, quality, formats)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    reports = []
+    for fmt in formats:
+        path = directory / f"{part.stem}.{fmt}"
+        shutil.copyfile(entry / f"part.{fmt}", path)
+        reports.append(report_file(path))
+    return reports, hit
@@ -0,0 +1,412 @@
+"""
+Clearance and interference check of the assembled connector.
+
+Places the sleeve, male and female pieces in their assembled poses (see
+assembly.py) and measures, on their meshes, the smallest gap between each
+pair of parts and the volume where they overlap. Each part is sampled into
+points (its mesh vertices plus random points on its triangles) and the
+distances from those points to the other part's triangles are computed in
+bulk with NumPy, instead of intersecting the B-reps.
+
+    python -m magnet_connector.check
+    python -m magnet_connector.check --quality print --samples 4000 --max-gap 1
+
+The rod of the male piece never sits in a female piece in the connector, so
+the thread fit is checked in a pose of its own: the threaded 2 mm of the rod
+in a female piece whose pilot hole is opened up to the thread major diameter,
+as it is once tapped.
+
+Meshes come from the build cache. Their tessellation tolerance (0.1 mm with
+the default render quality, which keeps the check well under a second) bounds
+the accuracy: curved surfaces are faceted by up to that much, and gaps within
+it are reported as touching. Parts that rest on each other (the male piece on
+the floor of its sleeve pocket) touch, so their clearance is 0 whatever the
+radial gap. The radial gap of every coaxial fit (e.g. the 24.00 male body in
+the 24.05 pocket) is therefore also reported on its own, exactly, from the
+part parameters and the assembled poses.
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .assembly import assembled_offsets, magnet_gap, stack_overhang
+from .features import Magnet
+from .female_thread import FemaleThreadParams
+from .male_thread import MaleThreadParams
+from .cache import BuildCache, mesh_cached
+from .export import QUALITY_PRESETS
+from .mesh import Mesh
+from .parts import PARTS, Part
+from .rangers_guard_sleeve import RangersGuardSleeveParams
+
+DEFAULT_QUALITY = "render"
+DEFAULT_SAMPLES = 1000   # Random surface points per part, on top of the mesh vertices
+DEFAULT_MAX_GAP = 0.5    # Larger gaps are only reported as "more than this"
+DEPTH_LIMIT = 5.0        # Deepest penetration measured
+MAX_VOXELS = 200_000     # Grid points of an interference volume estimate
+
+# Points are processed in spatially compact chunks, each against only the
+# triangles near it, to keep the (points x triangles) arrays small
+CHUNK_CELL = 1.0
+CHUNK_SIZE = 128
+# A point and triangle only improve on the smallest distance found by more than this
+BOUND_SLACK = 1e-9
+# Keeps the +Z rays of the inside test off mesh edges and vertices
+RAY_JITTER = np.array([3.1e-6, 1.7e-6])
+
+# Pairs of parts that touch or nearly touch in the assembled connector
+CONNECTOR_PAIRS = (
+    ("male_thread", "rangers_guard_sleeve"),
+    ("female_thread", "rangers_guard_sleeve"),
+    ("male_thread", "female_thread"),
+)
+
+
+@dataclass
+class Placed:
+    name: str
+    mesh: Mesh          # float64 vertices, in the assembled pose
+    points: np.ndarray  # (n, 3) samples of its surface
+
+
+@dataclass
+class PairResult:
+    name: str
+    clearance: float     # Smallest gap (inf if more than the max gap), or minus the penetration depth
+    interference: float  # Overlapping volume, mm³
+    status: str
+    seconds: float
+
+
+@dataclass(frozen=True)
+class RadialFit:
+    """A cylinder of one part in a coaxial hole of another, each over a span of Z in the assembled pose."""
+
+    name: str
+    shaft: float                  # Diameters
+    hole: float
+    shaft_span: Tuple[float, float]
+    hole_span: Tuple[float, float]
+
+    @property
+    def clearance(self) -> float:
+        """Radial gap, negative when the shaft is wider than the hole."""
+        return (self.hole - self.shaft) / 2
+
+    @property
+    def length(self) -> float:
+        """How far along the axis the shaft is in the hole."""
+        return max(0.0, min(self.shaft_span[1], self.hole_span[1]) - max(self.shaft_span[0], self.hole_span[0]))
+
+    @property
+    def status(self) -> str:
+        if self.length == 0:
+            return "apart"
+        return "INTERFERES" if self.clearance < 0 else "clear"
+
+
+def radial_fits(
+    male: MaleThreadParams = MaleThreadParams(),
+    female: FemaleThreadParams = FemaleThreadParams(),
+    sleeve: RangersGuardSleeveParams = RangersGuardSleeveParams(),
+    magnet: Magnet = Magnet(),
+) -> List[RadialFit]:
+    """The coaxial fits of the assembled connector, and of the male rod in a tapped female piece."""
+    offsets = assembled_offsets(male, female, sleeve, magnet)
+    male_z, female_z = offsets["male_thread"], offsets["female_thread"]
+    top = sleeve.cylinder_height
+    male_pocket = (top - sleeve.male_pocket_depth, top - sleeve.female_pocket_depth)
+    rod_z = female.height - male.threaded_length  # As in thread_fit_parts
+    return [
+        RadialFit("male_thread body / sleeve male pocket", male.body_diameter, sleeve.male_pocket_diameter,
+                  (male_z + male.rod_length, male_z + male.height), male_pocket),
+        RadialFit("female_thread body / sleeve female pocket", female.body_diameter, sleeve.female_pocket_diameter,
+                  (female_z, female_z + female.height), (top - sleeve.female_pocket_depth, top)),
+        RadialFit("male_thread rod / sleeve through hole", male.rod_diameter, sleeve.through_hole_diameter,
+                  (male_z, male_z + male.rod_length), (sleeve.stair_pocket_depth, male_pocket[0])),
+        RadialFit("male_thread rod / tapped female_thread", male.rod_diameter, female.thread_major_diameter,
+                  (rod_z, rod_z + male.rod_length), (0.0, female.height)),
+    ]
+
+
+def placed(name: str, mesh: Mesh, z: float, samples: int, rng: np.random.Generator) -> Placed:
+    mesh = Mesh(mesh.vertices.astype(np.float64) + (0.0, 0.0, z), mesh.triangles)
+    return Placed(name, mesh, surface_points(mesh, samples, rng))
+
+
+def surface_points(mesh: Mesh, count: int, rng: np.random.Generator) -> np.ndarray:
+    """The vertices of `mesh` plus `count` points spread uniformly over its area."""
+    corners = mesh.triangle_vertices
+    areas = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+    if count == 0 or areas.sum() == 0:
+        return mesh.vertices
+    picked = corners[rng.choice(len(areas), size=count, p=areas / areas.sum())]
+    u, v = rng.random((2, count))
+    # Reflect points of the far half of the parallelogram back into the triangle
+    outside = u + v > 1
+    u[outside], v[outside] = 1 - u[outside], 1 - v[outside]
+    random = (picked[:, 0] + u[:, None] * (picked[:, 1] - picked[:, 0])
+              + v[:, None] * (picked[:, 2] - picked[:, 0]))
+    return np.vstack([mesh.vertices, random])
+
+
+def _chunks(points: np.ndarray) -> Iterator[np.ndarray]:
+    """Indices of `points`, in chunks of nearby points."""
+    cells = np.floor(points / CHUNK_CELL).astype(np.int64)
+    order = np.lexsort(cells.T[::-1])
+    for start in range(0, len(order), CHUNK_SIZE):
+        yield order[start:start + CHUNK_SIZE]
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("...k,...k->...", a, b)
+
+
+def _segment_distances(relative: np.ndarray, edge: np.ndarray) -> np.ndarray:
+    """(p, t) distances to the segments `edge` (t, 3) of points at `relative` (p, t, 3) to their start."""
+    t = np.clip(_dot(relative, edge) / np.maximum(_dot(edge, edge), 1e-300), 0, 1)
+    return np.linalg.norm(relative - t[..., None] * edge, axis=-1)
+
+
+def point_triangle_distances(points: np.ndarray, corners: np.ndarray) -> np.ndarray:
+    """Distance from each of `points` (p, 3) to the nearest of the triangles `corners` (t, 3, 3)."""
+    a, b, c = corners[:, 0], corners[:, 1], corners[:, 2]
+    ab, ac, bc = b - a, c - a, c - b
+    normal = np.cross(ab, ac)
+    area2 = _dot(normal, normal)
+    ap = points[:, None, :] - a
+    bp, cp = ap - ab, ap - ac
+    # The nearest point is inside the triangle when the point is on the inner side of all three edges...
+    inside = ((_dot(np.cross(ab, ap), normal) >= 0)
+              & (_dot(np.cross(bc, bp), normal) >= 0)
+              & (_dot(np.cross(-ac, cp), normal) >= 0)
+              & (area2 > 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plane = np.where(inside, np.abs(_dot(ap, normal)) / np.sqrt(area2), np.inf)
+    # ...otherwise it's on one of the edges
+    edges = np.minimum(np.minimum(_segment_distances(ap, ab), _segment_distances(bp, bc)),
+                       _segment_distances(cp, -ac))
+    return np.minimum(plane, edges).min(axis=1)
+
+
+def distances(points: np.ndarray, mesh: Mesh, max_distance: float) -> np.ndarray:
+    """Distance from each point to the surface of `mesh`; inf where it's more than `max_distance`."""
+    corners = mesh.triangle_vertices
+    low, high = corners.min(axis=1), corners.max(axis=1)
+    result = np.full(len(points), np.inf)
+    for chunk in _chunks(points):
+        near = points[chunk]
+        candidates = np.all((low <= near.max(axis=0) + max_distance)
+                            & (high >= near.min(axis=0) - max_distance), axis=1)
+        if candidates.any():
+            result[chunk] = point_triangle_distances(near, corners[candidates])
+    result[result > max_distance] = np.inf
+    return result
+
+
+def smallest_distance(points: np.ndarray, mesh: Mesh, max_distance: float) -> float:
+    """
+    Smallest distance from any of `points` to the surface of `mesh` (inf if
+    more than `max_distance`). A point and triangle are only measured when their
+    distance can be below the smallest one found so far: it is at least the
+    distance to the triangle's plane and to its bounding box.
+    """
+    low, high = mesh.bounds
+    points = points[np.all((points >= low - max_distance) & (points <= high + max_distance), axis=1)]
+    if len(points) == 0:
+        return np.inf
+    corners = mesh.triangle_vertices
+    low, high = corners.min(axis=1), corners.max(axis=1)
+    near_points = np.all((low <= points.max(axis=0) + max_distance) & (high >= points.min(axis=0) - max_distance),
+                         axis=1)
+    corners, low, high = corners[near_points], low[near_points], high[near_points]
+    normal = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    length = np.linalg.norm(normal, axis=1)
+    unit = np.divide(normal, length[:, None], out=np.zeros_like(normal), where=length[:, None] > 0)
+    best = max_distance
+    for chunk in _chunks(points):
+        near = points[chunk]
+        candidates = np.flatnonzero(np.all((low <= near.max(axis=0) + best) & (high >= near.min(axis=0) - best), axis=1))
+        if len(candidates) == 0:
+            continue
+        outside = np.maximum(low[candidates] - near[:, None], near[:, None] - high[candidates])
+        bound = np.maximum(np.linalg.norm(np.maximum(outside, 0), axis=-1),
+                           np.abs(_dot(near[:, None] - corners[candidates, 0], unit[candidates])))
+        close = bound < best - BOUND_SLACK
+        rows, columns = close.any(axis=1), close.any(axis=0)
+        if rows.any():
+            best = min(best, point_triangle_distances(near[rows], corners[candidates[columns]]).min())
+    return best if best < max_distance else np.inf
+
+
+def inside(points: np.ndarray, mesh: Mesh) -> np.ndarray:
+    """Which points are inside the closed `mesh`: a ray cast up from them crosses it an odd number of times."""
+    result = np.zeros(len(points), dtype=bool)
+    low, high = mesh.bounds
+    within = np.flatnonzero(np.all((points >= low) & (points <= high), axis=1))
+    if len(within) == 0:
+        return result
+    corners = mesh.triangle_vertices
+    flat_low, flat_high = corners[:, :, :2].min(axis=1), corners[:, :, :2].max(axis=1)
+    xy = points[within, :2] + RAY_JITTER
+    for chunk in _chunks(xy):
+        near = xy[chunk]
+        candidates = np.all((flat_low <= near.max(axis=0)) & (flat_high >= near.min(axis=0)), axis=1)
+        if not candidates.any():
+            continue
+        tri = corners[candidates]
+        origin, e0, e1 = tri[:, 0, :2], tri[:, 1, :2] - tri[:, 0, :2], tri[:, 2, :2] - tri[:, 0, :2]
+        determinant = e0[:, 0] * e1[:, 1] - e1[:, 0] * e0[:, 1]
+        rel = near[:, None, :] - origin
+        # Barycentric coordinates of the ray in each triangle's XY projection; NaN/inf for vertical ones
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = (rel[..., 0] * e1[:, 1] - e1[:, 0] * rel[..., 1]) / determinant
+            v = (e0[:, 0] * rel[..., 1] - rel[..., 0] * e0[:, 1]) / determinant
+            hit = (u >= 0) & (v >= 0) & (u + v <= 1)
+            z = tri[:, 0, 2] + u * (tri[:, 1, 2] - tri[:, 0, 2]) + v * (tri[:, 2, 2] - tri[:, 0, 2])
+        crossings = np.count_nonzero(hit & (z > points[within[chunk], 2][:, None]), axis=1)
+        result[within[chunk]] = crossings % 2 == 1
+    return result
+
+
+def interference_volume(a: Mesh, b: Mesh, low: np.ndarray, high: np.ndarray) -> float:
+    """Volume inside both meshes within the box `low`..`high`, counted on a grid of at most MAX_VOXELS points."""
+    size = np.maximum(high - low, 1e-9)
+    step = (np.prod(size) / MAX_VOXELS) ** (1 / 3)
+    counts = np.maximum(np.floor(size / step), 1).astype(int)
+    cell = size / counts
+    axes = [low[i] + (np.arange(counts[i]) + 0.5) * cell[i] for i in range(3)]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    both = inside(grid, a)
+    both[both] = inside(grid[both], b)
+    return float(np.count_nonzero(both) * np.prod(cell))
+
+
+def check_pair(name: str, a: Placed, b: Placed, max_gap: float, contact: float) -> PairResult:
+    """
+    Smallest clearance and interference between two placed parts. Points closer
+    than `contact` to the other part, on either side of its surface, touch it.
+    """
+    start = time.perf_counter()
+    a_in_b, b_in_a = inside(a.points, b.mesh), inside(b.points, a.mesh)
+    # Points on the other part's surface (as where one rests on the other) only touch it
+    a_deep, b_deep = a.points[a_in_b], b.points[b_in_a]
+    a_deep = a_deep[np.isinf(distances(a_deep, b.mesh, contact))]
+    b_deep = b_deep[np.isinf(distances(b_deep, a.mesh, contact))]
+    if len(a_deep) or len(b_deep):
+        depths = np.concatenate([distances(a_deep, b.mesh, DEPTH_LIMIT), distances(b_deep, a.mesh, DEPTH_LIMIT)])
+        depth = np.where(np.isinf(depths), DEPTH_LIMIT, depths).max()
+        points = np.vstack([a_deep, b_deep])
+        # Where both parts are, around the points that went in
+        low = np.maximum.reduce([a.mesh.bounds[0], b.mesh.bounds[0], points.min(axis=0) - depth])
+        high = np.minimum.reduce([a.mesh.bounds[1], b.mesh.bounds[1], points.max(axis=0) + depth])
+        volume = interference_volume(a.mesh, b.mesh, low, high)
+        return PairResult(name, -depth, volume, "INTERFERES", time.perf_counter() - start)
+    clearance = min(smallest_distance(a.points[~a_in_b], b.mesh, max_gap),
+                    smallest_distance(b.points[~b_in_a], a.mesh, max_gap))
+    status = "touching" if clearance <= contact else "clear"
+    return PairResult(name, clearance, 0.0, status, time.perf_counter() - start)
+
+
+def connector_parts(
+    cache: Optional[BuildCache],
+    quality: str = DEFAULT_QUALITY,
+    samples: int = DEFAULT_SAMPLES,
+    seed: int = 0,
+) -> Dict[str, Placed]:
+    """The sleeve, male and female manufacturing models in their assembled poses."""
+    rng = np.random.default_rng(seed)
+    male, female, sleeve = (PARTS[name].params for name in ("male_thread", "female_thread", "rangers_guard_sleeve"))
+    return {
+        name: placed(name, mesh_cached(PARTS[name], cache, quality), z, samples, rng)
+        for name, z in assembled_offsets(male, female, sleeve).items()
+    }
+
+
+def thread_fit_parts(
+    cache: Optional[BuildCache],
+    quality: str = DEFAULT_QUALITY,
+    samples: int = DEFAULT_SAMPLES,
+    seed: int = 0,
+) -> Tuple[Placed, Placed]:
+    """The male piece with its threaded length in a tapped female piece."""
+    rng = np.random.default_rng(seed)
+    male_part, female_part = PARTS["male_thread"], PARTS["female_thread"]
+    female = female_part.params
+    tapped = Part("female_thread_tapped", female_part.builder, female_part.features,
+                  replace(female, pilot_hole_diameter=female.thread_major_diameter),
+                  female_part.directory, female_part.stem)
+    male_z = female.height - male_part.params.threaded_length
+    return (placed("male_thread", mesh_cached(male_part, cache, quality), male_z, samples, rng),
+            placed("female_thread_tapped", mesh_cached(tapped, cache, quality), 0.0, samples, rng))
+
+
+def check_assembly(
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+    samples: int = DEFAULT_SAMPLES,
+    max_gap: float = DEFAULT_MAX_GAP,
+    seed: int = 0,
+) -> List[PairResult]:
+    contact = QUALITY_PRESETS[quality].tolerance
+    parts = connector_parts(cache, quality, samples, seed)
+    results = [check_pair(f"{a} / {b}", parts[a], parts[b], max_gap, contact) for a, b in CONNECTOR_PAIRS]
+    rod, tapped = thread_fit_parts(cache, quality, samples, seed)
+    results.append(check_pair("male_thread rod / tapped female_thread", rod, tapped, max_gap, contact))
+    return results
+
+
+def format_fits(fits: Sequence[RadialFit]) -> str:
+    width = max(len(fit.name) for fit in fits)
+    lines = [f"{'coaxial fit':<{width}}  {'shaft':>7}  {'hole':>7}  {'radial gap':>10}  {'length':>6}  status"]
+    for fit in fits:
+        lines.append(f"{fit.name:<{width}}  {fit.shaft:>7.3f}  {fit.hole:>7.3f}  {fit.clearance:>10.3f}  "
+                     f"{fit.length:>6.2f}  {fit.status}")
+    return "\n".join(lines)
+
+
+def format_results(results: Sequence[PairResult], max_gap: float) -> str:
+    width = max(len(result.name) for result in results)
+    lines = [f"{'pair':<{width}}  {'clearance':>10}  {'overlap mm³':>11}  {'s':>6}  status"]
+    for result in results:
+        clearance = f">{max_gap:g}" if np.isinf(result.clearance) else f"{result.clearance:.3f}"
+        lines.append(f"{result.name:<{width}}  {clearance:>10}  {result.interference:>11.3f}  "
+                     f"{result.seconds:>6.3f}  {result.status}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.check", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"tessellation preset of the meshes (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help=f"random surface points per part on top of the vertices (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP,
+                        help=f"largest clearance measured, in mm (default: {DEFAULT_MAX_GAP:g})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cache = None if args.no_cache else BuildCache()
+    results = check_assembly(cache, args.quality, args.samples, args.max_gap, args.seed)
+    print(format_results(results, args.max_gap))
+    male, female, sleeve = (PARTS[name].params for name in ("male_thread", "female_thread", "rangers_guard_sleeve"))
+    fits = radial_fits(male, female, sleeve)
+    print()
+    print(format_fits(fits))
+    print(f"Magnet gap {magnet_gap(male, female):.3f} mm, "
+          f"female top {stack_overhang(male, female, sleeve):+.3f} mm from the sleeve top")
+    print(f"Checked in {time.perf_counter() - start:.2f}s")
+    if any(result.status == "INTERFERES" for result in (*results, *fits)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
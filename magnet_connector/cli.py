@@ -0,0 +1,49 @@
+"""
+Build and export parts from the registry. This is what the per-part scripts
+run; `python -m magnet_connector` (build.py) builds the whole graph.
+
+    python -m magnet_connector.cli                  # every part, into its own folder
+    python -m magnet_connector.cli male_thread      # only the named parts
+    python -m magnet_connector.cli --out-dir build  # everything into one folder
+    python -m magnet_connector.cli --no-cache       # rebuild even if nothing changed
+    python -m magnet_connector.cli --quality print  # finer STL for slicing
+    python -m magnet_connector.cli --formats step stl 3mf glb
+"""
+
+import argparse
+
+from .cache import CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, export_cached
+from .export import DEFAULT_FORMATS, DEFAULT_QUALITY, MESH_FORMATS, QUALITY_PRESETS
+from .parts import PARTS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help=f"parts to build (default: all). One of: {', '.join(PARTS)}")
+    parser.add_argument("--out-dir", help="write all outputs here instead of each part's folder")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"build cache location (default: {CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // 2**20,
+                        help="evict least recently used cache entries above this many MiB")
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"STL tessellation preset (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--formats", nargs="+", choices=["step", *MESH_FORMATS], default=list(DEFAULT_FORMATS),
+                        help=f"output formats (default: {' '.join(DEFAULT_FORMATS)})")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.parts if name not in PARTS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+
+    cache = None if args.no_cache else BuildCache(args.cache_dir, args.cache_size * 2**20)
+    for name in args.parts or PARTS:
+        part = PARTS[name]
+        reports, hit = export_cached(part, args.out_dir or part.output_dir, args.formats, cache,
+                                    args.quality)
+        for report in reports:
+            print(f"{report} (cached)" if hit else report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Long-lived build server for design sessions.
+
+Importing cadquery/OCP/cq_warehouse takes seconds per script run. The server
+pays that once, keeps the feature tree and the thread solids in memory, and
+watches the part sources: when a module under magnet_connector/ is saved it is
+reloaded and only the parts whose cache key changed are rebuilt and exported.
+
+    python -m magnet_connector.daemon serve                   # watch and rebuild every part
+    python -m magnet_connector.daemon serve --watch male_thread male_thread_visual
+    python -m magnet_connector.daemon build female_thread     # from another terminal
+    python -m magnet_connector.daemon status
+    python -m magnet_connector.daemon stop
+
+Clients talk to the server over a Unix socket with one JSON request per
+connection; the server streams back JSON lines. Only the modules the parts
+are built from are reloaded, so restart the server after editing the build
+infrastructure itself (cache.py, export.py, this file, ...).
+"""
+
+import argparse
+import importlib
+import json
+import linecache
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .cache import CACHE_DIR, BuildCache, export_cached, part_key
+from .export import DEFAULT_QUALITY, QUALITY_PRESETS
+from .feature_tree import _package_modules, clear_source_cache
+
+DEFAULT_SOCKET = Path(os.environ.get("MAGNET_CONNECTOR_SOCKET", CACHE_DIR / "daemon.sock"))
+POLL_SECONDS = 0.25
+# Reloading these would throw away the in-memory caches the server exists for
+KEEP_LOADED = ("feature_tree", "threads", "profiler", "export", "mesh")
+
+_PACKAGE = __name__.rpartition(".")[0]
+
+
+def _parts_module() -> ModuleType:
+    return importlib.import_module(f"{_PACKAGE}.parts")
+
+
+def source_modules() -> Dict[str, ModuleType]:
+    """Package modules the part registry is built from, by name."""
+    modules: Dict[str, ModuleType] = {}
+    _package_modules(_parts_module(), modules)
+    return modules
+
+
+def _reload_order(modules: Dict[str, ModuleType], changed: Sequence[str]) -> List[str]:
+    """`changed` and every module depending on one of them, dependencies first."""
+    uses = {}
+    for name, module in modules.items():
+        reachable: Dict[str, ModuleType] = {}
+        _package_modules(module, reachable)
+        uses[name] = set(reachable) - {name}
+    ordered: List[str] = []
+
+    def visit(name):
+        if name in ordered:
+            return
+        for dep in sorted(uses[name]):
+            visit(dep)
+        ordered.append(name)
+
+    for name in sorted(modules):
+        visit(name)
+    stale = set(changed)
+    for name in ordered:
+        if uses[name] & stale and name.rpartition(".")[2] not in KEEP_LOADED:
+            stale.add(name)
+    return [name for name in ordered if name in stale]
+
+
+class BuildServer:
+    def __init__(
+        self,
+        watch: Optional[Sequence[str]] = None,
+        quality: str = DEFAULT_QUALITY,
+        cache: Optional[BuildCache] = None,
+        log: Callable[[str], None] = print,
+    ):
+        self.watch = list(watch) if watch else list(_parts_module().PARTS)
+        self.quality = quality
+        self.cache = cache if cache is not None else BuildCache()
+        self.log = log
+        self.keys: Dict[str, str] = {}
+        self.mtimes: Dict[str, float] = {}
+        self.builds = 0
+        self.started = time.time()
+
+    def warm_up(self) -> None:
+        """Import the optional heavy libraries and replay every watched part into memory."""
+        for name in ("cq_warehouse.fastener", "pyvista"):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+        parts = _parts_module().PARTS
+        for name in self.watch:
+            start = time.perf_counter()
+            parts[name].replay()
+            self.log(f"{name} loaded in {time.perf_counter() - start:.2f}s")
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        """Remember the current source mtimes and part cache keys, to detect changes against."""
+        self.mtimes = {name: os.stat(module.__file__).st_mtime for name, module in source_modules().items()}
+        parts = _parts_module().PARTS
+        self.keys = {name: part_key(parts[name], quality=self.quality) for name in self.watch}
+
+    def build(self, names: Sequence[str], reply: Callable[[str], None]) -> bool:
+        parts = _parts_module().PARTS
+        ok = True
+        for name in names:
+            start = time.perf_counter()
+            try:
+                part = parts[name]
+                reports, hit = export_cached(part, part.output_dir, cache=self.cache, quality=self.quality)
+            except Exception as e:
+                reply(f"{name} failed: {e!r}")
+                ok = False
+                continue
+            for report in reports:
+                reply(f"{report} (cached)" if hit else str(report))
+            reply(f"{name} done in {time.perf_counter() - start:.2f}s")
+            self.builds += 1
+        return ok
+
+    def check_sources(self) -> List[str]:
+        """Reload modules saved since the last check and rebuild the parts they changed. Returns those parts."""
+        modules = source_modules()
+        changed = [name for name, module in modules.items()
+                   if os.stat(module.__file__).st_mtime != self.mtimes.get(name)]
+        if not changed:
+            return []
+        linecache.checkcache()
+        try:
+            for name in _reload_order(modules, changed):
+                importlib.reload(sys.modules[name])
+            # Kept modules' step functions stay the same objects
+            clear_source_cache()
+        except Exception as e:
+            # Most likely a syntax error in the file being edited; try again on the next save
+            self.log(f"Reloading {', '.join(changed)} failed: {e!r}")
+            self.mtimes.update({name: os.stat(modules[name].__file__).st_mtime for name in changed})
+            return []
+        previous = self.keys
+        self.snapshot()
+        rebuild = [name for name in self.watch if self.keys[name] != previous.get(name)]
+        if rebuild:
+            self.log(f"{', '.join(changed)} changed, rebuilding {', '.join(rebuild)}")
+            self.build(rebuild, self.log)
+        return rebuild
+
+    def handle(self, request: dict, reply: Callable[[str], None]) -> bool:
+        """Serve one request. Returns False to stop the server."""
+        command = request.get("command")
+        if command == "build":
+            self.check_sources()
+            names = request.get("parts") or self.watch
+            unknown = [name for name in names if name not in _parts_module().PARTS]
+            if unknown:
+                reply(f"unknown part(s): {', '.join(unknown)}")
+                return True
+            self.build(names, reply)
+        elif command == "status":
+            reply(f"pid {os.getpid()}, up {time.time() - self.started:.0f}s, {self.builds} builds, "
+                  f"watching {', '.join(self.watch)}")
+        elif command == "stop":
+            reply("stopping")
+            return False
+        else:
+            reply(f"unknown command {command!r}")
+        return True
+
+    def serve(self, path: Path = DEFAULT_SOCKET, poll: float = POLL_SECONDS) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen()
+        server.settimeout(poll)
+        self.log(f"Listening on {path}")
+        running = True
+        try:
+            while running:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    self.check_sources()
+                    continue
+                with connection, connection.makefile("rw", encoding="utf-8") as stream:
+                    def reply(message: str, stream=stream) -> None:
+                        stream.write(json.dumps({"message": message}) + "\n")
+                        stream.flush()
+
+                    start = time.perf_counter()
+                    try:
+                        running = self.handle(json.loads(stream.readline()), reply)
+                    except Exception as e:
+                        reply(f"error: {e!r}")
+                    stream.write(json.dumps({"done": True, "seconds": time.perf_counter() - start}) + "\n")
+        finally:
+            server.close()
+            path.unlink(missing_ok=True)
+
+
+def request(command: str, parts: Sequence[str] = (), path: Path = DEFAULT_SOCKET) -> float:
+    """Send a request to a running server, print its replies and return the server-side seconds."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(path))
+        with client.makefile("rw", encoding="utf-8") as stream:
+            stream.write(json.dumps({"command": command, "parts": list(parts)}) + "\n")
+            stream.flush()
+            for line in stream:
+                reply = json.loads(line)
+                if reply.get("done"):
+                    return reply["seconds"]
+                print(reply["message"])
+    raise ConnectionError("The server closed the connection without finishing")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.daemon", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET, help=f"(default: {DEFAULT_SOCKET})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the server in this terminal")
+    serve.add_argument("--watch", nargs="+", metavar="PART", help="parts to rebuild on save (default: all)")
+    serve.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                       help=f"STL tessellation preset (default: {DEFAULT_QUALITY})")
+    serve.add_argument("--poll", type=float, default=POLL_SECONDS, help="seconds between source checks")
+    serve.add_argument("--no-warm", action="store_true", help="don't replay the watched parts on start")
+    build = commands.add_parser("build", help="build and export parts (default: all watched)")
+    build.add_argument("parts", nargs="*", metavar="PART")
+    commands.add_parser("status", help="show what the server is doing")
+    commands.add_parser("stop", help="shut the server down")
+    args = parser.parse_args(argv)
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("Unix sockets are not available on this platform")
+
+    if args.command == "serve":
+        parts = _parts_module().PARTS
+        unknown = [name for name in args.watch or () if name not in parts]
+        if unknown:
+            parser.error(f"unknown part(s): {', '.join(unknown)}")
+        server = BuildServer(args.watch, args.quality)
+        if not args.no_warm:
+            server.warm_up()
+        else:
+            server.snapshot()
+        server.serve(args.socket, args.poll)
+        return
+    try:
+        seconds = request(args.command, getattr(args, "parts", ()), args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.exit(f"No server listening on {args.socket}, start one with: python -m magnet_connector.daemon serve")
+    print(f"({seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
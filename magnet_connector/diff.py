@@ -0,0 +1,277 @@
+"""
+Geometry diff of two versions of a part, on a voxel grid.
+
+Both meshes are voxelized on one shared grid: a ray is cast up every column of
+the grid and each voxel center is inside a part when an odd number of the
+part's triangles cross the ray above it. The voxels in only one of the two
+give the added and removed volume; the largest distance from either surface
+to the other is the max deviation. No B-rep boolean is involved, so comparing
+two parts takes seconds.
+
+    python -m magnet_connector.diff rangers_guard_sleeve_01_00_00 rangers_guard_sleeve
+    python -m magnet_connector.diff magnet_holes_01_00_00 magnet_holes_01_00_01 --axis z
+    python -m magnet_connector.diff male_thread --set magnets.hole_diameter=4.2 --voxel 0.05
+    python -m magnet_connector.diff old/rangers_guard_sleeve.stl rangers_guard_sleeve
+
+A version is a part, or a binary STL file (e.g. a committed one, loaded with
+`load_stl`). With a single part, the second version is that part with the
+`--set` values. The parts are compared where they are built, without aligning them. The
+overlay image (`diffs/<a>__<b>.png`) looks along `--axis`: the parts in grey,
+material added in the second version in red and removed in blue, darker where
+more of it is stacked along the view. Differences smaller than a voxel, or
+than the tessellation tolerance, aren't resolved.
+"""
+
+import argparse
+import struct
+import time
+import zlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import BuildCache, mesh_cached
+from .check import RAY_JITTER, distances, surface_points
+from .export import DEFAULT_QUALITY, QUALITY_PRESETS
+from .mesh import Mesh, load_stl
+from .parts import PARTS, Part
+from .sweep import with_overrides
+
+DEFAULT_VOXELS = 2_000_000   # Grid points, when no voxel size is given
+DEFAULT_SAMPLES = 4000       # Random surface points per part for the deviation, on top of the vertices
+DEFAULT_MAX_DEVIATION = 5.0  # Larger deviations are only reported as "more than this"
+COLUMN_CHUNK = 256           # Grid columns ray cast at once
+IMAGE_SIZE = 800             # Pixels along the longer side of the overlay, roughly
+AXES = {"x": 0, "y": 1, "z": 2}
+
+BACKGROUND = np.array([255, 255, 255], dtype=float)
+PART = np.array([205, 205, 205], dtype=float)
+ADDED = np.array([200, 30, 30], dtype=float)
+REMOVED = np.array([30, 80, 200], dtype=float)
+
+
+@dataclass(frozen=True)
+class DiffResult:
+    volume_a: float      # mm³
+    volume_b: float
+    added: float         # In b but not in a, mm³
+    removed: float       # In a but not in b, mm³
+    max_deviation: float  # mm, inf if more than the max deviation searched
+    voxel: float         # Edge of a voxel, mm
+    seconds: float
+
+    def format(self, max_deviation: float) -> str:
+        deviation = f"{self.max_deviation:.3f} mm" if np.isfinite(self.max_deviation) else \
+            f"more than {max_deviation:g} mm"
+        return "\n".join([
+            f"volume    {self.volume_a:>10.2f} -> {self.volume_b:.2f} mm³",
+            f"added     {self.added:>10.2f} mm³",
+            f"removed   {self.removed:>10.2f} mm³",
+            f"deviation {deviation:>10}",
+            f"(voxels of {self.voxel:.3f} mm, {self.seconds:.2f}s)",
+        ])
+
+
+def grid_axes(low: np.ndarray, high: np.ndarray, voxel: Optional[float] = None,
+              voxels: int = DEFAULT_VOXELS) -> Tuple[List[np.ndarray], float]:
+    """Voxel centers along x, y and z covering `low`..`high` with a voxel of margin, and the voxel size."""
+    size = high - low
+    if voxel is None:
+        voxel = float((np.prod(size) / voxels) ** (1 / 3))
+    counts = np.ceil(size / voxel).astype(int) + 2
+    return [low[i] - voxel + (np.arange(counts[i]) + 0.5) * voxel for i in range(3)], voxel
+
+
+def voxelize(mesh: Mesh, axes: Sequence[np.ndarray]) -> np.ndarray:
+    """(nx, ny, nz) booleans: which grid points are inside the closed `mesh`."""
+    x, y, z = axes
+    columns = np.stack(np.meshgrid(x, y, indexing="ij"), axis=-1).reshape(-1, 2) + RAY_JITTER
+    corners = mesh.triangle_vertices.astype(np.float64)
+    flat_low, flat_high = corners[:, :, :2].min(axis=1), corners[:, :, :2].max(axis=1)
+    result = np.zeros((len(columns), len(z)), dtype=bool)
+    for start in range(0, len(columns), COLUMN_CHUNK):
+        near = columns[start:start + COLUMN_CHUNK]
+        candidates = np.all((flat_low <= near.max(axis=0)) & (flat_high >= near.min(axis=0)), axis=1)
+        if not candidates.any():
+            continue
+        tri = corners[candidates]
+        origin, e0, e1 = tri[:, 0, :2], tri[:, 1, :2] - tri[:, 0, :2], tri[:, 2, :2] - tri[:, 0, :2]
+        determinant = e0[:, 0] * e1[:, 1] - e1[:, 0] * e0[:, 1]
+        rel = near[:, None, :] - origin
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = (rel[..., 0] * e1[:, 1] - e1[:, 0] * rel[..., 1]) / determinant
+            v = (e0[:, 0] * rel[..., 1] - rel[..., 0] * e0[:, 1]) / determinant
+            hit = (u >= 0) & (v >= 0) & (u + v <= 1)
+            heights = tri[:, 0, 2] + u * (tri[:, 1, 2] - tri[:, 0, 2]) + v * (tri[:, 2, 2] - tri[:, 0, 2])
+        # Every column's crossings, lowest first, after the -inf of the triangles it misses
+        most = int(np.count_nonzero(hit, axis=1).max())
+        if most == 0:
+            continue
+        crossings = np.sort(np.where(hit, heights, -np.inf), axis=1)[:, -most:]
+        above = np.count_nonzero(crossings[:, :, None] > z[None, None, :], axis=1)
+        result[start:start + COLUMN_CHUNK] = above % 2 == 1
+    return result.reshape(len(x), len(y), len(z))
+
+
+def max_deviation(a: Mesh, b: Mesh, near: float, limit: float, samples: int = DEFAULT_SAMPLES,
+                  seed: int = 0) -> float:
+    """
+    Largest distance from a point of either surface to the other surface,
+    inf if more than `limit`. Points within `near` of the other surface are
+    settled first, cheaply, and only the rest are searched up to `limit`.
+    """
+    rng = np.random.default_rng(seed)
+    deviation = 0.0
+    for mesh, other in ((a, b), (b, a)):
+        mesh = Mesh(mesh.vertices.astype(np.float64), mesh.triangles)
+        other = Mesh(other.vertices.astype(np.float64), other.triangles)
+        points = surface_points(mesh, samples, rng)
+        close = distances(points, other, near)
+        far = np.isinf(close)
+        deviation = max(deviation, float(close[~far].max(initial=0.0)))
+        if far.any():
+            deviation = max(deviation, float(distances(points[far], other, limit).max()))
+    return deviation
+
+
+def diff_meshes(
+    a: Mesh,
+    b: Mesh,
+    voxel: Optional[float] = None,
+    voxels: int = DEFAULT_VOXELS,
+    near: float = 0.1,
+    limit: float = DEFAULT_MAX_DEVIATION,
+) -> Tuple[DiffResult, np.ndarray, np.ndarray]:
+    """The diff of two meshes and their voxel grids (see `voxelize`)."""
+    start = time.perf_counter()
+    low = np.minimum(a.bounds[0], b.bounds[0]).astype(np.float64)
+    high = np.maximum(a.bounds[1], b.bounds[1]).astype(np.float64)
+    axes, voxel = grid_axes(low, high, voxel, voxels)
+    in_a, in_b = voxelize(a, axes), voxelize(b, axes)
+    cell = voxel ** 3
+    result = DiffResult(
+        volume_a=float(np.count_nonzero(in_a) * cell),
+        volume_b=float(np.count_nonzero(in_b) * cell),
+        added=float(np.count_nonzero(in_b & ~in_a) * cell),
+        removed=float(np.count_nonzero(in_a & ~in_b) * cell),
+        max_deviation=max_deviation(a, b, near, limit),
+        voxel=voxel,
+        seconds=0.0,
+    )
+    return replace(result, seconds=time.perf_counter() - start), in_a, in_b
+
+
+def overlay(in_a: np.ndarray, in_b: np.ndarray, axis: str = "y") -> np.ndarray:
+    """(height, width, 3) uint8 image of both voxel grids and their difference, looking along `axis`."""
+    index = AXES[axis]
+    present = (in_a | in_b).any(axis=index)
+    added = np.count_nonzero(in_b & ~in_a, axis=index)
+    removed = np.count_nonzero(in_a & ~in_b, axis=index)
+    net = (added - removed).astype(float)
+    scale = max(np.abs(net).max(), 1.0)
+    # Full colour from a third of the largest stack on, so that thin changes still show
+    strength = np.clip(np.abs(net) / scale * 3, 0, 1)[..., None]
+    color = np.where((net > 0)[..., None], ADDED, REMOVED)
+    image = np.where(present[..., None], PART, BACKGROUND)
+    image = np.where((net != 0)[..., None], image + (color - image) * np.maximum(strength, 0.35), image)
+    # Rows from the top of the view: z up for side views, y up looking down z
+    image = np.flip(np.swapaxes(image, 0, 1), axis=0)
+    zoom = max(1, IMAGE_SIZE // max(image.shape[:2]))
+    return np.repeat(np.repeat(image, zoom, axis=0), zoom, axis=1).round().astype(np.uint8)
+
+
+def write_png(path: Path, image: np.ndarray) -> None:
+    """Write an (height, width, 3) uint8 image as an 8 bit RGB PNG."""
+    height, width, _ = image.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    # Every row starts with filter type 0 (none)
+    rows = np.hstack([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, width * 3)])
+    path.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def version_mesh(
+    version: str,
+    cache: Optional[BuildCache],
+    quality: str = DEFAULT_QUALITY,
+    part: Optional[Part] = None,
+) -> Mesh:
+    """Mesh of a version: a part of PARTS (or `part`, a variant of it) or a binary STL file."""
+    if part is None and version not in PARTS:
+        return load_stl(version)
+    return mesh_cached(part or PARTS[version], cache, quality)
+
+
+def version_name(version: str) -> str:
+    return version if version in PARTS else Path(version).stem
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.diff", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="+", metavar="PART",
+                        help=f"one or two STL files or parts, of: {', '.join(PARTS)}")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", dest="settings",
+                        help="parameter value of the second version, e.g. magnets.count=16 (repeatable)")
+    parser.add_argument("--voxel", type=float, help=f"voxel size in mm (default: about {DEFAULT_VOXELS:,} voxels)")
+    parser.add_argument("--axis", choices=list(AXES), default="y", help="view direction of the image (default: y)")
+    parser.add_argument("--max-deviation", type=float, default=DEFAULT_MAX_DEVIATION,
+                        help=f"largest deviation searched for, in mm (default: {DEFAULT_MAX_DEVIATION:g})")
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"tessellation preset (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--out-dir", default="diffs", help="where to write the image (default: diffs)")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    args = parser.parse_args(argv)
+    if len(args.parts) > 2:
+        parser.error("expected one or two parts")
+    unknown = [name for name in args.parts if name not in PARTS and not Path(name).is_file()]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+    if len(args.parts) == 1 and not args.settings:
+        parser.error("give a second part or --set values to compare with")
+    versions = args.parts * 2 if len(args.parts) == 1 else args.parts
+    if args.settings and versions[1] not in PARTS:
+        parser.error("--set only applies to a part, not to an STL file")
+
+    overrides = {}
+    for setting in args.settings:
+        name, sep, value = setting.partition("=")
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {setting!r}")
+        overrides[name] = float(value)
+    variant = None
+    if overrides:
+        part = PARTS[versions[1]]
+        try:
+            variant = replace(part, params=with_overrides(part.params, overrides))
+        except ValueError as e:
+            parser.error(str(e))
+
+    cache = None if args.no_cache else BuildCache()
+    start = time.perf_counter()
+    a = version_mesh(versions[0], cache, args.quality)
+    b = version_mesh(versions[1], cache, args.quality, variant)
+    first, second = version_name(versions[0]), version_name(versions[1])
+    print(f"Meshes of {first} and {second} in {time.perf_counter() - start:.2f}s")
+    result, in_a, in_b = diff_meshes(a, b, args.voxel, near=QUALITY_PRESETS[args.quality].tolerance,
+                                     limit=args.max_deviation)
+    print(result.format(args.max_deviation))
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{first}__{second}{'_set' if overrides else ''}.png"
+    write_png(path, overlay(in_a, in_b, args.axis))
+    print(f"Overlay written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Vector technical drawing views, projected straight from the B-rep with
+OpenCascade's hidden line removal. No OpenGL context is involved, so this runs
+on headless build machines, and each SVG is a few dozen KiB instead of a
+2048x2048 PNG screenshot.
+
+    python -m magnet_connector.drawing                        # male_thread and female_thread
+    python -m magnet_connector.drawing female_thread --hidden --pdf
+
+Every view is written to `<view>_view.svg` in the part's technical_drawing folder,
+with the key diameters dimensioned automatically (see `CALLOUTS`).
+PDF output needs cairosvg.
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import cadquery as cq
+import numpy as np
+
+from .cache import BuildCache, build_cached, build_uncached, load_model
+from .female_thread import FemaleThreadParams
+from .male_thread import MaleThreadParams
+from .parts import PARTS
+from .render import drawing_dir
+
+DEFAULT_SCALE = 4.0       # Paper millimeters per model millimeter
+TEXT_SIZE = 3.5           # Paper millimeters
+HLR_TOLERANCE = 1e-3      # Same as cadquery's SVG exporter
+DISCRETIZATION_TOLERANCE = 1e-3
+
+Vector = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class Projection:
+    name: str
+    direction: Vector  # From the part towards the viewer
+    x_dir: Vector      # Horizontal axis of the drawing
+
+
+PROJECTIONS = (
+    Projection("front", (0, -1, 0), (1, 0, 0)),
+    Projection("top", (0, 0, 1), (1, 0, 0)),
+    Projection("side", (1, 0, 0), (0, 1, 0)),
+    Projection("bottom", (0, 0, -1), (1, 0, 0)),
+    Projection("isometric", (1, 1, 1), (-1, 1, 0)),
+)
+
+
+@dataclass(frozen=True)
+class Callout:
+    """A dimension of a circle around the part's axis, drawn on one view."""
+
+    view: str
+    label: str
+    radius: float
+    kind: str = "diameter"  # "diameter", "pitch" (dashed circle with a radius line) or "note" (leader only)
+    z: float = 0.0          # Height of the dimension line on the front and side views
+    angle: float = 0.0      # Direction of the dimension line on the top and bottom views (degrees)
+
+
+def male_thread_callouts(params: MaleThreadParams) -> List[Callout]:
+    magnets = params.magnets
+    return [
+        Callout("top", f"⌀{params.bore_diameter:.2f} through", params.bore_diameter / 2, angle=135),
+        # Between two magnet pockets
+        Callout("top", f"R{magnets.pitch_radius:g} magnet pitch circle", magnets.pitch_radius, "pitch",
+                angle=180 / magnets.count),
+        Callout("front", f"⌀{params.rod_diameter:.2f}", params.rod_diameter / 2, z=params.threaded_length / 2),
+        Callout("front", f"⌀{params.runoff_diameter:.2f} runoff", params.runoff_diameter / 2,
+                z=(params.threaded_length + params.rod_length) / 2),
+    ]
+
+
+def female_thread_callouts(params: FemaleThreadParams) -> List[Callout]:
+    magnets = params.magnets
+    hole_radius = params.pilot_hole_diameter / 2
+    thread = f"M{params.thread_major_diameter:g}x{params.thread_pitch:g}"
+    return [
+        Callout("top", f"⌀{params.pilot_hole_diameter:.2f}, tap {thread}", hole_radius, angle=135),
+        Callout("top", f"{params.chamfer:g} × 45° chamfer", hole_radius + params.chamfer, "note", angle=45),
+        Callout("bottom", f"R{magnets.pitch_radius:g} magnet pitch circle", magnets.pitch_radius, "pitch",
+                angle=180 / magnets.count),
+    ]
+
+
+# Part -> dimensions drawn on its views
+CALLOUTS: Dict[str, Callable[[Any], List[Callout]]] = {
+    "male_thread": male_thread_callouts,
+    "female_thread": female_thread_callouts,
+}
+
+
+def _polylines(compounds) -> List[np.ndarray]:
+    from OCP.BRepAdaptor import BRepAdaptor_Curve
+    from OCP.BRepLib import BRepLib
+    from OCP.GCPnts import GCPnts_QuasiUniformDeflection
+
+    polylines = []
+    for compound in compounds:
+        if compound.IsNull():
+            continue
+        # The projected edges only have 2D curves
+        BRepLib.BuildCurves3d_s(compound, HLR_TOLERANCE)
+        for edge in cq.Shape.cast(compound).Edges():
+            curve = BRepAdaptor_Curve(edge.wrapped)
+            points = GCPnts_QuasiUniformDeflection(curve, DISCRETIZATION_TOLERANCE,
+                                                   curve.FirstParameter(), curve.LastParameter())
+            if points.IsDone():
+                polylines.append(np.array([(points.Value(i).X(), points.Value(i).Y())
+                                           for i in range(1, points.NbPoints() + 1)]))
+    return polylines
+
+
+def project(shape: cq.Shape, projection: Projection) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Visible and hidden edges of `shape` as (k, 2) polylines in drawing coordinates (mm)."""
+    from OCP.gp import gp_Ax2, gp_Dir, gp_Pnt
+    from OCP.HLRAlgo import HLRAlgo_Projector
+    from OCP.HLRBRep import HLRBRep_Algo, HLRBRep_HLRToShape
+
+    hlr = HLRBRep_Algo()
+    hlr.Add(shape.wrapped)
+    hlr.Projector(HLRAlgo_Projector(gp_Ax2(gp_Pnt(), gp_Dir(*projection.direction), gp_Dir(*projection.x_dir))))
+    hlr.Update()
+    hlr.Hide()
+    shapes = HLRBRep_HLRToShape(hlr)
+    visible = _polylines([shapes.VCompound(), shapes.Rg1LineVCompound(), shapes.OutLineVCompound()])
+    hidden = _polylines([shapes.HCompound(), shapes.OutLineHCompound()])
+    return visible, hidden
+
+
+_STYLE = f"""
+  .visible {{ stroke: black; stroke-width: 0.35; fill: none; stroke-linejoin: round; }}
+  .hidden {{ stroke: gray; stroke-width: 0.25; fill: none; stroke-dasharray: 1.5 0.75; }}
+  .dimension {{ stroke: black; stroke-width: 0.18; fill: none; }}
+  .pitch {{ stroke: black; stroke-width: 0.18; fill: none; stroke-dasharray: 6 1 1 1; }}
+  .arrow {{ fill: black; }}
+  text {{ font-family: sans-serif; font-size: {TEXT_SIZE}px; }}
+"""
+
+
+class _Sheet:
+    """SVG elements in paper millimeters, tracking their extent for the viewBox."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.elements: List[str] = []
+        self.low = np.array([math.inf, math.inf])
+        self.high = -self.low
+
+    def paper(self, points) -> np.ndarray:
+        """Drawing (mm, y up) to paper (mm, y down) coordinates."""
+        points = np.asarray(points, dtype=float) * (self.scale, -self.scale)
+        flat = points.reshape(-1, 2)
+        self.low = np.minimum(self.low, flat.min(axis=0))
+        self.high = np.maximum(self.high, flat.max(axis=0))
+        return points
+
+    def polyline(self, points, css: str) -> None:
+        text = " ".join(f"{x:.3f},{y:.3f}" for x, y in self.paper(points))
+        self.elements.append(f'<polyline class="{css}" points="{text}"/>')
+
+    def circle(self, center, radius: float, css: str) -> None:
+        x, y = self.paper(center)
+        self.paper([np.asarray(center) - radius, np.asarray(center) + radius])
+        self.elements.append(f'<circle class="{css}" cx="{x:.3f}" cy="{y:.3f}" r="{radius * self.scale:.3f}"/>')
+
+    def arrow(self, tip, direction, length: float = 2.5, width: float = 0.8) -> None:
+        """Arrowhead (sized in paper mm) pointing along `direction` with its tip at `tip`."""
+        tip = self.paper(tip)
+        forward = np.asarray(direction, dtype=float) * (1, -1)
+        side = np.array([-forward[1], forward[0]])
+        base = tip - forward * length
+        corners = (tip, base + side * width / 2, base - side * width / 2)
+        text = " ".join(f"{x:.3f},{y:.3f}" for x, y in corners)
+        self.elements.append(f'<polygon class="arrow" points="{text}"/>')
+
+    def text(self, anchor, label: str, align: str) -> None:
+        x, y = self.paper(anchor)
+        # Rough extent, for the viewBox
+        width = 0.6 * TEXT_SIZE * len(label)
+        left = x - width if align == "end" else x
+        self.low = np.minimum(self.low, (left, y - TEXT_SIZE))
+        self.high = np.maximum(self.high, (left + width, y + TEXT_SIZE / 2))
+        self.elements.append(f'<text x="{x:.3f}" y="{y - 0.8:.3f}" text-anchor="{align}">{label}</text>')
+
+    def svg(self, margin: float = 5.0) -> str:
+        low = self.low - margin
+        width, height = self.high - self.low + 2 * margin
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.2f}mm" height="{height:.2f}mm" '
+            f'viewBox="{low[0]:.3f} {low[1]:.3f} {width:.3f} {height:.3f}">\n'
+            f"<style>{_STYLE}</style>\n" + "\n".join(self.elements) + "\n</svg>\n"
+        )
+
+
+def _draw_callout(sheet: _Sheet, callout: Callout, projection: Projection, outline: np.ndarray) -> None:
+    # Top and bottom views look down the axis; on the front and side views the
+    # dimension line is horizontal at the callout's height.
+    if projection.name in ("top", "bottom"):
+        center, angle = np.zeros(2), math.radians(callout.angle)
+    else:
+        center, angle = np.array([0.0, callout.z]), 0.0
+    direction = np.array([math.cos(angle), math.sin(angle)])
+    point = center + callout.radius * direction
+    # The label sits just outside the part's `outline` points
+    outer_radius = float(np.linalg.norm(outline - center, axis=1).max())
+    end = center + (outer_radius + 8 / sheet.scale) * direction
+
+    if callout.kind == "diameter":
+        sheet.polyline([center - callout.radius * direction, end], "dimension")
+        sheet.arrow(point, direction)
+        sheet.arrow(center - callout.radius * direction, -direction)
+    elif callout.kind == "pitch":
+        sheet.circle(center, callout.radius, "pitch")
+        sheet.polyline([center, end], "dimension")
+        sheet.arrow(point, direction)
+    else:
+        sheet.polyline([point, end], "dimension")
+        sheet.arrow(point, -direction)
+    sheet.text(end, callout.label, "start" if direction[0] >= -1e-9 else "end")
+
+
+def view_svg(
+    shape: cq.Shape,
+    projection: Projection,
+    callouts: Sequence[Callout] = (),
+    hidden: bool = False,
+    scale: float = DEFAULT_SCALE,
+) -> str:
+    """SVG of one view of `shape` at `scale`:1, with the `callouts` that belong to this view."""
+    visible_lines, hidden_lines = project(shape, projection)
+    sheet = _Sheet(scale)
+    for points in visible_lines:
+        sheet.polyline(points, "visible")
+    if hidden:
+        for points in hidden_lines:
+            sheet.polyline(points, "hidden")
+
+    outline = np.concatenate(visible_lines + hidden_lines)
+    for callout in callouts:
+        if callout.view == projection.name:
+            _draw_callout(sheet, callout, projection, outline)
+    return sheet.svg()
+
+
+def part_shape(part_name: str, cache: Optional[BuildCache] = None) -> cq.Shape:
+    part = PARTS[part_name]
+    if cache is None:
+        return build_uncached(part).val()
+    entry, _ = build_cached(part, cache)
+    return load_model(entry).val()
+
+
+def draw_vector(
+    part_name: str,
+    out_dir: Optional[Union[str, Path]] = None,
+    cache: Optional[BuildCache] = None,
+    projections: Sequence[Projection] = PROJECTIONS,
+    hidden: bool = False,
+    pdf: bool = False,
+    scale: float = DEFAULT_SCALE,
+) -> List[Path]:
+    """
+    Write `<view>_view.svg` (and `<view>_view.pdf` with `pdf=True`) for each of
+    `projections` of a part into `out_dir` (default: its technical_drawing
+    folder). Returns the written paths.
+    """
+    out_dir = Path(out_dir) if out_dir is not None else drawing_dir(part_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shape = part_shape(part_name, cache)
+    callouts = CALLOUTS[part_name](PARTS[part_name].params) if part_name in CALLOUTS else []
+
+    paths = []
+    for projection in projections:
+        svg = view_svg(shape, projection, callouts, hidden, scale)
+        path = out_dir / f"{projection.name}_view.svg"
+        path.write_text(svg, encoding="utf-8")
+        paths.append(path)
+        if pdf:
+            import cairosvg
+
+            paths.append(out_dir / f"{projection.name}_view.pdf")
+            cairosvg.svg2pdf(bytestring=svg.encode("utf-8"), write_to=str(paths[-1]))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.drawing", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help=f"parts to draw (default: {' '.join(CALLOUTS)}). One of: {', '.join(PARTS)}")
+    parser.add_argument("--out-dir", help="write all views here instead of each part's technical_drawing folder")
+    parser.add_argument("--hidden", action="store_true", help="also draw hidden edges, dashed")
+    parser.add_argument("--pdf", action="store_true", help="also write a PDF of every view (needs cairosvg)")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE,
+                        help=f"drawing scale, paper mm per model mm (default: {DEFAULT_SCALE:g})")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.parts if name not in PARTS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+
+    cache = None if args.no_cache else BuildCache()
+    for name in args.parts or CALLOUTS:
+        start = time.perf_counter()
+        out_dir = Path(args.out_dir) / name if args.out_dir else None
+        paths = draw_vector(name, out_dir, cache, hidden=args.hidden, pdf=args.pdf, scale=args.scale)
+        seconds = time.perf_counter() - start
+        for path in paths:
+            print(f"Drawing written to: {path} ({path.stat().st_size / 1024:.0f} KiB)")
+        print(f"{name}: {len(paths)} files in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
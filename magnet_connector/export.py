@@ -0,0 +1,120 @@
+"""
+Exporting a built model is a separate step from building it, so the builders
+stay free of filesystem side effects.
+
+All mesh formats (STL, 3MF, GLB, NPZ) of one export share a single tessellation
+(see mesh.py) made with one of the `QUALITY_PRESETS`:
+  - draft:  coarse, quick to write and to view while iterating on a design.
+  - render: cadquery's default tolerances, used for the committed STL files
+            and the technical drawing images.
+  - print:  fine, for slicing.
+"""
+
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cadquery as cq
+
+from .mesh import MESH_WRITERS, Mesh, tessellate
+
+DEFAULT_FORMATS = ("step", "stl")
+MESH_FORMATS = tuple(MESH_WRITERS)
+
+
+@dataclass(frozen=True)
+class MeshQuality:
+    tolerance: float          # Max distance between the mesh and the surface (mm)
+    angular_tolerance: float  # Max angle between neighbouring triangles (rad)
+
+
+QUALITY_PRESETS = {
+    "draft": MeshQuality(tolerance=0.2, angular_tolerance=0.5),
+    "render": MeshQuality(tolerance=0.1, angular_tolerance=0.1),
+    "print": MeshQuality(tolerance=0.01, angular_tolerance=0.05),
+}
+DEFAULT_QUALITY = "render"
+
+
+@dataclass(frozen=True)
+class ExportReport:
+    path: Path
+    size: int                          # Bytes
+    seconds: float                     # Writing the file
+    tessellation_seconds: float = 0.0  # Shared by all mesh formats of one export
+    triangles: Optional[int] = None    # Mesh formats only
+
+    def __str__(self):
+        text = f"Model exported to: {self.path} ({self.size / 1024:.0f} KiB, written in {self.seconds:.2f}s"
+        if self.triangles is not None:
+            text += f", {self.triangles} triangles, tessellated in {self.tessellation_seconds:.2f}s"
+        return text + ")"
+
+
+def stl_triangle_count(path: Union[str, Path]) -> int:
+    """Triangle count from the header of a binary STL file."""
+    with open(path, "rb") as f:
+        f.seek(80)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def report_file(path: Path, seconds: float = 0.0, tessellation_seconds: float = 0.0) -> ExportReport:
+    triangles = stl_triangle_count(path) if path.suffix == ".stl" else None
+    return ExportReport(path, path.stat().st_size, seconds, tessellation_seconds, triangles)
+
+
+def tessellate_model(model: cq.Workplane, quality: str = DEFAULT_QUALITY) -> Mesh:
+    preset = QUALITY_PRESETS[quality]
+    return tessellate(model, preset.tolerance, preset.angular_tolerance)
+
+
+def export_with_mesh(
+    model: Optional[cq.Workplane],
+    stem: str,
+    directory: Union[str, Path] = ".",
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    quality: str = DEFAULT_QUALITY,
+    mesh: Optional[Mesh] = None,
+) -> Tuple[List[ExportReport], Optional[Mesh]]:
+    """
+    Export `model` to `<directory>/<stem>.<format>` for each format. Mesh formats
+    are written from one tessellation with the `quality` preset (or from `mesh`
+    if given), which is returned for reuse, e.g. by the renderer.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tessellation_seconds = 0.0
+    if mesh is None and any(fmt in MESH_WRITERS for fmt in formats):
+        start = time.perf_counter()
+        mesh = tessellate_model(model, quality)
+        tessellation_seconds = time.perf_counter() - start
+
+    reports = []
+    for fmt in formats:
+        path = directory / f"{stem}.{fmt}"
+        start = time.perf_counter()
+        if fmt in MESH_WRITERS:
+            MESH_WRITERS[fmt](mesh, path)
+            seconds = time.perf_counter() - start
+            reports.append(ExportReport(path, path.stat().st_size, seconds, tessellation_seconds,
+                                        len(mesh.triangles)))
+        else:
+            cq.exporters.export(model, str(path))
+            reports.append(report_file(path, time.perf_counter() - start))
+    return reports, mesh
+
+
+def export_part(
+    model: cq.Workplane,
+    stem: str,
+    directory: Union[str, Path] = ".",
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    quality: str = DEFAULT_QUALITY,
+) -> List[ExportReport]:
+    """
+    Export `model` to `<directory>/<stem>.<format>` for each format, tessellating
+    mesh formats once with the `quality` preset.
+    """
+    return export_with_mesh(model, stem, directory, formats, quality)[0]
@@ -0,0 +1,162 @@
+"""
+Incremental replay of a part's feature steps.
+
+A part is described as a list of `Feature`s: a named step function plus the
+inputs it depends on. Each step's key hashes its inputs, the source of its
+function's module and of the package modules that one uses (see
+`source_digest`) and the key of the step before it, and the shape it produces is
+memoized under that key. Changing one input only replays the steps from that
+point onwards; everything upstream is reused.
+
+    result = FeatureTree().replay(male_thread_features(params))
+    print(result.summary())
+"""
+
+import dataclasses
+import hashlib
+import inspect
+import json
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import cadquery as cq
+
+from .profiler import stage
+
+DEFAULT_MAX_ENTRIES = 256
+
+_PACKAGE = __name__.rpartition(".")[0]
+
+
+@dataclass(frozen=True)
+class Feature:
+    """One step: `apply(model, **inputs)`. `model` is None for the first step."""
+
+    name: str
+    apply: Callable[..., cq.Workplane]
+    inputs: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StepReport:
+    name: str
+    key: str
+    reused: bool
+    seconds: float
+
+
+@dataclass
+class ReplayResult:
+    model: cq.Workplane
+    steps: List[StepReport]
+
+    @property
+    def replayed(self) -> List[str]:
+        return [step.name for step in self.steps if not step.reused]
+
+    @property
+    def reused(self) -> List[str]:
+        return [step.name for step in self.steps if step.reused]
+
+    def summary(self) -> str:
+        lines = [f"{'step':<16} {'status':<9} {'seconds':>8}"]
+        for step in self.steps:
+            status = "reused" if step.reused else "replayed"
+            lines.append(f"{step.name:<16} {status:<9} {step.seconds:>8.3f}")
+        return "\n".join(lines)
+
+
+def _jsonable(value):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    return repr(value)
+
+
+def _package_modules(module: ModuleType, seen: Dict[str, ModuleType]) -> None:
+    """Collect `module` and every module of this package it references, recursively."""
+    if module.__name__ in seen:
+        return
+    seen[module.__name__] = module
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, ModuleType) else getattr(value, "__module__", None)
+        if isinstance(name, str) and name.startswith(_PACKAGE + ".") and name in sys.modules:
+            _package_modules(sys.modules[name], seen)
+
+
+def source_digest(obj) -> str:
+    """Hash of the source of the module defining `obj` and of the package modules it uses."""
+    modules: Dict[str, ModuleType] = {}
+    _package_modules(inspect.getmodule(obj), modules)
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        digest.update(name.encode())
+        digest.update(inspect.getsource(modules[name]).encode())
+    return digest.hexdigest()
+
+
+_SOURCES: Dict[Callable, str] = {}
+
+
+def _source(function: Callable) -> str:
+    if function not in _SOURCES:
+        _SOURCES[function] = source_digest(function)
+    return _SOURCES[function]
+
+
+def clear_source_cache() -> None:
+    """Forget the source digests of the step functions, after reloading modules they use."""
+    _SOURCES.clear()
+
+
+def feature_key(parent_key: str, feature: Feature) -> str:
+    payload = json.dumps(
+        [parent_key, feature.name, feature.inputs, _source(feature.apply)],
+        sort_keys=True,
+        default=_jsonable,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class FeatureTree:
+    """Memo of intermediate shapes, shared by every replay on this tree."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[str, cq.Workplane]" = OrderedDict()
+
+    def replay(self, features: Sequence[Feature]) -> ReplayResult:
+        model: Optional[cq.Workplane] = None
+        key = ""
+        steps = []
+        for feature in features:
+            key = feature_key(key, feature)
+            start = time.perf_counter()
+            reused = key in self._memo
+            if reused:
+                self._memo.move_to_end(key)
+                model = self._memo[key]
+            else:
+                with stage(f"feature.{feature.name}") as frame:
+                    model = frame.result = feature.apply(model, **feature.inputs)
+                self._memo[key] = model
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+            steps.append(StepReport(feature.name, key, reused, time.perf_counter() - start))
+        if model is None:
+            raise ValueError("Nothing to replay, no features given")
+        return ReplayResult(model, steps)
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
+# Used by the build_* functions, so repeated builds in one process share steps
+DEFAULT_TREE = FeatureTree()
+
+
+def replay(features: Sequence[Feature]) -> cq.Workplane:
+    return DEFAULT_TREE.replay(features).model
@@ -0,0 +1,51 @@
+"""
+Feature steps shared by more than one part.
+
+All of the machined parts in this project carry the same kind of magnet ring:
+N equally spaced blind holes on a circle around the center of one face.
+"""
+
+from dataclasses import dataclass
+
+import cadquery as cq
+
+
+@dataclass(frozen=True)
+class MagnetRing:
+    """Evenly spaced magnet pockets on a circle around the part's axis."""
+
+    count: int = 12
+    pitch_radius: float = 9.3   # Hole centers are on a circle of this radius
+    hole_diameter: float = 4.11 # 4.06 diameter magnets with tolerance
+    hole_depth: float = 3.3     # Stack of two magnets sticks out ~0.15 mm
+
+
+@dataclass(frozen=True)
+class Magnet:
+    """
+    The neodymium disc magnets as measured: wider and much thinner than the
+    listed 4 x 2 mm, so a stack of two sticks out of a 3.3 mm pocket by 0.15 mm.
+    """
+
+    diameter: float = 4.06
+    height: float = 1.725
+    per_hole: int = 2       # Stacked in each pocket
+    remanence: float = 1.2  # Tesla, typical of N35
+
+
+def magnet_protrusion(ring: MagnetRing, magnet: Magnet = Magnet()) -> float:
+    """How far the stack of magnets in each pocket of `ring` sticks out of the face."""
+    return magnet.per_hole * magnet.height - ring.hole_depth
+
+
+def drill_magnet_ring(model: cq.Workplane, face: str, ring: MagnetRing) -> cq.Workplane:
+    """
+    Drill the magnet pockets of `ring` into the face picked by `face` (">Z" or "<Z").
+    """
+    return (
+        model
+        .faces(face)
+        .workplane()
+        .polarArray(radius=ring.pitch_radius, startAngle=0, angle=360, count=ring.count, fill=True)
+        .hole(diameter=ring.hole_diameter, depth=ring.hole_depth)
+    )
@@ -0,0 +1,109 @@
+"""
+Female side of the magnet connector: a 24 mm disc with an M11.5x0.5 tapped
+through-hole (the flashlight adapter screws into it) and 12 magnet pockets on
+the bottom face.
+
+`build_female_thread` is the manufacturing model (pilot hole only, the tap is
+called out in the technical drawing). `build_female_thread_visual` unions real
+internal thread geometry and exists solely for technical drawing purposes.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import cadquery as cq
+
+from .feature_tree import Feature, replay
+from .features import MagnetRing, drill_magnet_ring
+from .threads import iso_thread as cached_iso_thread
+from .topology import TopologyIndex
+
+
+@dataclass(frozen=True)
+class FemaleThreadParams:
+    body_diameter: float = 24.00
+    height: float = 6.00
+    # Initial hole for M11.5x0.5 is 10.95mm.
+    # That's just good enough for the threading tool to dig in.
+    # Any number from 10.90 - 10.96 could probably work.
+    pilot_hole_diameter: float = 10.95
+    chamfer: float = 0.3           # Easier male engagement
+    thread_major_diameter: float = 11.5
+    thread_pitch: float = 0.5
+    # Slightly less than full actual height, not to visually overwhelm the chamfer
+    visual_thread_length: float = 5.80
+    magnets: MagnetRing = field(default_factory=MagnetRing)
+
+    @property
+    def magnet_annulus(self) -> Tuple[float, float]:
+        """(outer, inner) diameter of the face the magnet pockets are drilled into, once tapped."""
+        return self.body_diameter, max(self.pilot_hole_diameter, self.thread_major_diameter)
+
+
+def _body(model, body_diameter: float, height: float, hole_diameter: float) -> cq.Workplane:
+    # 1) Create the main cylinder
+    model = (
+        cq.Workplane("XY")
+        .circle(body_diameter / 2)
+        .extrude(height)
+    )
+
+    # 2) Through-hole for the thread
+    return (
+        model
+        .faces(">Z")                 # pick the top face
+        .workplane()
+        .hole(hole_diameter)
+    )
+
+
+def _chamfer(model: cq.Workplane, hole_diameter: float, chamfer: float) -> cq.Workplane:
+    # 3) Chamfer the female screw hole on top for easier male engagement:
+    #    the circular edge of the hole diameter, on the top face
+    index = TopologyIndex(model.findSolid())
+    return model.newObject(index.circles(hole_diameter, z=index.zmax)).chamfer(chamfer)
+
+
+def _union_thread(model: cq.Workplane, **thread) -> cq.Workplane:
+    return model.union(cached_iso_thread(**thread))
+
+
+def female_thread_features(params: FemaleThreadParams = FemaleThreadParams(), visual: bool = False) -> List[Feature]:
+    """Feature steps of the manufacturing model, or of the visual model with `visual=True`."""
+    # For a visual internal thread, make the through-hole 11.5 mm in diameter
+    # so that the "female thread" model can be unioned inside.
+    hole_diameter = params.thread_major_diameter if visual else params.pilot_hole_diameter
+    features = [
+        Feature("body", _body, {
+            "body_diameter": params.body_diameter,
+            "height": params.height,
+            "hole_diameter": hole_diameter,
+        }),
+        Feature("chamfer", _chamfer, {"hole_diameter": hole_diameter, "chamfer": params.chamfer}),
+    ]
+    if visual:
+        # Create the visual internal (female) thread.
+        #  - external=False => female (internal) thread
+        #  - end_finishes=('square','fade') => square at bottom, fade at top (so chamfer looks nice)
+        features.append(Feature("thread", _union_thread, {
+            "major_diameter": params.thread_major_diameter,
+            "pitch": params.thread_pitch,
+            "length": params.visual_thread_length,
+            "external": False,
+            "hand": "right",
+            "end_finishes": ("square", "fade"),
+        }))
+
+    # Drill the magnet holes around the bottom face
+    features.append(Feature("magnet_holes", drill_magnet_ring, {"face": "<Z", "ring": params.magnets}))
+    return features
+
+
+def build_female_thread(params: FemaleThreadParams = FemaleThreadParams()) -> cq.Workplane:
+    """Manufacturing model: 10.95 mm pilot hole, magnet pockets on the bottom face."""
+    return replay(female_thread_features(params))
+
+
+def build_female_thread_visual(params: FemaleThreadParams = FemaleThreadParams()) -> cq.Workplane:
+    """Visual model: hole at the thread major diameter with a detailed internal thread unioned in."""
+    return replay(female_thread_features(params, visual=True))
@@ -0,0 +1,251 @@
+"""
+Geometry fingerprints of the parts, to tell whether a change altered geometry.
+
+The committed STEP/STL files differ byte for byte between runs (timestamps,
+triangle order), so they can't be compared directly. A fingerprint is taken
+from the B-rep instead: volume, surface area, center of mass, inertia tensor,
+bounding box, face and vertex counts, and the signature: every face (type,
+area, center) and vertex, rounded and sorted so that it doesn't depend on the
+order OCC happens to list them in (vertices that only mark the start of a
+circle or a seam are left out). The signature catches what the totals don't,
+e.g. a magnet ring rotated by a fraction of its pitch. Everything is compared
+with a tolerance.
+
+    python -m magnet_connector.fingerprint                   # check every part in fingerprints.json
+    python -m magnet_connector.fingerprint male_thread --update
+    python -m magnet_connector.fingerprint --from-step       # the exported STEP files instead of builds
+
+`fingerprints.json` (committed) maps each part to its fingerprint. The build
+reads it to leave a part's STEP file alone when the geometry is unchanged,
+only `--update` writes it. The check exits with an error when a part's
+geometry has drifted from the index (or a part named on the command line
+isn't in it): run with `--update` once the change is intended. `--from-step`
+records parts that can't be built here (the visual ones need cq_warehouse)
+from their committed STEP files.
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cadquery as cq
+
+from .cache import BuildCache, build_cached, build_uncached, load_model
+from .export import DEFAULT_QUALITY
+from .parts import PARTS, REPO_ROOT, Part
+
+INDEX_FILE = REPO_ROOT / "fingerprints.json"
+DIGITS = 6          # Decimals kept of the measured properties
+SORT_DIGITS = 3     # Decimals the signature is sorted by
+REL_TOLERANCE = 1e-6
+ABS_TOLERANCE = 1e-4
+
+Vector = Tuple[float, float, float]
+FaceSignature = Tuple[str, float, float, float, float]  # Type, area, center
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    volume: float
+    area: float
+    center: Vector
+    inertia: Tuple[float, ...]  # xx, yy, zz, xy, xz, yz about the center of mass
+    bounds: Tuple[float, ...]   # xmin, ymin, zmin, xmax, ymax, zmax
+    faces: int
+    vertices: int
+    face_signature: Tuple[FaceSignature, ...]
+    vertex_signature: Tuple[Vector, ...]
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "Fingerprint":
+        return cls(**{name: _tuples(value) for name, value in values.items()})
+
+    def differences(self, other: "Fingerprint") -> List[str]:
+        """Names of the properties that differ from `other`'s beyond the tolerances."""
+        return [field.name for field in dataclasses.fields(self)
+                if not _close(getattr(self, field.name), getattr(other, field.name))]
+
+
+def _tuples(value):
+    """JSON lists back to (nested) tuples."""
+    return tuple(_tuples(item) for item in value) if isinstance(value, list) else value
+
+
+def _close(mine, theirs) -> bool:
+    """Floats within the tolerances, anything else equal; element-wise in (nested) tuples."""
+    if isinstance(mine, tuple):
+        return isinstance(theirs, tuple) and len(mine) == len(theirs) and all(map(_close, mine, theirs))
+    if isinstance(mine, float) and isinstance(theirs, (int, float)):
+        return math.isclose(mine, theirs, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE)
+    return mine == theirs
+
+
+def _rounded(point: cq.Vector) -> Vector:
+    return round(point.x, DIGITS), round(point.y, DIGITS), round(point.z, DIGITS)
+
+
+def _sort_key(item: tuple) -> tuple:
+    # Coarser than the stored values, so that noise in the last digits doesn't reorder nearly equal items
+    return tuple(round(value, SORT_DIGITS) if isinstance(value, float) else value for value in item), item
+
+
+def _placed_vertices(shape: cq.Shape) -> List[cq.Vertex]:
+    """
+    Vertices of `shape` that are part of its geometry, leaving out those that only
+    mark where OCC starts a closed curve or surface (every edge through them is
+    closed, like a full circle, or a seam): they move with the way the shape was
+    built.
+    """
+    from OCP.BRep import BRep_Tool
+    from OCP.TopAbs import TopAbs_EDGE, TopAbs_FACE, TopAbs_VERTEX
+    from OCP.TopExp import TopExp
+    from OCP.TopoDS import TopoDS
+    from OCP.TopTools import TopTools_IndexedDataMapOfShapeListOfShape
+
+    edge_faces, vertex_edges = TopTools_IndexedDataMapOfShapeListOfShape(), TopTools_IndexedDataMapOfShapeListOfShape()
+    TopExp.MapShapesAndAncestors_s(shape.wrapped, TopAbs_EDGE, TopAbs_FACE, edge_faces)
+    TopExp.MapShapesAndAncestors_s(shape.wrapped, TopAbs_VERTEX, TopAbs_EDGE, vertex_edges)
+
+    def artefact(edge) -> bool:
+        edge = TopoDS.Edge_s(edge)
+        return BRep_Tool.IsClosed_s(edge) or any(
+            BRep_Tool.IsClosed_s(edge, TopoDS.Face_s(face)) for face in edge_faces.FindFromKey(edge))
+
+    return [vertex for vertex in shape.Vertices()
+            if not all(artefact(edge) for edge in vertex_edges.FindFromKey(vertex.wrapped))]
+
+
+def signature(shape: cq.Shape) -> Tuple[Tuple[FaceSignature, ...], Tuple[Vector, ...]]:
+    """The faces (type, area, center) and placed vertices of `shape`, rounded and sorted."""
+    faces = [(face.geomType(), round(face.Area(), DIGITS), *_rounded(face.Center())) for face in shape.Faces()]
+    vertices = [_rounded(vertex.Center()) for vertex in _placed_vertices(shape)]
+    return tuple(sorted(faces, key=_sort_key)), tuple(sorted(vertices, key=_sort_key))
+
+
+def fingerprint(shape: cq.Shape) -> Fingerprint:
+    from OCP.BRepGProp import BRepGProp
+    from OCP.GProp import GProp_GProps
+
+    volume, surface = GProp_GProps(), GProp_GProps()
+    BRepGProp.VolumeProperties_s(shape.wrapped, volume)
+    BRepGProp.SurfaceProperties_s(shape.wrapped, surface)
+    center, matrix = volume.CentreOfMass(), volume.MatrixOfInertia()
+    box = shape.BoundingBox()
+    faces, vertices = signature(shape)
+    return Fingerprint(
+        volume=round(volume.Mass(), DIGITS),
+        area=round(surface.Mass(), DIGITS),
+        center=tuple(round(value, DIGITS) for value in (center.X(), center.Y(), center.Z())),
+        inertia=tuple(round(matrix.Value(i, j), DIGITS) for i, j in ((1, 1), (2, 2), (3, 3), (1, 2), (1, 3), (2, 3))),
+        bounds=tuple(round(value, DIGITS) for value in (box.xmin, box.ymin, box.zmin, box.xmax, box.ymax, box.zmax)),
+        faces=len(shape.Faces()),
+        vertices=len(shape.Vertices()),
+        face_signature=faces,
+        vertex_signature=vertices,
+    )
+
+
+def _model_fingerprint(model: cq.Workplane) -> Fingerprint:
+    shapes = model.vals()
+    return fingerprint(shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes))
+
+
+def part_fingerprint(part: Part, cache: Optional[BuildCache] = None, quality: str = DEFAULT_QUALITY) -> Fingerprint:
+    return _model_fingerprint(build_uncached(part) if cache is None else
+                              load_model(build_cached(part, cache, quality)[0]))
+
+
+def step_file(part: Part) -> Path:
+    return part.output_dir / f"{part.stem}.step"
+
+
+def step_fingerprint(part: Part) -> Fingerprint:
+    """Fingerprint of the part's STEP file in its folder, as last exported."""
+    return _model_fingerprint(cq.importers.importStep(str(step_file(part))))
+
+
+def load_index(path: Path = INDEX_FILE) -> Dict[str, Fingerprint]:
+    if not path.is_file():
+        return {}
+    return {name: Fingerprint.from_dict(values) for name, values in json.loads(path.read_text()).items()}
+
+
+def save_index(index: Dict[str, Fingerprint], path: Path = INDEX_FILE) -> None:
+    data = {name: dataclasses.asdict(index[name]) for name in sorted(index)}
+    # One line per innermost list (a vector, a face or a vertex), for readable diffs
+    text = re.sub(r"\[\s+([^\[\]]*?)\s+\]", lambda match: "[" + re.sub(r"\s+", " ", match.group(1)) + "]",
+                  json.dumps(data, indent=2))
+    path.write_text(text + "\n")
+
+
+def check(
+    part_names: Sequence[str],
+    index: Dict[str, Fingerprint],
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+    from_step: bool = False,
+) -> Dict[str, Tuple[Fingerprint, List[str]]]:
+    """
+    Fingerprint of each part (built, or of its STEP file with `from_step`) and
+    the properties that drifted from `index` (["missing"] if not in it).
+    """
+    results = {}
+    for name in part_names:
+        part = PARTS[name]
+        current = step_fingerprint(part) if from_step else part_fingerprint(part, cache, quality)
+        results[name] = (current, current.differences(index[name]) if name in index else ["missing"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.fingerprint", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART", help=f"parts to check (default: the ones in the index, "
+                                                                  f"all with --update). One of: {', '.join(PARTS)}")
+    parser.add_argument("--update", action="store_true", help="record the current fingerprints in the index")
+    parser.add_argument("--index", type=Path, default=INDEX_FILE, help=f"index file (default: {INDEX_FILE.name})")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    parser.add_argument("--from-step", action="store_true",
+                        help="fingerprint the parts' exported STEP files instead of building them")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.parts if name not in PARTS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    index = load_index(args.index)
+    names = args.parts or [name for name in PARTS if args.update or name in index or not index]
+    if args.from_step:
+        missing = [name for name in args.parts if not step_file(PARTS[name]).is_file()]
+        if missing:
+            parser.error(f"no STEP file for: {', '.join(missing)}")
+        names = [name for name in names if step_file(PARTS[name]).is_file()]
+    results = check(names, index, None if args.no_cache else BuildCache(), from_step=args.from_step)
+    width = max(len(name) for name in results)
+    for name, (current, changed) in results.items():
+        status = "unchanged" if not changed else "not in the index" if changed == ["missing"] else \
+            f"DRIFTED ({', '.join(changed)})"
+        print(f"{name:<{width}}  {current.volume:>10.3f} mm³  {current.faces:>5} faces  {status}")
+    print(f"Checked {len(results)} parts in {time.perf_counter() - start:.2f}s")
+
+    drifted = [name for name, (_, changed) in results.items() if changed]
+    if args.update:
+        if drifted:
+            index.update({name: results[name][0] for name in drifted})
+            save_index(index, args.index)
+        print(f"Updated {len(drifted)} fingerprints in {args.index}")
+    elif drifted:
+        print(f"Geometry drifted from {args.index.name}: {', '.join(drifted)} (run with --update if intended)",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Search for magnet ring layouts (pocket count, pitch radius and diameter).
+
+Every combination of the searched values is checked at once with NumPy
+against the walls the pockets leave in the annular face they are drilled
+into: to the outer diameter, to the center hole and between neighbouring
+pockets. Feasible layouts are ranked by holding force, then magnet count, then
+their thinnest wall. Only the best few are built as solids, to confirm that
+they are valid.
+
+    python -m magnet_connector.layout                            # the male and female pieces share a ring
+    python -m magnet_connector.layout magnet_holes --min-wall 0.3
+    python -m magnet_connector.layout --diameters 4.11 --counts 8:20:1 --build 5
+
+Values are given like the sweep's: a comma separated list or an inclusive
+start:stop:step range. Holding force is estimated as magnet count times the
+magnet's face area, the magnets being as much narrower than their pockets as
+they are now (see `Magnet`). The listed layouts also get the pull-off force of
+the current loop model (see magnetics.py).
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .features import Magnet, MagnetRing
+from .magnetics import pull_off_force
+from .parts import PARTS
+from .sweep import parse_values
+
+DEFAULT_PARTS = ("male_thread", "female_thread")
+DEFAULT_COUNTS = "6:24:1"
+DEFAULT_DIAMETERS = "3:6:0.01"
+RADIUS_STEP = 0.05
+DEFAULT_MIN_WALL = 0.6  # The current ring leaves 0.645 mm to the outside of the 24 mm pieces
+DEFAULT_TOP = 10
+DEFAULT_BUILD = 3
+
+
+@dataclass(frozen=True)
+class Layout:
+    ring: MagnetRing
+    outer_wall: float    # Between the pockets and the outer diameter
+    inner_wall: float    # Between the pockets and the center hole
+    between_wall: float  # Between neighbouring pockets
+    force: float         # Relative to the current ring
+
+    @property
+    def min_wall(self) -> float:
+        return min(self.outer_wall, self.inner_wall, self.between_wall)
+
+
+def annulus(part_names: Sequence[str]) -> Tuple[float, float]:
+    """(outer, inner) diameter every one of the parts has room for pockets in."""
+    faces = [PARTS[name].params.magnet_annulus for name in part_names]
+    return min(outer for outer, _ in faces), max(inner for _, inner in faces)
+
+
+def search(
+    outer_diameter: float,
+    inner_diameter: float,
+    counts: Sequence[int],
+    diameters: Sequence[float],
+    radii: Optional[Sequence[float]] = None,
+    min_wall: float = DEFAULT_MIN_WALL,
+    reference: MagnetRing = MagnetRing(),
+    magnet: Magnet = Magnet(),
+    hole_depth: Optional[float] = None,
+) -> Tuple[List[Layout], int]:
+    """
+    Feasible layouts, best first, and the number of layouts checked. Radii
+    default to every RADIUS_STEP across the annulus.
+    """
+    outer, inner = outer_diameter / 2, inner_diameter / 2
+    if radii is None:
+        radii = np.arange(inner, outer + RADIUS_STEP / 2, RADIUS_STEP)
+    count, radius, diameter = np.meshgrid(
+        np.asarray(counts, dtype=np.int64), np.asarray(radii, dtype=float), np.asarray(diameters, dtype=float),
+        indexing="ij",
+    )
+    count, radius, diameter = count.ravel(), radius.ravel(), diameter.ravel()
+    outer_wall = outer - radius - diameter / 2
+    inner_wall = radius - diameter / 2 - inner
+    # Pocket centers are a chord apart
+    between_wall = 2 * radius * np.sin(np.pi / count) - diameter
+    feasible = np.flatnonzero((outer_wall >= min_wall) & (inner_wall >= min_wall) & (between_wall >= min_wall))
+
+    fit = reference.hole_diameter - magnet.diameter
+    force = count * np.maximum(diameter - fit, 0) ** 2 / (reference.count * magnet.diameter ** 2)
+    walls = np.minimum(np.minimum(outer_wall, inner_wall), between_wall)
+    # np.lexsort sorts by its last key first, ascending
+    order = feasible[np.lexsort((-walls[feasible], -count[feasible], -np.round(force[feasible], 9)))]
+    depth = reference.hole_depth if hole_depth is None else hole_depth
+    layouts = [
+        Layout(MagnetRing(int(count[i]), round(float(radius[i]), 4), round(float(diameter[i]), 4), depth),
+               float(outer_wall[i]), float(inner_wall[i]), float(between_wall[i]), float(force[i]))
+        for i in order
+    ]
+    return layouts, len(count)
+
+
+def distinct(layouts: Sequence[Layout], top: int) -> List[Layout]:
+    """The first `top` layouts, keeping only the one with the thickest walls per (count, diameter)."""
+    seen, picked = set(), []
+    for layout in layouts:
+        key = (layout.ring.count, layout.ring.hole_diameter)
+        if key not in seen:
+            seen.add(key)
+            picked.append(layout)
+            if len(picked) == top:
+                break
+    return picked
+
+
+def magnet_for(ring: MagnetRing, reference: MagnetRing = MagnetRing(), magnet: Magnet = Magnet()) -> Magnet:
+    """The magnet for the pockets of `ring`, fitting them like `magnet` fits the `reference` pockets."""
+    return replace(magnet, diameter=ring.hole_diameter - (reference.hole_diameter - magnet.diameter))
+
+
+def build_candidate(part_name: str, ring: MagnetRing):
+    """The part with its magnet ring replaced by `ring`."""
+    part = PARTS[part_name]
+    return part.builder(replace(part.params, magnets=ring))
+
+
+def format_layouts(layouts: Sequence[Layout], pull_off: Sequence[float]) -> str:
+    lines = [f"{'count':>5} {'radius':>7} {'diameter':>8} {'outer':>6} {'inner':>6} {'between':>7} {'force':>6} "
+             f"{'pull N':>7}"]
+    for layout, newtons in zip(layouts, pull_off):
+        ring = layout.ring
+        lines.append(f"{ring.count:>5} {ring.pitch_radius:>7.2f} {ring.hole_diameter:>8.2f} "
+                     f"{layout.outer_wall:>6.3f} {layout.inner_wall:>6.3f} {layout.between_wall:>7.3f} "
+                     f"{layout.force:>6.2f} {newtons:>7.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.layout", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help=f"parts sharing the ring (default: {' '.join(DEFAULT_PARTS)})")
+    parser.add_argument("--counts", default=DEFAULT_COUNTS, help=f"pocket counts (default: {DEFAULT_COUNTS})")
+    parser.add_argument("--diameters", default=DEFAULT_DIAMETERS,
+                        help=f"pocket diameters (default: {DEFAULT_DIAMETERS})")
+    parser.add_argument("--radii", help=f"pitch radii (default: every {RADIUS_STEP} mm across the face)")
+    parser.add_argument("--min-wall", type=float, default=DEFAULT_MIN_WALL,
+                        help=f"thinnest wall allowed, in mm (default: {DEFAULT_MIN_WALL})")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"layouts to list (default: {DEFAULT_TOP})")
+    parser.add_argument("--build", type=int, default=DEFAULT_BUILD,
+                        help=f"best layouts to build as solids (default: {DEFAULT_BUILD})")
+    args = parser.parse_args(argv)
+    part_names = args.parts or list(DEFAULT_PARTS)
+    unknown = [name for name in part_names if name not in PARTS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+    missing = [name for name in part_names if not hasattr(PARTS[name].params, "magnet_annulus")]
+    if missing:
+        parser.error(f"part(s) without magnet pockets: {', '.join(missing)}")
+
+    outer, inner = annulus(part_names)
+    reference = PARTS[part_names[0]].params.magnets
+    counts = [int(count) for count in parse_values(args.counts)]
+    radii = parse_values(args.radii) if args.radii else None
+    start = time.perf_counter()
+    layouts, checked = search(outer, inner, counts, parse_values(args.diameters), radii, args.min_wall, reference)
+    seconds = time.perf_counter() - start
+    print(f"{checked:,} layouts checked in {seconds * 1000:.1f} ms, {len(layouts):,} feasible "
+          f"(pockets between {inner:g} and {outer:g} mm, walls of at least {args.min_wall:g} mm)")
+    best = distinct(layouts, args.top)
+    if not best:
+        return
+    print(format_layouts(best, [pull_off_force(layout.ring, magnet_for(layout.ring, reference)) for layout in best]))
+
+    for layout in best[:args.build]:
+        for name in part_names:
+            start = time.perf_counter()
+            solid = build_candidate(name, layout.ring).findSolid()
+            print(f"{name} with {layout.ring}: {'valid' if solid.isValid() else 'INVALID'}, "
+                  f"{solid.Volume():.1f} mm³, built in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
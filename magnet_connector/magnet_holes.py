@@ -0,0 +1,70 @@
+"""
+Historical generic 'toilet paper roll' magnet holes piece (see old/).
+
+Used with a Sanwu adapter glued into the 17.6 mm center hole, so the same
+part works as either the male or the female side.
+
+`MagnetHolesParams()` is magnet_holes_01_00_01.
+`MAGNET_HOLES_01_00_00` is the first Xometry order with 4.04 mm holes.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import cadquery as cq
+
+from .feature_tree import Feature, replay
+from .features import MagnetRing, drill_magnet_ring
+
+
+@dataclass(frozen=True)
+class MagnetHolesParams:
+    outer_diameter: float = 28.0
+    inner_hole_diameter: float = 17.6  # Sanwu adapter is 17.55 mm
+    height: float = 8.3
+    magnets: MagnetRing = field(default_factory=lambda: MagnetRing(
+        count=16, pitch_radius=11.4, hole_diameter=4.16, hole_depth=3.3,
+    ))
+
+    @property
+    def magnet_annulus(self) -> Tuple[float, float]:
+        """(outer, inner) diameter of the face the magnet pockets are drilled into."""
+        return self.outer_diameter, self.inner_hole_diameter
+
+
+MAGNET_HOLES_01_00_00 = MagnetHolesParams(
+    magnets=MagnetRing(count=16, pitch_radius=11.4, hole_diameter=4.04, hole_depth=3.3),
+)
+
+
+def _body(model, outer_diameter: float, height: float, inner_hole_diameter: float) -> cq.Workplane:
+    # === 1. Create main cylinder ===
+    model = (
+        cq.Workplane("XY")
+        .circle(outer_diameter / 2)
+        .extrude(height)
+    )
+
+    # === 2. Hollow out the center (like a toilet paper roll) ===
+    return (
+        model
+        .faces(">Z")               # pick the top face
+        .workplane()               # create a new workplane on that face
+        .hole(inner_hole_diameter)
+    )
+
+
+def magnet_holes_features(params: MagnetHolesParams = MagnetHolesParams()) -> List[Feature]:
+    return [
+        Feature("body", _body, {
+            "outer_diameter": params.outer_diameter,
+            "height": params.height,
+            "inner_hole_diameter": params.inner_hole_diameter,
+        }),
+        # === 3. Drill the magnet holes around the top face ===
+        Feature("magnet_holes", drill_magnet_ring, {"face": ">Z", "ring": params.magnets}),
+    ]
+
+
+def build_magnet_holes(params: MagnetHolesParams = MagnetHolesParams()) -> cq.Workplane:
+    return replay(magnet_holes_features(params))
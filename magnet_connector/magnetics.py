@@ -0,0 +1,237 @@
+"""
+Holding force and torque between the magnet rings of the male and female pieces.
+
+Each stack of magnets is modelled as a solenoid of `loops` circular current
+loops carrying its equivalent surface current (remanence / mu0 per unit of
+height). The field of every female loop is evaluated in closed form (complete
+elliptic integrals) on `segments` points of every male loop, and the Lorentz
+force on those points summed, for whole batches of gaps and angles with NumPy. The
+ring is rotationally symmetric, so only one male stack is evaluated against
+every female stack and the result multiplied by the count.
+
+    python -m magnet_connector.magnetics                       # the ring from the part parameters
+    python -m magnet_connector.magnetics --counts 8,12,16 --plot
+    python -m magnet_connector.magnetics --separations 0:2:0.1 --angles 0:30:0.5 --alternating
+
+The separation is the distance between the facing magnets (0 as assembled,
+where the pieces' faces are the magnet gap apart); the angle is the rotation
+of the female ring away from facing the male one. Force is positive when
+attracting; torque is the one on the female piece in N·mm, negative when it
+turns the piece back towards 0°.
+`--alternating` flips every other stack, so it needs even counts.
+
+`forces.csv` gets every computed value; `--plot` also draws the curves (needs
+matplotlib). The model is least accurate at contact, where the nearest loops
+of two facing stacks are still a slice apart.
+"""
+
+import argparse
+import csv
+import math
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .assembly import Connector, magnet_gap
+from .features import Magnet, MagnetRing
+from .sweep import parse_values, with_overrides
+
+MU0 = 4e-7 * math.pi
+DEFAULT_LOOPS = 16
+DEFAULT_SEGMENTS = 48
+DEFAULT_SEPARATIONS = "0:1:0.05"
+DEFAULT_ANGLES = "0:15:0.5"
+ANGLE_CHUNK = 4
+_AGM_ITERATIONS = 12
+
+
+def elliptic_ke(m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Complete elliptic integrals K(m) and E(m) of the parameter m = k², by the arithmetic-geometric mean."""
+    a, b = np.ones_like(m), np.sqrt(1 - m)
+    squares, power = m / 2, 0.5
+    for _ in range(_AGM_ITERATIONS):
+        c = (a - b) / 2
+        a, b = (a + b) / 2, np.sqrt(a * b)
+        power *= 2
+        squares = squares + power * c * c
+    k = np.pi / (2 * a)
+    return k, k * (1 - squares)
+
+
+def loop_field(radius: float, current: np.ndarray, rho: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(B_rho, B_z) in Tesla of a current loop around the z axis at the origin, at (rho, z) in meters."""
+    outer = (radius + rho) ** 2 + z * z
+    inner = (radius - rho) ** 2 + z * z
+    k, e = elliptic_ke(4 * radius * rho / outer)
+    scale = MU0 * current / (2 * np.pi * np.sqrt(outer))
+    b_z = scale * (k + (radius ** 2 - rho ** 2 - z * z) / inner * e)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b_rho = np.where(rho > 0, scale * z / rho * (-k + (radius ** 2 + rho ** 2 + z * z) / inner * e), 0.0)
+    return b_rho, b_z
+
+
+def ring_forces(
+    ring: MagnetRing,
+    magnet: Magnet,
+    separations: Sequence[float],
+    angles: Sequence[float],
+    alternating: bool = False,
+    loops: int = DEFAULT_LOOPS,
+    segments: int = DEFAULT_SEGMENTS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Axial force (N) and torque about the axis (N·mm) between two facing rings,
+    each of shape (separations, angles). Separations are in mm, angles in degrees.
+    With `alternating`, every other stack has its poles flipped (the count must be even).
+    """
+    if alternating and ring.count % 2:
+        raise ValueError(f"alternating poles need an even stack count, got {ring.count}")
+    mm = 1e-3
+    pitch, radius = ring.pitch_radius * mm, magnet.diameter / 2 * mm
+    height = magnet.per_hole * magnet.height * mm
+    current = magnet.remanence / MU0 * height / loops
+    slices = (np.arange(loops) + 0.5) * height / loops
+
+    # One male stack at (pitch, 0), its top at z=0; points and directions along each of its loops
+    phi = (np.arange(segments) + 0.5) * 2 * np.pi / segments
+    px, py = pitch + radius * np.cos(phi), radius * np.sin(phi)
+    dlx, dly = -radius * np.sin(phi) * 2 * np.pi / segments, radius * np.cos(phi) * 2 * np.pi / segments
+    male_z = slices - height
+
+    # Every female stack, for every angle: (angles, count) centers
+    stacks = np.arange(ring.count)
+    theta = np.radians(np.asarray(angles, dtype=float))[:, None] + 2 * np.pi * stacks / ring.count
+    polarity = np.where(stacks % 2 == 1, -1.0, 1.0) if alternating else np.ones(ring.count)
+    female_current = (current * polarity)[None, :, None, None, None]
+
+    force = np.empty((len(separations), len(angles)))
+    torque = np.empty_like(force)
+    # Angles a few at a time, to bound the size of the arrays
+    for start in range(0, len(angles), ANGLE_CHUNK):
+        block = slice(start, start + ANGLE_CHUNK)
+        # Axes: (angle, stack, male loop, segment, female loop)
+        dx = px[None, None, None, :, None] - (pitch * np.cos(theta[block]))[:, :, None, None, None]
+        dy = py[None, None, None, :, None] - (pitch * np.sin(theta[block]))[:, :, None, None, None]
+        rho = np.sqrt(dx * dx + dy * dy)
+        for i, separation in enumerate(separations):
+            dz = (male_z[:, None] - (separation * mm + slices)[None, :])[None, None, :, None, :]
+            b_rho, b_z = loop_field(radius, female_current, rho, dz)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                b_x = np.where(rho > 0, b_rho * dx / rho, 0.0)
+                b_y = np.where(rho > 0, b_rho * dy / rho, 0.0)
+            # dF = I dl x B, with dl in the xy plane
+            f_x = current * dly[:, None] * b_z
+            f_y = -current * dlx[:, None] * b_z
+            f_z = current * (dlx[:, None] * b_y - dly[:, None] * b_x)
+            stack_torque = px[:, None] * f_y - py[:, None] * f_x
+            # The torque on the male ring turns the female one the other way
+            force[i, block] = ring.count * f_z.sum(axis=(1, 2, 3, 4))
+            torque[i, block] = -ring.count * stack_torque.sum(axis=(1, 2, 3, 4)) / mm
+    return force, torque
+
+
+def pull_off_force(ring: MagnetRing, magnet: Magnet = Magnet(), separation: float = 0.0, **kwargs) -> float:
+    """Force (N) holding two facing rings together, `separation` mm apart."""
+    force, _ = ring_forces(ring, magnet, [separation], [0.0], **kwargs)
+    return float(force[0, 0])
+
+
+def write_csv(
+    path: Path,
+    rows: Sequence[Tuple[int, float, float, float, float, float]],
+) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["count", "separation_mm", "face_gap_mm", "angle_deg", "force_n", "torque_nmm"])
+        writer.writerows(rows)
+
+
+def plot(out_dir: Path, results, separations: np.ndarray, angles: np.ndarray) -> List[Path]:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    paths = [out_dir / "force_vs_separation.png", out_dir / "torque_vs_angle.png"]
+    for path, x, label, values in (
+        (paths[0], separations, "separation (mm)", lambda force, torque: force[:, 0]),
+        (paths[1], angles, "angle (°)", lambda force, torque: torque[0]),
+    ):
+        figure, axes = plt.subplots(figsize=(7, 4.5))
+        for count, force, torque in results:
+            axes.plot(x, values(force, torque), label=f"{count} stacks")
+        axes.set_xlabel(label)
+        axes.set_ylabel("force (N)" if path is paths[0] else "torque (N·mm)")
+        axes.grid(True, alpha=0.3)
+        axes.legend()
+        figure.tight_layout()
+        figure.savefig(path, dpi=150)
+        plt.close(figure)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.magnetics", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", help="stack counts at the ring's pitch radius (default: the ring's)")
+    parser.add_argument("--separations", default=DEFAULT_SEPARATIONS,
+                        help=f"mm between facing magnets (default: {DEFAULT_SEPARATIONS})")
+    parser.add_argument("--angles", default=DEFAULT_ANGLES,
+                        help=f"degrees of misalignment (default: {DEFAULT_ANGLES})")
+    parser.add_argument("--alternating", action="store_true", help="every other stack with its poles flipped")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", dest="settings",
+                        help="parameter value, e.g. magnet.remanence=1.3 or male.magnets.pitch_radius=10 (repeatable)")
+    parser.add_argument("--loops", type=int, default=DEFAULT_LOOPS, help="current loops per stack")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS, help="points per loop")
+    parser.add_argument("--out-dir", default="forces", help="where to write forces.csv (default: forces)")
+    parser.add_argument("--plot", action="store_true", help="also plot the curves (needs matplotlib)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for setting in args.settings:
+        name, sep, value = setting.partition("=")
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {setting!r}")
+        overrides[name] = float(value)
+    try:
+        connector = with_overrides(Connector(), overrides)
+    except ValueError as e:
+        parser.error(str(e))
+
+    ring = connector.male.magnets
+    counts = [int(count) for count in parse_values(args.counts)] if args.counts else [ring.count]
+    if args.alternating and any(count % 2 for count in counts):
+        parser.error(f"--alternating needs even stack counts, got {', '.join(str(count) for count in counts)}")
+    separations, angles = np.array(parse_values(args.separations)), np.array(parse_values(args.angles))
+    gap = magnet_gap(connector.male, connector.female, connector.magnet)
+    results, rows = [], []
+    for count in counts:
+        force, torque = ring_forces(MagnetRing(count, ring.pitch_radius, ring.hole_diameter, ring.hole_depth),
+                                    connector.magnet, separations, angles, args.alternating, args.loops,
+                                    args.segments)
+        results.append((count, force, torque))
+        rows.extend((count, s, s + gap, a, force[i, j], torque[i, j])
+                    for i, s in enumerate(separations) for j, a in enumerate(angles))
+
+    print("Pull-off force (N) at 0°")
+    print(f"{'separation':>10} {'face gap':>8} " + " ".join(f"{count:>8}" for count in counts))
+    for i, separation in enumerate(separations):
+        print(f"{separation:>10.2f} {separation + gap:>8.2f} "
+              + " ".join(f"{force[i, 0]:>8.2f}" for _, force, _ in results))
+    print(f"\nRestoring torque (N·mm) at separation {separations[0]:g} mm")
+    print(f"{'angle':>10} " + " ".join(f"{count:>8}" for count in counts))
+    for j, angle in enumerate(angles):
+        print(f"{angle:>10.1f} " + " ".join(f"{torque[0, j]:>8.2f}" for _, _, torque in results))
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_csv(out_dir / "forces.csv", rows)
+    print(f"\nTable written to: {out_dir / 'forces.csv'}")
+    if args.plot:
+        for path in plot(out_dir, results, separations, angles):
+            print(f"Plot written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Male side of the magnet connector: a 24 mm disc with 12 magnet pockets on top
+and a 3 mm M11.5x0.5 rod at the bottom that screws into the laser head.
+
+`build_male_thread` is the manufacturing model (plain rod, threads are called
+out in the technical drawing). `build_male_thread_visual` unions real thread
+geometry onto the rod and exists solely for technical drawing purposes.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import cadquery as cq
+
+from .feature_tree import Feature, replay
+from .features import MagnetRing, drill_magnet_ring
+from .revolve import RadialSegment, revolve_step, stepped_profile
+from .threads import iso_thread as cached_iso_thread
+
+
+@dataclass(frozen=True)
+class MaleThreadParams:
+    body_diameter: float = 24.00
+    body_height: float = 4.30      # Holds the magnet pockets
+    bore_diameter: float = 8.05    # Through-hole for laser light
+    rod_length: float = 3.00       # Only the tip 2mm are threaded
+    threaded_length: float = 2.00
+    # 11.45 is slightly smaller major diameter than M11.5x0.5 thread, for tolerance.
+    rod_diameter: float = 11.45
+    # Unthreaded runoff at the base of the rod, slightly smaller than the minor diameter.
+    runoff_diameter: float = 10.90
+    thread_major_diameter: float = 11.5
+    thread_pitch: float = 0.5
+    magnets: MagnetRing = field(default_factory=MagnetRing)
+
+    @property
+    def height(self) -> float:
+        return self.rod_length + self.body_height
+
+    @property
+    def magnet_annulus(self) -> Tuple[float, float]:
+        """(outer, inner) diameter of the face the magnet pockets are drilled into."""
+        return self.body_diameter, self.bore_diameter
+
+    @property
+    def thread_minor_diameter(self) -> float:
+        # Minor diameter of ISO metric thread (d₂) = D - 2 × (5/8 × (P × √3/2))
+        # ≈ 10.9587 mm for M11.5x0.5
+        return round(self.thread_major_diameter - 2 * (5 / 8 * (self.thread_pitch * math.sqrt(3) / 2)), 4)
+
+
+def _body_profile(params: MaleThreadParams, rod_diameter: float) -> List[RadialSegment]:
+    # The body is rotationally symmetric, so it's a single revolve of its profile
+    # (bottom to top) instead of a chain of booleans:
+    #   - z=0..2: the threaded part of the rod, rod_diameter.
+    #   - z=2..3: the top 1 mm of the 3 mm rod, shaved down to 10.90 mm.
+    #     10.90 is slightly smaller than the thread minor diameter for tolerance purposes.
+    #     This ensures that the base doesn't have to be threaded, because it's hard to thread
+    #     a rod all the way so close to the flat surface.
+    #   - z=3..7.3: the 24 mm main cylinder that holds the magnet holes.
+    #   - An 8.05 mm through-hole for laser light all the way through.
+    bore_radius = params.bore_diameter / 2
+
+    def radius_at(z):
+        if z < params.threaded_length:
+            return bore_radius, rod_diameter / 2
+        if z < params.rod_length:
+            return bore_radius, min(rod_diameter, params.runoff_diameter) / 2
+        return bore_radius, params.body_diameter / 2
+
+    return stepped_profile((0, params.threaded_length, params.rod_length, params.height), radius_at)
+
+
+def _union_thread(model: cq.Workplane, **thread) -> cq.Workplane:
+    # IsoThread is oriented with z=0..length so its bottom already sits at z=0.
+    return model.union(cached_iso_thread(**thread))
+
+
+def male_thread_features(params: MaleThreadParams = MaleThreadParams(), visual: bool = False) -> List[Feature]:
+    """Feature steps of the manufacturing model, or of the visual model with `visual=True`."""
+    if not visual:
+        features = [Feature("body", revolve_step, {"segments": _body_profile(params, params.rod_diameter)})]
+    else:
+        # Leave a base rod at the minor diameter for the thread to sit on, then
+        # create the actual thread geometry for the bottom 2 mm of the rod.
+        # - external=True => male (external) thread
+        # - end_finishes=('fade', 'square') => fade at the bottom, square at top
+        features = [
+            Feature("body", revolve_step, {"segments": _body_profile(params, params.thread_minor_diameter)}),
+            Feature("thread", _union_thread, {
+                "major_diameter": params.thread_major_diameter,
+                "pitch": params.thread_pitch,
+                "length": params.threaded_length,
+                "external": True,
+                "hand": "right",
+                "end_finishes": ("fade", "square"),
+            }),
+        ]
+
+    # Drill the magnet holes around the top face
+    features.append(Feature("magnet_holes", drill_magnet_ring, {"face": ">Z", "ring": params.magnets}))
+    return features
+
+
+def build_male_thread(params: MaleThreadParams = MaleThreadParams()) -> cq.Workplane:
+    """Manufacturing model: plain 11.45 mm rod, magnet pockets on the top face."""
+    return replay(male_thread_features(params))
+
+
+def build_male_thread_visual(params: MaleThreadParams = MaleThreadParams()) -> cq.Workplane:
+    """Visual model: rod at the thread minor diameter with a detailed male thread unioned on."""
+    return replay(male_thread_features(params, visual=True))
@@ -0,0 +1,273 @@
+"""
+Triangle meshes as NumPy vertex/index buffers.
+
+A shape is tessellated once into a `Mesh`, which is then written to any of the
+mesh formats (binary STL, 3MF, GLB, and NPZ for the raw buffers) and handed to
+the renderer as-is, instead of each exporter re-tessellating and the renderer
+re-parsing the STL. STL files from elsewhere are read with `load_stl`.
+"""
+
+import io
+import json
+import os
+import struct
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+import cadquery as cq
+import numpy as np
+
+STL_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2"),
+])
+
+
+@dataclass
+class Mesh:
+    vertices: np.ndarray   # (n, 3) float32
+    triangles: np.ndarray  # (m, 3) uint32 indices into vertices
+
+    @property
+    def triangle_vertices(self) -> np.ndarray:
+        """(m, 3, 3) corner coordinates of every triangle."""
+        return self.vertices[self.triangles]
+
+    @property
+    def normals(self) -> np.ndarray:
+        """(m, 3) unit normals of every triangle (right-hand rule)."""
+        corners = self.triangle_vertices
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    @property
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    def to_pyvista(self):
+        import pyvista as pv
+
+        faces = np.hstack([np.full((len(self.triangles), 1), 3, dtype=np.int64), self.triangles]).ravel()
+        return pv.PolyData(self.vertices, faces)
+
+
+def tessellate(shape: Union[cq.Workplane, cq.Shape], tolerance: float, angular_tolerance: float) -> Mesh:
+    if isinstance(shape, cq.Workplane):
+        shapes = shape.vals()
+        shape = shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    points, triangles = shape.tessellate(tolerance, angular_tolerance)
+    return Mesh(
+        np.array([p.toTuple() for p in points], dtype=np.float32).reshape(-1, 3),
+        np.array(triangles, dtype=np.uint32).reshape(-1, 3),
+    )
+
+
+def concatenate(meshes: Sequence[Mesh]) -> Mesh:
+    """All of `meshes` in one, as they are (see `weld` for joining them up)."""
+    offsets = np.cumsum([0] + [len(mesh.vertices) for mesh in meshes[:-1]])
+    return Mesh(
+        np.concatenate([mesh.vertices for mesh in meshes]).astype(np.float32),
+        np.concatenate([mesh.triangles + offset for mesh, offset in zip(meshes, offsets)]).astype(np.uint32),
+    )
+
+
+def weld(mesh: Mesh, tolerance: float) -> Mesh:
+    """
+    Merge vertices that snap to the same point of a `tolerance` grid, e.g. where
+    two concatenated meshes meet, and drop the triangles that collapse.
+    """
+    cells = np.round(mesh.vertices / tolerance).astype(np.int64)
+    _, first, inverse = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    triangles = inverse.reshape(-1)[mesh.triangles]
+    kept = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2]))
+    return Mesh(mesh.vertices[first], triangles[kept].astype(np.uint32))
+
+
+def read_stl(path: Union[str, Path]) -> Mesh:
+    """
+    Binary STL as an indexed mesh. The file is memory mapped and its triangle
+    records viewed in place, without parsing; corners that are the same bit for
+    bit, as STL repeats every shared vertex, are merged into one vertex.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        f.seek(80)
+        header = f.read(4)
+    count = struct.unpack("<I", header)[0] if len(header) == 4 else -1
+    if path.stat().st_size != 84 + count * STL_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a binary STL file")
+    if count == 0:
+        return Mesh(np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.uint32))
+    records = np.memmap(path, dtype=STL_DTYPE, mode="r", offset=84, shape=(count,))
+    corners = np.ascontiguousarray(records["vertices"]).reshape(-1, 3)
+    del records
+    # Turns -0.0 into 0.0, so that they merge
+    corners += np.float32(0)
+    # Each corner's 12 bytes as one key
+    keys = corners.view(np.dtype((np.void, corners.itemsize * 3))).reshape(-1)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return Mesh(corners[first], inverse.reshape(-1, 3).astype(np.uint32))
+
+
+def load_stl(path: Union[str, Path]) -> Mesh:
+    """
+    `read_stl`, cached next to the file as `<name>.stl.npz` for as long as the
+    STL keeps its size and modification time.
+    """
+    path = Path(path)
+    cached = path.with_name(path.name + ".npz")
+    stat = path.stat()
+    source = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    if cached.is_file():
+        with np.load(cached) as data:
+            if "source" in data.files and np.array_equal(data["source"], source):
+                return Mesh(data["vertices"], data["triangles"])
+    mesh = read_stl(path)
+    staging = cached.with_name(f"{cached.name}.tmp-{os.getpid()}")
+    try:
+        with open(staging, "wb") as f:
+            np.savez(f, vertices=mesh.vertices, triangles=mesh.triangles, source=source)
+        os.replace(staging, cached)
+    except OSError:
+        # Read-only folder: just don't cache
+        staging.unlink(missing_ok=True)
+    return mesh
+
+
+def write_stl(mesh: Mesh, path: Union[str, Path]) -> None:
+    """Binary STL."""
+    records = np.zeros(len(mesh.triangles), dtype=STL_DTYPE)
+    records["normal"] = mesh.normals
+    records["vertices"] = mesh.triangle_vertices
+    with open(path, "wb") as f:
+        f.write(b"Binary STL written by magnet_connector".ljust(80, b" "))
+        f.write(struct.pack("<I", len(records)))
+        f.write(records.tobytes())
+
+
+_3MF_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+ <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+ <Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+_3MF_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+ <Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+
+def write_3mf(mesh: Mesh, path: Union[str, Path]) -> None:
+    """3MF package with a single object, in millimeters."""
+    model = io.StringIO()
+    model.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<model unit="millimeter" xml:lang="en-US" '
+                'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                ' <resources>\n  <object id="1" type="model">\n   <mesh>\n    <vertices>\n')
+    np.savetxt(model, mesh.vertices, fmt='     <vertex x="%.6g" y="%.6g" z="%.6g"/>')
+    model.write('    </vertices>\n    <triangles>\n')
+    np.savetxt(model, mesh.triangles, fmt='     <triangle v1="%d" v2="%d" v3="%d"/>')
+    model.write('    </triangles>\n   </mesh>\n  </object>\n </resources>\n'
+                ' <build>\n  <item objectid="1"/>\n </build>\n</model>\n')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _3MF_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _3MF_RELS)
+        archive.writestr("3D/3dmodel.model", model.getvalue())
+
+
+def _pad4(data: bytes, fill: bytes) -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def write_glb(mesh: Mesh, path: Union[str, Path]) -> None:
+    """Binary glTF. glTF is Y-up and in meters, so the root node turns Z-up millimeters into that."""
+    write_glb_instances([mesh], [(0, np.eye(4))], path)
+
+
+def write_glb_instances(
+    meshes: Sequence[Mesh],
+    instances: Sequence[Tuple[int, np.ndarray]],
+    path: Union[str, Path],
+    colors: Optional[Sequence[Optional[Tuple[float, ...]]]] = None,
+) -> None:
+    """
+    Binary glTF in which every mesh is stored once and placed by a node per
+    instance: (index in `meshes`, 4x4 transform in mm). `colors` are optional
+    RGBA per mesh.
+    """
+    views, accessors, gltf_meshes, materials, buffers = [], [], [], [], []
+    offset = 0
+    for i, mesh in enumerate(meshes):
+        positions = np.ascontiguousarray(mesh.vertices, dtype="<f4").tobytes()
+        indices = np.ascontiguousarray(mesh.triangles, dtype="<u4").tobytes()
+        low, high = mesh.bounds
+        views += [
+            {"buffer": 0, "byteOffset": offset, "byteLength": len(positions), "target": 34962},
+            {"buffer": 0, "byteOffset": offset + len(positions), "byteLength": len(indices), "target": 34963},
+        ]
+        accessors += [
+            {"bufferView": 2 * i, "componentType": 5126, "count": len(mesh.vertices), "type": "VEC3",
+             "min": low.tolist(), "max": high.tolist()},
+            {"bufferView": 2 * i + 1, "componentType": 5125, "count": mesh.triangles.size, "type": "SCALAR"},
+        ]
+        primitive = {"attributes": {"POSITION": 2 * i}, "indices": 2 * i + 1}
+        if colors is not None and colors[i] is not None:
+            primitive["material"] = len(materials)
+            materials.append({"pbrMetallicRoughness": {"baseColorFactor": list(colors[i])}})
+        gltf_meshes.append({"primitives": [primitive]})
+        buffers += [positions, indices]
+        offset += len(positions) + len(indices)
+    nodes = [{"children": list(range(1, len(instances) + 1)), "rotation": [-0.7071068, 0, 0, 0.7071068],
+              "scale": [0.001] * 3}]
+    for index, matrix in instances:
+        node = {"mesh": index}
+        if not np.allclose(matrix, np.eye(4)):
+            # Column-major
+            node["matrix"] = np.asarray(matrix, dtype=float).T.reshape(-1).tolist()
+        nodes.append(node)
+    document = {
+        "asset": {"version": "2.0", "generator": "magnet_connector"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": nodes,
+        "meshes": gltf_meshes,
+        "buffers": [{"byteLength": offset}],
+        "bufferViews": views,
+        "accessors": accessors,
+    }
+    if materials:
+        document["materials"] = materials
+    json_chunk = _pad4(json.dumps(document, separators=(",", ":")).encode(), b" ")
+    bin_chunk = _pad4(b"".join(buffers), b"\0")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)))
+        f.write(struct.pack("<I4s", len(json_chunk), b"JSON"))
+        f.write(json_chunk)
+        f.write(struct.pack("<I4s", len(bin_chunk), b"BIN\0"))
+        f.write(bin_chunk)
+
+
+def write_npz(mesh: Mesh, path: Union[str, Path]) -> None:
+    """The raw buffers, for loading back without parsing (see `load_npz`)."""
+    with open(path, "wb") as f:
+        np.savez(f, vertices=mesh.vertices, triangles=mesh.triangles)
+
+
+def load_npz(path: Union[str, Path]) -> Mesh:
+    with np.load(path) as data:
+        return Mesh(data["vertices"], data["triangles"])
+
+
+MESH_WRITERS: Dict[str, Callable[[Mesh, Union[str, Path]], None]] = {
+    "stl": write_stl,
+    "3mf": write_3mf,
+    "glb": write_glb,
+    "npz": write_npz,
+}
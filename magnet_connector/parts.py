@@ -0,0 +1,71 @@
+"""
+Registry of every part this project builds, with the default parameters and
+the location its STEP/STL files are committed at.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import cadquery as cq
+
+from .feature_tree import DEFAULT_TREE, Feature, ReplayResult
+from .female_thread import (
+    FemaleThreadParams,
+    build_female_thread,
+    build_female_thread_visual,
+    female_thread_features,
+)
+from .magnet_holes import MAGNET_HOLES_01_00_00, MagnetHolesParams, build_magnet_holes, magnet_holes_features
+from .male_thread import MaleThreadParams, build_male_thread, build_male_thread_visual, male_thread_features
+from .rangers_guard_sleeve import (
+    RANGERS_GUARD_SLEEVE_01_00_00,
+    RangersGuardSleeveParams,
+    build_rangers_guard_sleeve,
+    rangers_guard_sleeve_features,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass(frozen=True)
+class Part:
+    name: str
+    builder: Callable[[Any], cq.Workplane]
+    features: Callable[[Any], List[Feature]]  # Steps the builder replays
+    params: Any
+    directory: str  # Relative to the repository root
+    stem: str       # Output file name without extension
+
+    def build(self) -> cq.Workplane:
+        return self.builder(self.params)
+
+    def replay(self, params: Any = None) -> ReplayResult:
+        """Build through the shared feature tree, reporting which steps were reused."""
+        return DEFAULT_TREE.replay(self.features(self.params if params is None else params))
+
+    @property
+    def output_dir(self) -> Path:
+        return REPO_ROOT / self.directory
+
+
+PARTS: Dict[str, Part] = {part.name: part for part in (
+    Part("male_thread", build_male_thread, male_thread_features,
+         MaleThreadParams(), "male_thread_01_00_00", "male_thread"),
+    Part("male_thread_visual", build_male_thread_visual, partial(male_thread_features, visual=True),
+         MaleThreadParams(), "male_thread_01_00_00", "male_thread_visual"),
+    Part("female_thread", build_female_thread, female_thread_features,
+         FemaleThreadParams(), "female_thread_01_00_00", "female_thread"),
+    Part("female_thread_visual", build_female_thread_visual, partial(female_thread_features, visual=True),
+         FemaleThreadParams(), "female_thread_01_00_00", "female_thread_visual"),
+    Part("rangers_guard_sleeve", build_rangers_guard_sleeve, rangers_guard_sleeve_features,
+         RangersGuardSleeveParams(), "rangers_guard_sleeve_01_00_01", "rangers_guard_sleeve"),
+    # Historical designs, kept for comparison
+    Part("rangers_guard_sleeve_01_00_00", build_rangers_guard_sleeve, rangers_guard_sleeve_features,
+         RANGERS_GUARD_SLEEVE_01_00_00, "old", "rangers_guard_sleeve"),
+    Part("magnet_holes_01_00_00", build_magnet_holes, magnet_holes_features,
+         MAGNET_HOLES_01_00_00, "old", "magnet_holes_01_00_00"),
+    Part("magnet_holes_01_00_01", build_magnet_holes, magnet_holes_features,
+         MagnetHolesParams(), "old", "magnet_holes"),
+)}
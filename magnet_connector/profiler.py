@@ -0,0 +1,297 @@
+"""
+Opt-in stage profiler for part builds.
+
+While a `Profiler` is active, Workplane operations, feature steps, IsoThread
+construction, tessellation and the exporters are wrapped so that each call
+records its wall time, the process's peak RSS and the face/edge/solid count
+of the shape it produced. Nothing is patched outside of a `with Profiler()`
+block.
+
+    python -m magnet_connector.profiler                        # every part
+    python -m magnet_connector.profiler male_thread_visual female_thread_visual
+
+Writes `profile.json` (every stage, plus totals per operation) and
+`profile.folded` (self time in microseconds per stack, for flamegraph.pl or
+speedscope) into `--out-dir`, and prints the most expensive operations.
+Thread solids are loaded from the thread cache when they are in it; point
+MAGNET_CONNECTOR_CACHE at an empty directory to profile their construction.
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cadquery as cq
+
+from . import mesh
+from .export import DEFAULT_FORMATS, DEFAULT_QUALITY, MESH_FORMATS, QUALITY_PRESETS
+
+# Workplane methods that are wrapped (as "Workplane.<name>")
+WORKPLANE_OPERATIONS = (
+    "box", "circle", "rect", "polyline", "close", "extrude", "revolve", "sweep", "loft",
+    "hole", "cboreHole", "cskHole", "cutBlind", "cutThruAll", "cutEach",
+    "union", "cut", "intersect", "chamfer", "fillet", "polarArray",
+    "faces", "edges", "workplane", "translate", "rotate",
+)
+SHAPE_OPERATIONS = ("tessellate", "exportBrep", "importBrep")
+
+
+def peak_rss() -> Optional[int]:
+    """Highest resident set size of this process so far, in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil has the peak working set
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def topology_counts(value: Any) -> Optional[Tuple[int, int, int]]:
+    """(faces, edges, solids) of a shape or of the shapes on a Workplane's stack, or of its solid."""
+    if isinstance(value, cq.Workplane):
+        shapes = [v for v in value.vals() if isinstance(v, cq.Shape)]
+        if not shapes:
+            try:
+                shapes = [value.findSolid()]
+            except ValueError:
+                return None
+    elif isinstance(value, cq.Shape):
+        shapes = [value]
+    else:
+        return None
+    shape = shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    return len(shape.Faces()), len(shape.Edges()), len(shape.Solids())
+
+
+@dataclass
+class StageRecord:
+    stack: Tuple[str, ...]  # Enclosing stages, outermost first, ending with this one
+    seconds: float          # Wall time, including nested stages
+    self_seconds: float     # Excluding nested stages
+    peak_rss: Optional[int]
+    rss_growth: Optional[int]  # How much this stage raised the peak RSS
+    faces: Optional[int] = None
+    edges: Optional[int] = None
+    solids: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return self.stack[-1]
+
+
+@dataclass
+class _Frame:
+    name: str
+    result: Any = None  # What the stage produced, for the topology counts
+    child_seconds: float = 0.0
+    overhead: float = 0.0  # Time spent counting topology in nested stages
+
+
+_ACTIVE: Optional["Profiler"] = None
+
+
+class Profiler:
+    def __init__(self, count_topology: bool = True):
+        self.count_topology = count_topology
+        self.records: List[StageRecord] = []
+        self._stack: List[_Frame] = []
+        self._patches: List[Tuple[Any, str, Any]] = []
+
+    def __enter__(self) -> "Profiler":
+        global _ACTIVE
+        if _ACTIVE is not None:
+            raise RuntimeError("A profiler is already active")
+        _ACTIVE = self
+        for name in WORKPLANE_OPERATIONS:
+            self._patch(cq.Workplane, name, f"Workplane.{name}")
+        for name in SHAPE_OPERATIONS:
+            self._patch(cq.Shape, name, f"Shape.{name}")
+        self._patch(cq.exporters, "export", "exporters.export")
+        for fmt in MESH_FORMATS:
+            self._patch(mesh.MESH_WRITERS, fmt, f"write_{fmt}")
+        try:
+            from cq_warehouse.fastener import IsoThread
+        except ImportError:
+            pass
+        else:
+            self._patch(IsoThread, "__init__", "IsoThread", result_is_self=True)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _ACTIVE
+        for owner, name, original in reversed(self._patches):
+            if isinstance(owner, dict):
+                owner[name] = original
+            else:
+                setattr(owner, name, original)
+        self._patches.clear()
+        _ACTIVE = None
+
+    def _patch(self, owner: Any, name: str, label: str, result_is_self: bool = False) -> None:
+        if isinstance(owner, dict):
+            original = raw = owner[name]
+        else:
+            if not hasattr(owner, name):
+                return
+            original = getattr(owner, name)
+            raw = inspect.getattr_static(owner, name)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            with self.stage(label) as frame:
+                result = original(*args, **kwargs)
+                frame.result = args[0] if result_is_self else result
+            return result
+
+        if isinstance(owner, dict):
+            owner[name] = wrapper
+        else:
+            setattr(owner, name, staticmethod(wrapper) if isinstance(raw, staticmethod) else wrapper)
+        self._patches.append((owner, name, raw))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[_Frame]:
+        """Time a stage of your own; set `.result` on the yielded frame to count its topology."""
+        frame = _Frame(name)
+        self._stack.append(frame)
+        rss_before = peak_rss()
+        start = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            seconds = time.perf_counter() - start - frame.overhead
+            rss_after = peak_rss()
+            self._stack.pop()
+            counted = time.perf_counter()
+            counts = topology_counts(frame.result) if self.count_topology else None
+            overhead = time.perf_counter() - counted
+            self.records.append(StageRecord(
+                stack=tuple(f.name for f in self._stack) + (name,),
+                seconds=seconds,
+                self_seconds=seconds - frame.child_seconds,
+                peak_rss=rss_after,
+                rss_growth=None if rss_after is None else rss_after - rss_before,
+                faces=counts and counts[0],
+                edges=counts and counts[1],
+                solids=counts and counts[2],
+            ))
+            if self._stack:
+                self._stack[-1].child_seconds += seconds
+                self._stack[-1].overhead += frame.overhead + overhead
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Calls, total and self seconds per stage name, most expensive (self time) first."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for record in self.records:
+            entry = totals.setdefault(record.name, {"calls": 0, "seconds": 0.0, "self_seconds": 0.0})
+            entry["calls"] += 1
+            entry["self_seconds"] += record.self_seconds
+            # Recursive calls would otherwise be counted twice
+            if record.name not in record.stack[:-1]:
+                entry["seconds"] += record.seconds
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["self_seconds"]))
+
+    def folded(self) -> str:
+        """Self time per stack in microseconds, one 'a;b;c 1234' line each."""
+        stacks: Dict[Tuple[str, ...], float] = {}
+        for record in self.records:
+            stacks[record.stack] = stacks.get(record.stack, 0.0) + record.self_seconds
+        return "".join(f"{';'.join(stack)} {round(seconds * 1e6)}\n"
+                       for stack, seconds in sorted(stacks.items()) if seconds > 0)
+
+    def write(self, out_dir: Path) -> Tuple[Path, Path]:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        json_path, folded_path = out_dir / "profile.json", out_dir / "profile.folded"
+        stages = [dict(asdict(record), stack=list(record.stack)) for record in self.records]
+        json_path.write_text(json.dumps({"stages": stages, "totals": self.totals()}, indent=2))
+        folded_path.write_text(self.folded())
+        return json_path, folded_path
+
+    def summary(self, limit: int = 15) -> str:
+        lines = [f"{'stage':<24} {'calls':>6} {'self s':>8} {'total s':>8}"]
+        for name, entry in list(self.totals().items())[:limit]:
+            lines.append(f"{name:<24} {entry['calls']:>6} {entry['self_seconds']:>8.3f} {entry['seconds']:>8.3f}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[_Frame]:
+    """A stage of the active profiler, or nothing when none is active."""
+    if _ACTIVE is None:
+        yield _Frame(name)
+    else:
+        with _ACTIVE.stage(name) as frame:
+            yield frame
+
+
+def profile_parts(
+    part_names: Sequence[str],
+    out_dir: Path,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    quality: str = DEFAULT_QUALITY,
+    count_topology: bool = True,
+) -> Profiler:
+    """Build and export `part_names` from scratch under a profiler and write its results to `out_dir`."""
+    from .export import export_with_mesh
+    from .feature_tree import DEFAULT_TREE
+    from .parts import PARTS
+
+    DEFAULT_TREE.clear()
+    with Profiler(count_topology) as profiler, tempfile.TemporaryDirectory() as exports:
+        for name in part_names:
+            part = PARTS[name]
+            with profiler.stage(name):
+                with profiler.stage("build") as frame:
+                    model = frame.result = part.build()
+                with profiler.stage("export"):
+                    export_with_mesh(model, part.stem, exports, formats, quality)
+    profiler.write(out_dir)
+    return profiler
+
+
+def main(argv=None):
+    from .parts import PARTS
+
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.profiler", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help=f"parts to profile (default: all). One of: {', '.join(PARTS)}")
+    parser.add_argument("--out-dir", default="profiles", help="where to write the profile (default: profiles)")
+    parser.add_argument("--formats", nargs="+", choices=["step", *MESH_FORMATS], default=list(DEFAULT_FORMATS))
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"tessellation preset (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--no-topology", action="store_true",
+                        help="don't count faces/edges/solids (they add time outside of the measured stages)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.parts if name not in PARTS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+
+    profiler = profile_parts(args.parts or list(PARTS), Path(args.out_dir), args.formats, args.quality,
+                             not args.no_topology)
+    print(profiler.summary())
+    print(f"Profile written to: {Path(args.out_dir) / 'profile.json'}, {Path(args.out_dir) / 'profile.folded'}")
+
+
+if __name__ == "__main__":
+    # `python -m` runs this file as a second copy of the module, while feature_tree reports its stages to
+    # the package's copy (imported with the package): profile with that one
+    from magnet_connector import profiler
+
+    profiler.main()
@@ -0,0 +1,75 @@
+"""
+Custom "guard sleeve" for the Sanwu Laser Rangers model so the flashlight
+adapter can only be pulled off directly upwards.
+
+`RangersGuardSleeveParams()` is rangers_guard_sleeve_01_00_01.
+`RANGERS_GUARD_SLEEVE_01_00_00` reproduces the historical design in old/.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import cadquery as cq
+
+from .feature_tree import Feature, replay
+from .revolve import revolve_step, stepped_profile
+
+
+@dataclass(frozen=True)
+class RangersGuardSleeveParams:
+    cylinder_diameter: float = 29.00  # same as diameter of Laser Rangers head base
+    # 4.3mm male + 6mm female + 0.3mm gap between them + 6.3mm for both stairs
+    cylinder_height: float = 16.90
+    through_hole_diameter: float = 21.05  # Top stair
+    # Male piece width with tolerance, total of male + female + gap caused by magnets
+    male_pocket_diameter: float = 24.05
+    male_pocket_depth: float = 10.60
+    # Purposefully wider pocket that overlaps the female portion and half of the magnet gap
+    female_pocket_diameter: float = 24.20
+    female_pocket_depth: float = 6.15
+    # For the bottom stair that is 25.00mm in diameter
+    stair_pocket_diameter: float = 25.05
+    stair_pocket_depth: float = 4.00
+
+
+RANGERS_GUARD_SLEEVE_01_00_00 = RangersGuardSleeveParams(
+    cylinder_diameter=30.20,
+    cylinder_height=23.2,
+    through_hole_diameter=21.10,
+    male_pocket_diameter=28.10,
+    male_pocket_depth=16.90,
+    female_pocket_diameter=28.20,
+    female_pocket_depth=8.40,
+    stair_pocket_diameter=25.10,
+    stair_pocket_depth=4.00,
+)
+
+
+def rangers_guard_sleeve_features(params: RangersGuardSleeveParams = RangersGuardSleeveParams()) -> List[Feature]:
+    # The sleeve is a cylinder with stepped coaxial pockets, built as a single revolve
+    # of its profile. At every height the hole is the widest of the pockets reaching it:
+    #   - The through-hole (top stair) from bottom to top.
+    #   - The male pocket, from the top down.
+    #   - The purposefully wider female pocket from the top down. This results in a stepped
+    #     hole where the wider hole at the top overlaps the female portion and half of the
+    #     magnet gap portion.
+    #   - The bottom stair pocket, from the bottom up.
+    height = params.cylinder_height
+    pockets = (
+        # (z from, z to, diameter)
+        (0, height, params.through_hole_diameter),
+        (height - params.male_pocket_depth, height, params.male_pocket_diameter),
+        (height - params.female_pocket_depth, height, params.female_pocket_diameter),
+        (0, params.stair_pocket_depth, params.stair_pocket_diameter),
+    )
+
+    def radius_at(z):
+        hole = max(diameter for bottom, top, diameter in pockets if bottom <= z <= top)
+        return hole / 2.0, params.cylinder_diameter / 2.0
+
+    levels = [0, height] + [z for bottom, top, _ in pockets for z in (bottom, top) if 0 <= z <= height]
+    return [Feature("body", revolve_step, {"segments": stepped_profile(levels, radius_at)})]
+
+
+def build_rangers_guard_sleeve(params: RangersGuardSleeveParams = RangersGuardSleeveParams()) -> cq.Workplane:
+    return replay(rangers_guard_sleeve_features(params))
@@ -0,0 +1,258 @@
+"""
+Base images for the technical drawings, rendered with pyvista from an
+in-memory `Mesh` (see mesh.py) rather than from an STL file read back from disk.
+
+    python -m magnet_connector.render                       # male and female drawings
+    python -m magnet_connector.render female_thread_visual
+    python -m magnet_connector.render --lod                 # decimated, feature edges only
+
+All images of one invocation are taken with a single off-screen window.
+
+With `--lod` each view is rendered from a copy of the mesh decimated to the
+view's triangle budget (keeping edges sharper than `FEATURE_ANGLE`, such as
+thread crests), and edges are drawn as extracted feature edges instead of a
+wireframe of every triangle.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .cache import BuildCache, mesh_cached
+from .export import DEFAULT_QUALITY, QUALITY_PRESETS
+from .mesh import Mesh
+from .parts import PARTS
+
+SQUARE_HIGH_RESOLUTION = (2048, 2048)
+
+# Dihedral angle (degrees) above which an edge is a feature edge. The flanks of
+# a 60 degree ISO thread meet at 120 degrees, so its crests and roots are kept.
+FEATURE_ANGLE = 30.0
+DEFAULT_TRIANGLE_BUDGET = 150_000
+
+Vector = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class View:
+    filename: str
+    direction: Vector  # From the center of the part towards the camera
+    up: Vector         # Camera's "up" direction
+    show_edges: bool = True
+    triangle_budget: int = DEFAULT_TRIANGLE_BUDGET  # With level of detail enabled
+
+
+VIEWS = (
+    View("front_view.png", (0, -1, 0), (0, 0, 1)),
+    # Looking down the axis the threads are barely visible
+    View("top_view.png", (0, 0, 1), (0, 1, 0), triangle_budget=50_000),
+    View("side_view.png", (1, 0, 0), (0, 0, 1)),
+    View("bottom_view.png", (0, 0, -1), (0, -1, 0), triangle_budget=50_000),
+    View("isometric_top_view.png", (1, 1, 1), (0, 0, 1)),
+    View("isometric_bottom_view.png", (1, 1, -1), (0, 0, -1)),
+)
+
+# The threads of the male part are too dense to show edges from the side
+_MALE_EDGES = ("top_view.png", "isometric_top_view.png")
+
+# Visual part -> views of its technical drawing
+DRAWINGS: Dict[str, Sequence[View]] = {
+    "male_thread_visual": tuple(replace(view, show_edges=view.filename in _MALE_EDGES) for view in VIEWS),
+    "female_thread_visual": VIEWS,
+}
+
+
+@dataclass(frozen=True)
+class RenderReport:
+    path: Path
+    triangles: int  # Rendered, after decimation
+    seconds: float
+
+    def __str__(self):
+        return f"Image rendered to: {self.path} ({self.triangles} triangles, rendered in {self.seconds:.2f}s)"
+
+
+def decimate(data, budget: int, feature_angle: float = FEATURE_ANGLE):
+    """
+    Copy of `data` (pv.PolyData) reduced to about `budget` triangles. Vertices
+    on edges sharper than `feature_angle` are only moved along those edges, so
+    thread crests keep their shape.
+    """
+    if data.n_cells <= budget:
+        return data
+    return data.decimate_pro(1 - budget / data.n_cells, feature_angle=feature_angle, splitting=False,
+                             preserve_topology=True, boundary_vertex_deletion=False)
+
+
+def feature_edges(data, feature_angle: float = FEATURE_ANGLE):
+    return data.extract_feature_edges(feature_angle, boundary_edges=True, non_manifold_edges=False,
+                                      feature_edges=True, manifold_edges=False)
+
+
+class Renderer:
+    """
+    One off-screen render window shared by every snapshot. Between views only
+    the camera and the edge/shading mode of the mesh change, and between parts
+    only the mesh is swapped.
+
+    With `lod=True` each triangle budget gets its own decimated copy of the mesh
+    (and its feature edges), added once and shown only for the views using it.
+    """
+
+    def __init__(
+        self,
+        window_size: Tuple[int, int] = SQUARE_HIGH_RESOLUTION,
+        lod: bool = False,
+        feature_angle: float = FEATURE_ANGLE,
+    ):
+        import pyvista as pv
+
+        self.plotter = pv.Plotter(off_screen=True, window_size=window_size)
+        self.plotter.enable_parallel_projection()  # Use parallel projection for technical views
+        self.lod = lod
+        self.feature_angle = feature_angle
+        # Triangle budget (None: full mesh) -> (surface actor, feature edge actor, triangle count)
+        self.levels: Dict[Optional[int], tuple] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.plotter.close()
+
+    def _clear(self) -> None:
+        for surface, edges, _ in self.levels.values():
+            self.plotter.remove_actor(surface, render=False)
+            if edges is not None:
+                self.plotter.remove_actor(edges, render=False)
+        self.levels = {}
+
+    def _level(self, data, budget: Optional[int]) -> tuple:
+        if budget not in self.levels:
+            edges = None
+            if budget is not None:
+                data = decimate(data, budget, self.feature_angle)
+                edges = self.plotter.add_mesh(feature_edges(data, self.feature_angle), color="black",
+                                              line_width=1, render=False)
+            surface = self.plotter.add_mesh(data, edge_color="black", line_width=0.5, render=False)
+            self.levels[budget] = (surface, edges, data.n_cells)
+        return self.levels[budget]
+
+    def capture_views(self, mesh: Mesh, views: Sequence[View], out_dir: Union[str, Path]) -> List[RenderReport]:
+        """Write a screenshot of `mesh` for each of `views` into `out_dir`."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._clear()
+        data = mesh.to_pyvista()
+        low, high = mesh.bounds
+        center = (low + high) / 2
+        # Offset distance for the camera
+        offset = 2 * float(max(high - low))
+
+        reports = []
+        for view in views:
+            start = time.perf_counter()
+            surface, edges, triangles = self._level(data, view.triangle_budget if self.lod else None)
+            for other_surface, other_edges, _ in self.levels.values():
+                other_surface.visibility = other_surface is surface
+                if other_edges is not None:
+                    other_edges.visibility = other_edges is edges and view.show_edges
+            # Without LOD the edges are the wireframe of the surface itself
+            surface.prop.show_edges = view.show_edges and edges is None
+            surface.prop.color = "white" if view.show_edges else "lightgray"
+            # (position, focal point, up); setting it as a whole keeps pyvista from resetting it on the first render
+            self.plotter.camera_position = [tuple(center + offset * np.asarray(view.direction)), tuple(center), view.up]
+            # Fit the part in the window, keeping the view direction
+            self.plotter.reset_camera(render=False)
+            path = out_dir / view.filename
+            self.plotter.screenshot(str(path))
+            reports.append(RenderReport(path, triangles, time.perf_counter() - start))
+        return reports
+
+
+def capture_views(
+    mesh: Mesh,
+    views: Sequence[View],
+    out_dir: Union[str, Path],
+    lod: bool = False,
+) -> List[RenderReport]:
+    """Write a screenshot of `mesh` for each of `views` into `out_dir`."""
+    with Renderer(lod=lod) as renderer:
+        return renderer.capture_views(mesh, views, out_dir)
+
+
+def part_mesh(part_name: str, cache: Optional[BuildCache] = None, quality: str = DEFAULT_QUALITY) -> Mesh:
+    """Mesh of a part, from `cache` when given (see `mesh_cached`)."""
+    return mesh_cached(PARTS[part_name], cache, quality)
+
+
+def draw_part(
+    part_name: str,
+    out_dir: Union[str, Path],
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+    lod: bool = False,
+) -> List[RenderReport]:
+    """Render the technical drawing base images of a visual part into `out_dir`."""
+    return capture_views(part_mesh(part_name, cache, quality), DRAWINGS[part_name], out_dir, lod)
+
+
+def drawing_dir(part_name: str) -> Path:
+    return PARTS[part_name].output_dir / "technical_drawing"
+
+
+def draw_parts(
+    part_names: Sequence[str] = tuple(DRAWINGS),
+    cache: Optional[BuildCache] = None,
+    quality: str = DEFAULT_QUALITY,
+    lod: bool = False,
+    triangle_budget: Optional[int] = None,
+) -> List[RenderReport]:
+    """
+    Render the drawing images of several visual parts into their
+    technical_drawing folders, with one window. `triangle_budget` overrides the
+    budget of every view.
+    """
+    reports = []
+    with Renderer(lod=lod) as renderer:
+        for name in part_names:
+            views = DRAWINGS[name]
+            if triangle_budget is not None:
+                views = [replace(view, triangle_budget=triangle_budget) for view in views]
+            reports += renderer.capture_views(part_mesh(name, cache, quality), views, drawing_dir(name))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.render", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("parts", nargs="*", metavar="PART",
+                        help=f"visual parts to draw (default: all). One of: {', '.join(DRAWINGS)}")
+    parser.add_argument("--no-cache", action="store_true", help="always rebuild, don't use the build cache")
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"tessellation preset (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--lod", action="store_true",
+                        help="decimate to each view's triangle budget and draw feature edges only")
+    parser.add_argument("--triangle-budget", type=int, help="with --lod, the same budget for every view")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.parts if name not in DRAWINGS]
+    if unknown:
+        parser.error(f"unknown part(s): {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    reports = draw_parts(args.parts or tuple(DRAWINGS), None if args.no_cache else BuildCache(), args.quality,
+                         args.lod, args.triangle_budget)
+    for report in reports:
+        print(report)
+    print(f"Rendered {len(reports)} images in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Build rotationally symmetric bodies with a single revolve instead of a chain
+of extrude / hole / cutBlind booleans.
+
+A body is described as a stepped radial profile: a list of (z, r_inner, r_outer)
+segments. Each segment spans from the previous segment's z (or `z_start` for
+the first one) up to its own z. The profile is turned into one closed outline
+in the XZ plane and revolved 360° around the Z axis. Non-axisymmetric features
+(magnet pockets, chamfers) are applied to the result afterwards.
+"""
+
+from typing import Iterable, List, Sequence, Tuple
+
+import cadquery as cq
+
+RadialSegment = Tuple[float, float, float]  # (z, r_inner, r_outer)
+
+
+def stepped_profile(
+    z_levels: Sequence[float],
+    radius_at,
+) -> List[RadialSegment]:
+    """
+    Segments between consecutive `z_levels`, where `radius_at(z)` returns the
+    (r_inner, r_outer) of the body at height z (evaluated at each segment's middle).
+    """
+    # Rounded so that e.g. 16.9 - 10.6 and 6.3 are one level, not a sliver segment
+    levels = sorted({round(z, 9) for z in z_levels})
+    return [(top, *radius_at((bottom + top) / 2)) for bottom, top in zip(levels, levels[1:])]
+
+
+def _validate(segments: Sequence[RadialSegment], z_start: float) -> None:
+    if not segments:
+        raise ValueError("Profile needs at least one segment")
+    previous_z = z_start
+    for z, r_inner, r_outer in segments:
+        if z <= previous_z:
+            raise ValueError(f"Segment heights must increase, got {z} after {previous_z}")
+        if not 0 <= r_inner < r_outer:
+            raise ValueError(f"Segment at z={z} needs 0 <= r_inner < r_outer, got {r_inner}, {r_outer}")
+        previous_z = z
+    for (z, r_inner, r_outer), (_, next_inner, next_outer) in zip(segments, segments[1:]):
+        if max(r_inner, next_inner) >= min(r_outer, next_outer):
+            raise ValueError(f"Segments meeting at z={z} don't overlap radially, the body would split")
+
+
+def _simplify(points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Drop repeated points and the middle of three points on one horizontal/vertical line."""
+    changed = True
+    while changed and len(points) > 3:
+        changed = False
+        for i in range(len(points)):
+            prev, cur, nxt = points[i - 1], points[i], points[(i + 1) % len(points)]
+            if cur == prev or (prev[0] == cur[0] == nxt[0]) or (prev[1] == cur[1] == nxt[1]):
+                del points[i]
+                changed = True
+                break
+    return points
+
+
+def profile_outline(segments: Sequence[RadialSegment], z_start: float = 0.0) -> List[Tuple[float, float]]:
+    """Closed (r, z) outline of the profile: up the outer radii, then down the inner radii."""
+    _validate(segments, z_start)
+    bottoms = [z_start] + [z for z, _, _ in segments[:-1]]
+    outer: List[Tuple[float, float]] = []
+    inner: List[Tuple[float, float]] = []
+    for bottom, (top, r_inner, r_outer) in zip(bottoms, segments):
+        outer += [(r_outer, bottom), (r_outer, top)]
+        inner += [(r_inner, bottom), (r_inner, top)]
+    return _simplify(outer + inner[::-1])
+
+
+def revolve_profile(segments: Iterable[RadialSegment], z_start: float = 0.0) -> cq.Workplane:
+    """Solid of revolution around the Z axis for a stepped radial profile."""
+    points = profile_outline(list(segments), z_start)
+    # On the XZ workplane local x is the radius and local y is global Z
+    return (
+        cq.Workplane("XZ")
+        .polyline(points)
+        .close()
+        .revolve(360, (0, 0, 0), (0, 1, 0))
+    )
+
+
+def revolve_step(model, segments: Sequence[RadialSegment]) -> cq.Workplane:
+    """Feature step (see feature_tree.py) that starts a part from a revolved profile."""
+    return revolve_profile(segments)
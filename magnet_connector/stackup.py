@@ -0,0 +1,389 @@
+"""
+Monte Carlo tolerance stackup of the assembled connector.
+
+Every dimension the fits depend on is read from the part parameters
+(`Connector`, see assembly.py) and sampled around its nominal value. Each
+magnet pocket and each magnet varies separately, since one bad pocket is
+enough: their distributions are tabulated once per ring (the widest magnet of a
+pocket against its diameter, the magnet stack against its depth) and only the
+worst pocket of each sample is drawn, as an order statistic. The samples are
+checked for three failures:
+
+  - magnet not seating: a magnet wider than its pocket (plus what a bench vice
+    can press in).
+  - sleeve not closing: a piece wider than its sleeve pocket, the female piece
+    caught on the step between the two pockets, or the male + magnets + female
+    stack standing proud of the sleeve top.
+  - thread not engaging: the male rod too wide for, or too thin to bite into,
+    the laser head's M11.5x0.5; the female pilot hole outside the range the tap
+    works with, or too wide for the adapter's thread to bite into.
+
+    python -m magnet_connector.stackup
+    python -m magnet_connector.stackup --samples 5000000 --spread "sleeve.*=0.05" --spread "magnet.height=0.08:uniform"
+    python -m magnet_connector.stackup --set male.magnets.hole_diameter=4.13
+
+A spread is PATTERN=TOLERANCE[:DISTRIBUTION]: dimensions whose dotted name
+matches the glob deviate by a normal distribution with 3 sigma at the
+tolerance, or uniformly within it. The last matching spread wins. The mating
+threads of the laser head (head.*) and flashlight adapter (adapter.*) are
+sampled like the machined dimensions.
+"""
+
+import argparse
+import fnmatch
+import functools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .assembly import Connector
+from .sweep import with_overrides
+
+DEFAULT_SAMPLES = 1_000_000
+CHUNK = 1_000_000  # Samples per vectorized batch, bounds memory use
+GRID_STEPS = 100   # Grid steps per tolerance of the tabulated per-pocket distributions
+
+
+@dataclass(frozen=True)
+class Spread:
+    tolerance: float              # ± deviation from nominal
+    distribution: str = "normal"  # "normal": 3 sigma at the tolerance, "uniform": anywhere within it
+
+    def sample(self, rng: np.random.Generator, nominal: float, shape: Tuple[int, ...]) -> np.ndarray:
+        if self.tolerance == 0:
+            return np.full(shape, nominal, dtype=np.float32)
+        if self.distribution == "uniform":
+            deviation = rng.random(shape, dtype=np.float32) * (2 * self.tolerance) - self.tolerance
+        else:
+            deviation = rng.standard_normal(shape, dtype=np.float32) * (self.tolerance / 3)
+        return deviation + np.float32(nominal)
+
+    def density(self, nominal: float, step: float) -> "_Density":
+        if self.tolerance == 0:
+            return _Density(nominal, step, np.ones(1))
+        if self.distribution == "uniform":
+            offsets = np.arange(-self.tolerance, self.tolerance + step / 2, step)
+            weights = np.ones(len(offsets))
+        else:
+            sigma = self.tolerance / 3
+            offsets = np.arange(-6 * sigma, 6 * sigma + step / 2, step)
+            weights = np.exp(-0.5 * (offsets / sigma) ** 2)
+        return _Density(nominal + offsets[0], step, weights / weights.sum())
+
+
+@dataclass(frozen=True)
+class _Density:
+    """A distribution tabulated on a grid: `weights[i]` spread evenly around `start + i * step`."""
+    start: float
+    step: float
+    weights: np.ndarray
+
+    def __add__(self, other: "_Density") -> "_Density":
+        return _Density(self.start + other.start, self.step, np.convolve(self.weights, other.weights))
+
+    def __neg__(self) -> "_Density":
+        return _Density(-(self.start + (len(self.weights) - 1) * self.step), self.step, self.weights[::-1])
+
+    def total(self, count: int) -> "_Density":
+        """Of the sum of `count` independent draws."""
+        return functools.reduce(_Density.__add__, [self] * count)
+
+    def maximum(self, count: int) -> "_Density":
+        """Of the largest of `count` independent draws."""
+        cdf = np.cumsum(self.weights) ** count
+        return _Density(self.start, self.step, np.diff(cdf, prepend=0.0))
+
+    def _cdf_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        edges = self.start + (np.arange(len(self.weights) + 1) - 0.5) * self.step
+        return edges, np.concatenate(([0.0], np.cumsum(self.weights)))
+
+    def exceeds(self, value: float) -> float:
+        """P(draw > value)"""
+        edges, cdf = self._cdf_points()
+        return 1 - float(np.interp(value, edges, cdf))
+
+    def sample_max(self, rng: np.random.Generator, count: int, n: int) -> np.ndarray:
+        """`n` draws of the largest of `count` independent draws, by inverting the distribution."""
+        edges, cdf = self._cdf_points()
+        return np.interp(rng.random(n) ** (1 / count), cdf, edges).astype(np.float32)
+
+
+# CNC work at ±0.03 mm; the magnets as measured vary more, in height most of all
+DEFAULT_SPREADS: Tuple[Tuple[str, Spread], ...] = (
+    ("*", Spread(0.03)),
+    ("magnet.diameter", Spread(0.03)),
+    ("magnet.height", Spread(0.05)),
+)
+
+
+@dataclass(frozen=True)
+class Limits:
+    max_press_fit: float = 0.0    # How much wider than its pocket a magnet can still be pressed in
+    max_overhang: float = 0.1     # The female piece may stand this far proud of the sleeve top
+    min_engagement: float = 0.75  # Of the basic thread depth (5/8 H)
+    # See FemaleThreadParams.pilot_hole_diameter: below, the M11.5x0.5 tap binds,
+    # above, it doesn't dig in
+    pilot_hole_range: Tuple[float, float] = (10.90, 10.96)
+
+
+# Failure mode -> its causes, as reported
+MODES: Dict[str, Tuple[str, ...]] = {
+    "magnet not seating": ("male magnet too wide", "female magnet too wide"),
+    "sleeve not closing": ("male piece too wide", "female piece too wide", "female piece on the step",
+                           "stack too tall"),
+    "thread not engaging": ("rod too wide", "rod too thin", "pilot hole out of range", "adapter too loose"),
+}
+
+
+def _mating(connector: Connector) -> Dict[str, float]:
+    """Nominal dimensions of the threads the pieces screw into, which aren't part parameters."""
+    return {
+        "head.minor_diameter": connector.male.thread_minor_diameter,
+        "head.major_diameter": connector.male.thread_major_diameter,
+        "adapter.major_diameter": connector.female.thread_major_diameter,
+    }
+
+
+def nominal(connector: Connector, name: str) -> float:
+    """Nominal value of a dotted dimension name, e.g. 'male.magnets.hole_diameter'."""
+    mating = _mating(connector)
+    if name in mating:
+        return mating[name]
+    return functools.reduce(getattr, name.split("."), connector)
+
+
+def spread_for(name: str, spreads: Sequence[Tuple[str, Spread]]) -> Spread:
+    """The last of `spreads` whose pattern matches `name`."""
+    for pattern, spread in reversed(spreads):
+        if fnmatch.fnmatch(name, pattern):
+            return spread
+    return Spread(0.0)
+
+
+def basic_thread_depth(pitch: float) -> float:
+    return 5 / 8 * pitch * math.sqrt(3) / 2
+
+
+class _Sampler:
+    def __init__(self, connector: Connector, spreads: Sequence[Tuple[str, Spread]], rng: np.random.Generator, n: int):
+        self.connector, self.spreads, self.rng, self.n = connector, spreads, rng, n
+
+    def __call__(self, name: str, *shape: int) -> np.ndarray:
+        return spread_for(name, self.spreads).sample(self.rng, nominal(self.connector, name), (self.n, *shape))
+
+
+@dataclass(frozen=True)
+class Pockets:
+    """The magnet pockets of both rings, tabulated once for every batch of samples."""
+    too_wide: Dict[str, float]                     # Per side, P(some magnet of the ring too wide for its pocket)
+    protrusion: Dict[str, _Density]                # Per side, of one pocket's magnet stack above its rim
+    counts: Dict[str, int]
+
+    @classmethod
+    def tabulate(cls, connector: Connector, spreads: Sequence[Tuple[str, Spread]], limits: Limits) -> "Pockets":
+        names = [f"{side}.magnets.{dimension}" for side in ("male", "female")
+                 for dimension in ("hole_diameter", "hole_depth")] + ["magnet.diameter", "magnet.height"]
+        tolerances = [spread_for(name, spreads).tolerance for name in names]
+        step = min([tolerance for tolerance in tolerances if tolerance > 0], default=1e-3) / GRID_STEPS
+
+        def density(name: str) -> _Density:
+            return spread_for(name, spreads).density(nominal(connector, name), step)
+
+        per_hole = connector.magnet.per_hole
+        widest, stack = density("magnet.diameter").maximum(per_hole), density("magnet.height").total(per_hole)
+        too_wide, protrusion, counts = {}, {}, {}
+        for side in ("male", "female"):
+            counts[side] = getattr(connector, side).magnets.count
+            excess = widest + -density(f"{side}.magnets.hole_diameter")
+            too_wide[side] = 1 - (1 - excess.exceeds(limits.max_press_fit)) ** counts[side]
+            protrusion[side] = stack + -density(f"{side}.magnets.hole_depth")
+        return cls(too_wide, protrusion, counts)
+
+
+def failures(sample: _Sampler, pockets: Pockets, limits: Limits) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """Per-sample flags of every cause in MODES, and the magnet gaps and female overhangs."""
+    connector, rng, n = sample.connector, sample.rng, sample.n
+    causes: Dict[str, np.ndarray] = {}
+    for side in ("male", "female"):
+        causes[f"{side} magnet too wide"] = rng.random(n, dtype=np.float32) < pockets.too_wide[side]
+
+    # Facing pockets hold attracting stacks, so the tallest pair of them sets the gap
+    counts, protrusion = pockets.counts, pockets.protrusion
+    if counts["male"] == counts["female"]:
+        gap = (protrusion["male"] + protrusion["female"]).sample_max(rng, counts["male"], n)
+    else:
+        gap = sum(protrusion[side].sample_max(rng, counts[side], n) for side in ("male", "female"))
+    gap = np.maximum(gap, 0)
+
+    male_diameter, female_diameter = sample("male.body_diameter"), sample("female.body_diameter")
+    male_pocket, female_pocket = sample("sleeve.male_pocket_diameter"), sample("sleeve.female_pocket_diameter")
+    pocket_depth = sample("sleeve.male_pocket_depth")
+    # Heights above the floor of the male pocket
+    female_bottom = sample("male.body_height") + gap
+    step = pocket_depth - sample("sleeve.female_pocket_depth")
+    overhang = female_bottom + sample("female.height") - pocket_depth
+    causes["male piece too wide"] = male_diameter > male_pocket
+    causes["female piece too wide"] = female_diameter > female_pocket
+    causes["female piece on the step"] = (female_bottom < step) & (female_diameter > male_pocket)
+    causes["stack too tall"] = overhang > limits.max_overhang
+
+    rod = sample("male.rod_diameter")
+    male_depth = limits.min_engagement * basic_thread_depth(connector.male.thread_pitch)
+    causes["rod too wide"] = rod > sample("head.major_diameter")
+    causes["rod too thin"] = (rod - sample("head.minor_diameter")) / 2 < male_depth
+    pilot = sample("female.pilot_hole_diameter")
+    female_depth = limits.min_engagement * basic_thread_depth(connector.female.thread_pitch)
+    low, high = limits.pilot_hole_range
+    causes["pilot hole out of range"] = (pilot < low) | (pilot > high)
+    causes["adapter too loose"] = (sample("adapter.major_diameter") - pilot) / 2 < female_depth
+    return causes, gap, overhang
+
+
+@dataclass
+class _Moments:
+    count: int = 0
+    total: float = 0.0
+    squares: float = 0.0
+    low: float = math.inf
+    high: float = -math.inf
+
+    def add(self, values: np.ndarray) -> None:
+        values = values.astype(np.float64)
+        self.count += len(values)
+        self.total += values.sum()
+        self.squares += (values * values).sum()
+        self.low, self.high = min(self.low, values.min()), max(self.high, values.max())
+
+    def __str__(self) -> str:
+        mean = self.total / self.count
+        std = math.sqrt(max(self.squares / self.count - mean * mean, 0))
+        return f"{mean:.3f} ± {std:.3f} (min {self.low:.3f}, max {self.high:.3f})"
+
+
+@dataclass
+class StackupResult:
+    samples: int
+    seconds: float
+    failures: Dict[str, int]  # Failing samples per cause, per mode and "any"
+    gap: _Moments = field(default_factory=_Moments)
+    overhang: _Moments = field(default_factory=_Moments)
+    notes: List[str] = field(default_factory=list)
+
+    def probability(self, name: str) -> float:
+        return self.failures[name] / self.samples
+
+    def margin(self, name: str) -> float:
+        """Half width of the 95% confidence interval of a probability (Wilson)."""
+        p, n, z = self.probability(name), self.samples, 1.96
+        return z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+
+    def format(self) -> str:
+        lines = [f"{'failure':<28} {'probability':>12} {'± 95%':>9}"]
+
+        def row(name, label):
+            lines.append(f"{label:<28} {self.probability(name):>11.4%} {self.margin(name):>9.4%}")
+
+        for mode, causes in MODES.items():
+            row(mode, mode)
+            for cause in causes:
+                row(cause, f"  {cause}")
+        row("any", "any")
+        lines.append(f"Magnet gap: {self.gap} mm")
+        lines.append(f"Female piece above the sleeve top: {self.overhang} mm")
+        lines.append(f"{self.samples:,} samples in {self.seconds:.2f}s "
+                     f"({self.samples / self.seconds / 1e6:.1f}M samples/s)")
+        lines.extend(f"Note: {note}" for note in self.notes)
+        return "\n".join(lines)
+
+
+def pilot_hole_note(connector: Connector, spreads: Sequence[Tuple[str, Spread]], limits: Limits) -> Optional[str]:
+    """Why the pilot hole fails when its nominal isn't centred in the tap's range, with the expected rate."""
+    name = "female.pilot_hole_diameter"
+    low, high = limits.pilot_hole_range
+    pilot, centre = nominal(connector, name), (low + high) / 2
+    if math.isclose(pilot, centre, abs_tol=1e-6):
+        return None
+    spread = spread_for(name, spreads)
+    density = spread.density(pilot, max(spread.tolerance, 1e-3) / GRID_STEPS)
+    expected = density.exceeds(high) + 1 - density.exceeds(low)
+    return (f"the nominal pilot hole ({pilot:.3f} mm) is off the centre of the tap's {low:.2f}-{high:.2f} mm range, "
+            f"so {expected:.1%} of pilot holes are expected out of range with its ±{spread.tolerance} mm spread "
+            f"(--set {name}={centre:.3f} centres it)")
+
+
+def simulate(
+    connector: Connector = Connector(),
+    spreads: Sequence[Tuple[str, Spread]] = DEFAULT_SPREADS,
+    samples: int = DEFAULT_SAMPLES,
+    limits: Limits = Limits(),
+    seed: Optional[int] = None,
+) -> StackupResult:
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    result = StackupResult(samples, 0.0, {})
+    pockets = Pockets.tabulate(connector, spreads, limits)
+    for done in range(0, samples, CHUNK):
+        n = min(CHUNK, samples - done)
+        causes, gap, overhang = failures(_Sampler(connector, spreads, rng, n), pockets, limits)
+        flags = dict(causes)
+        for mode, mode_causes in MODES.items():
+            flags[mode] = np.logical_or.reduce([causes[cause] for cause in mode_causes])
+        flags["any"] = np.logical_or.reduce([flags[mode] for mode in MODES])
+        for name, failed in flags.items():
+            result.failures[name] = result.failures.get(name, 0) + int(np.count_nonzero(failed))
+        result.gap.add(gap)
+        result.overhang.add(overhang)
+    result.seconds = time.perf_counter() - start
+    note = pilot_hole_note(connector, spreads, limits)
+    if note:
+        result.notes.append(note)
+    return result
+
+
+def _parse_spread(text: str) -> Tuple[str, Spread]:
+    pattern, sep, value = text.rpartition("=")
+    tolerance, _, distribution = value.partition(":")
+    if not sep or distribution not in ("", "normal", "uniform"):
+        raise argparse.ArgumentTypeError(f"expected PATTERN=TOLERANCE[:normal|uniform], got {text!r}")
+    return pattern, Spread(float(tolerance), distribution or "normal")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.stackup", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help=f"(default: {DEFAULT_SAMPLES:,})")
+    parser.add_argument("--spread", type=_parse_spread, action="append", default=[],
+                        metavar="PATTERN=TOLERANCE[:DISTRIBUTION]", help="spread of matching dimensions (repeatable)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", dest="settings",
+                        help="nominal value of a parameter, e.g. male.magnets.hole_diameter=4.13 (repeatable)")
+    parser.add_argument("--max-press-fit", type=float, default=Limits.max_press_fit,
+                        help=f"mm a magnet can be wider than its pocket (default: {Limits.max_press_fit})")
+    parser.add_argument("--max-overhang", type=float, default=Limits.max_overhang,
+                        help=f"mm the female piece may stand proud of the sleeve (default: {Limits.max_overhang})")
+    parser.add_argument("--min-engagement", type=float, default=Limits.min_engagement,
+                        help=f"fraction of the basic thread depth (default: {Limits.min_engagement})")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    if args.samples < 1:
+        parser.error(f"--samples must be at least 1, got {args.samples}")
+
+    overrides = {}
+    for setting in args.settings:
+        name, sep, value = setting.partition("=")
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {setting!r}")
+        overrides[name] = float(value)
+    try:
+        connector = with_overrides(Connector(), overrides)
+    except ValueError as e:
+        parser.error(str(e))
+    limits = Limits(args.max_press_fit, args.max_overhang, args.min_engagement)
+    result = simulate(connector, DEFAULT_SPREADS + tuple(args.spread), args.samples, limits, args.seed)
+    print(result.format())
+
+
+if __name__ == "__main__":
+    main()
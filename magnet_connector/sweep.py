@@ -0,0 +1,186 @@
+"""
+Build every combination of a set of parameter values across a process pool.
+
+    python -m magnet_connector.sweep male_thread --set magnets.hole_diameter=4.06:4.16:0.01
+    python -m magnet_connector.sweep female_thread --set pilot_hole_diameter=10.90,10.93,10.96 --jobs 4
+    python -m magnet_connector.sweep rangers_guard_sleeve \\
+        --set male_pocket_diameter=24.05,24.20 --set stair_pocket_diameter=25.05,25.10
+
+Values are either a comma separated list or an inclusive start:stop:step range
+(ascending, with a positive step).
+Nested parameters are addressed with dots. Each variant is exported to
+`<out-dir>/<stem>_NNN.<format>` and a manifest.csv / manifest.json lists the
+parameter values, volume, face count and build time of every variant.
+
+Variants that share their leading feature steps are handed to the same
+worker, one after the other, so the shared steps are built once per worker.
+"""
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from .export import DEFAULT_FORMATS, DEFAULT_QUALITY, MESH_FORMATS, QUALITY_PRESETS, export_part
+from .feature_tree import feature_key
+from .parts import PARTS
+
+Overrides = Dict[str, Any]
+
+
+def parse_values(text: str) -> List[float]:
+    """'4.06:4.16:0.01' -> [4.06, 4.07, ..., 4.16], '24.05,24.20' -> [24.05, 24.2]"""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        if step <= 0:
+            raise ValueError(f"range step must be positive, got {text!r}")
+        if stop < start:
+            raise ValueError(f"range stops below its start, got {text!r}")
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 6) for i in range(count)]
+    return [float(v) for v in text.split(",")]
+
+
+def with_overrides(params: Any, overrides: Overrides) -> Any:
+    """Copy of the (nested, frozen) parameter dataclass with dotted fields replaced."""
+    changes: Dict[str, Any] = {}
+    nested: Dict[str, Overrides] = {}
+    for path, value in overrides.items():
+        name, _, rest = path.partition(".")
+        if name not in {f.name for f in dataclasses.fields(params)}:
+            raise ValueError(f"{type(params).__name__} has no parameter {name!r}")
+        if rest:
+            nested.setdefault(name, {})[rest] = value
+        else:
+            # Keep ints (e.g. magnet count) as ints
+            kind = type(getattr(params, name))
+            if kind is int and value != int(value):
+                raise ValueError(f"{type(params).__name__}.{name} is a whole number, got {value!r}")
+            changes[name] = kind(value)
+    for name, sub in nested.items():
+        changes[name] = with_overrides(getattr(params, name), sub)
+    return dataclasses.replace(params, **changes)
+
+
+def variants(grid: Dict[str, Sequence[float]]) -> List[Overrides]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def _prefix_order(part_name: str, overrides: Overrides) -> List[str]:
+    part = PARTS[part_name]
+    key, keys = "", []
+    for feature in part.features(with_overrides(part.params, overrides)):
+        key = feature_key(key, feature)
+        keys.append(key)
+    return keys
+
+
+def _build_chunk(
+    part_name: str,
+    chunk: List[tuple],
+    out_dir: str,
+    formats: Sequence[str],
+    quality: str,
+) -> List[dict]:
+    part = PARTS[part_name]
+    rows = []
+    for index, overrides in chunk:
+        start = time.perf_counter()
+        result = part.replay(with_overrides(part.params, overrides))
+        build_seconds = time.perf_counter() - start
+        shape = result.model.val()
+        stem = f"{part.stem}_{index:03d}"
+        start = time.perf_counter()
+        export_part(result.model, stem, out_dir, formats, quality)
+        rows.append({
+            "index": index,
+            "stem": stem,
+            **overrides,
+            "volume": round(shape.Volume(), 6),
+            "faces": len(shape.Faces()),
+            "build_seconds": round(build_seconds, 4),
+            "export_seconds": round(time.perf_counter() - start, 4),
+            "reused_steps": " ".join(result.reused),
+        })
+    return rows
+
+
+def sweep(
+    part_name: str,
+    grid: Dict[str, Sequence[float]],
+    out_dir: Path,
+    jobs: int = os.cpu_count() or 1,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    quality: str = DEFAULT_QUALITY,
+) -> List[dict]:
+    """Build all variants of `part_name` over `grid` and write the manifest. Returns its rows."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    indexed = list(enumerate(variants(grid)))
+    if not indexed:
+        raise ValueError("the parameter grid has no variants")
+    # Neighbours in this order share the longest feature prefixes
+    indexed.sort(key=lambda item: _prefix_order(part_name, item[1]))
+    per_chunk = max(1, -(-len(indexed) // jobs))
+    chunks = [indexed[i:i + per_chunk] for i in range(0, len(indexed), per_chunk)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_build_chunk, part_name, chunk, str(out_dir), formats, quality) for chunk in chunks]
+        rows = sorted((row for f in futures for row in f.result()), key=lambda row: row["index"])
+
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump({"part": part_name, "grid": grid, "variants": rows}, f, indent=2)
+    with open(out_dir / "manifest.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m magnet_connector.sweep", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("part", choices=list(PARTS))
+    parser.add_argument("--set", action="append", required=True, metavar="NAME=VALUES", dest="settings",
+                        help="parameter values, e.g. magnets.hole_diameter=4.06:4.16:0.01 (repeatable)")
+    parser.add_argument("--out-dir", help="default: sweeps/<part>")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--formats", nargs="+", choices=["step", *MESH_FORMATS], default=list(DEFAULT_FORMATS))
+    parser.add_argument("--quality", choices=list(QUALITY_PRESETS), default=DEFAULT_QUALITY,
+                        help=f"STL tessellation preset (default: {DEFAULT_QUALITY})")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error(f"--jobs must be at least 1, got {args.jobs}")
+
+    grid = {}
+    for setting in args.settings:
+        name, sep, values = setting.partition("=")
+        if not sep:
+            parser.error(f"--set expects NAME=VALUES, got {setting!r}")
+        try:
+            grid[name] = parse_values(values)
+        except ValueError as e:
+            parser.error(f"--set {name}: {e}")
+    try:
+        for name, values in grid.items():
+            for value in values:
+                with_overrides(PARTS[args.part].params, {name: value})
+    except ValueError as e:
+        parser.error(str(e))
+
+    out_dir = Path(args.out_dir or Path("sweeps") / args.part)
+    start = time.perf_counter()
+    rows = sweep(args.part, grid, out_dir, args.jobs, args.formats, args.quality)
+    print(f"Built {len(rows)} variants in {time.perf_counter() - start:.1f}s")
+    print(f"Manifest written to: {out_dir / 'manifest.csv'}")
+
+
+if __name__ == "__main__":
+    main()
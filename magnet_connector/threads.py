@@ -0,0 +1,160 @@
+"""
+Memoized cq_warehouse IsoThread solids.
+
+The detailed (simple=False) thread sweep is the most expensive step of the
+visual models. Each distinct thread is generated once, kept in memory for the
+rest of the process and serialized to BREP on disk for later runs. Their
+tessellations are kept the same way (NPZ), for the visual fast path (see
+visual.py).
+IsoThread solids start at z=0 and go up to z=length; translate them into place.
+
+Within `disk_cache_disabled()` (what `--no-cache` builds run in), threads are
+generated again and nothing is read from or written to disk.
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import cadquery as cq
+
+from .mesh import Mesh, load_npz, tessellate, write_npz
+
+_THREADS: Dict[str, cq.Solid] = {}
+_THREAD_MESHES: Dict[str, Mesh] = {}
+_use_disk_cache = True
+
+
+@contextmanager
+def disk_cache_disabled() -> Iterator[None]:
+    """Make `iso_thread` and `thread_mesh` bypass the thread cache, in memory and on disk, by default."""
+    global _use_disk_cache
+    previous, _use_disk_cache = _use_disk_cache, False
+    try:
+        yield
+    finally:
+        _use_disk_cache = previous
+
+
+def thread_cache_dir() -> Path:
+    from .cache import CACHE_DIR
+
+    return CACHE_DIR / "threads"
+
+
+def _thread_key(**kwargs) -> str:
+    from .cache import library_versions
+
+    payload = dict(kwargs, cq_warehouse=library_versions()["cq_warehouse"])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def iso_thread(
+    major_diameter: float,
+    pitch: float,
+    length: float,
+    external: bool,
+    hand: str = "right",
+    end_finishes: Tuple[str, str] = ("fade", "square"),
+    cache_dir: Optional[Path] = None,
+    use_cache: Optional[bool] = None,
+) -> cq.Solid:
+    """
+    Detailed IsoThread solid, loaded from memory or `cache_dir` (default: the
+    build cache) when the same thread was generated before. With `use_cache`
+    False (default: unless in `disk_cache_disabled()`), it is always generated.
+    """
+    use_cache = _use_disk_cache if use_cache is None else use_cache
+    key = _thread_key(
+        major_diameter=major_diameter,
+        pitch=pitch,
+        length=length,
+        external=external,
+        hand=hand,
+        end_finishes=list(end_finishes),
+    )
+    if use_cache and key in _THREADS:
+        return _THREADS[key]
+
+    path = Path(cache_dir or thread_cache_dir()) / f"{key}.brep"
+    if use_cache and path.is_file():
+        thread = cq.Solid(cq.Shape.importBrep(str(path)).wrapped)
+    else:
+        # python3 -m pip install git+https://github.com/gumyr/cq_warehouse.git#egg=cq_warehouse
+        # Currently using: cq_warehouse==0.8.0
+        from cq_warehouse.fastener import IsoThread
+
+        thread = cq.Solid(IsoThread(
+            major_diameter=major_diameter,
+            pitch=pitch,
+            length=length,
+            external=external,
+            hand=hand,
+            end_finishes=tuple(end_finishes),
+            simple=False,
+        ).wrapped)
+        if not use_cache:
+            return thread
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        thread.exportBrep(str(staging))
+        os.replace(staging, path)
+
+    _THREADS[key] = thread
+    return thread
+
+
+def thread_mesh(
+    major_diameter: float,
+    pitch: float,
+    length: float,
+    external: bool,
+    hand: str = "right",
+    end_finishes: Tuple[str, str] = ("fade", "square"),
+    tolerance: float = 0.1,
+    angular_tolerance: float = 0.1,
+    cache_dir: Optional[Path] = None,
+    use_cache: Optional[bool] = None,
+) -> Mesh:
+    """
+    Tessellation of `iso_thread(...)` with the given tolerances, loaded from
+    memory or `cache_dir` (default: the build cache) when it was made before.
+    `use_cache` is as for `iso_thread`.
+    """
+    use_cache = _use_disk_cache if use_cache is None else use_cache
+    thread = dict(
+        major_diameter=major_diameter,
+        pitch=pitch,
+        length=length,
+        external=external,
+        hand=hand,
+        end_finishes=tuple(end_finishes),
+    )
+    key = _thread_key(**dict(thread, end_finishes=list(end_finishes)),
+                      tolerance=tolerance, angular_tolerance=angular_tolerance)
+    if use_cache and key in _THREAD_MESHES:
+        return _THREAD_MESHES[key]
+
+    path = Path(cache_dir or thread_cache_dir()) / f"{key}.npz"
+    if use_cache and path.is_file():
+        mesh = load_npz(path)
+    else:
+        mesh = tessellate(iso_thread(**thread, cache_dir=cache_dir, use_cache=use_cache), tolerance,
+                          angular_tolerance)
+        if not use_cache:
+            return mesh
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        write_npz(mesh, staging)
+        os.replace(staging, path)
+
+    _THREAD_MESHES[key] = mesh
+    return mesh
+
+
+def clear_memory_cache() -> None:
+    _THREADS.clear()
+    _THREAD_MESHES.clear()
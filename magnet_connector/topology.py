@@ -0,0 +1,159 @@
+"""
+Lookup tables of a shape's edges and faces by geometry.
+
+Selecting e.g. "the circular edge of diameter D on the top face" with a
+custom `cq.selectors.Selector` asks every edge of the shape for its geometry
+type and radius, on every selection. A `TopologyIndex` reads each edge and
+face once, buckets them by geometry type, radius and Z position, and answers
+such queries from the matching buckets only. An index is built for the
+queries on one shape and not kept: models are new shapes after every step.
+
+    index = TopologyIndex(model.findSolid())
+    model.newObject(index.circles(10.95, z=index.zmax)).chamfer(0.3)
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cadquery as cq
+from cadquery.occ_impl.shapes import geom_LUT_EDGE, geom_LUT_FACE
+
+Axis = Tuple[float, float, float]
+
+DEFAULT_TOLERANCE = 1e-5
+Z_AXIS: Axis = (0.0, 0.0, 1.0)
+
+
+@dataclass(frozen=True)
+class Entry:
+    shape: cq.Shape
+    geom_type: str             # cadquery's geomType(): "LINE", "CIRCLE", "PLANE", "CYLINDER", ...
+    radius: Optional[float]    # Circles, cylinders, cones' reference radius
+    axis: Optional[Axis]       # Circle/cylinder axis, line direction or plane normal, up to sign
+    z: Optional[float]         # Circle center, plane location or line midpoint height
+
+
+def _axis(direction) -> Axis:
+    """Unit direction with the sign flipped so that its first non-zero component is positive."""
+    axis = (direction.X(), direction.Y(), direction.Z())
+    for value in axis:
+        if abs(value) > 1e-9:
+            return tuple(-v if value < 0 else v for v in axis)
+    return axis
+
+
+def _edge_entry(edge: cq.Edge) -> Entry:
+    from OCP.BRepAdaptor import BRepAdaptor_Curve
+    from OCP.GeomAbs import GeomAbs_Circle, GeomAbs_Line
+
+    curve = BRepAdaptor_Curve(edge.wrapped)
+    kind = curve.GetType()
+    radius = axis = z = None
+    if kind == GeomAbs_Circle:
+        circle = curve.Circle()
+        radius, axis, z = circle.Radius(), _axis(circle.Axis().Direction()), circle.Location().Z()
+    elif kind == GeomAbs_Line:
+        axis = _axis(curve.Line().Direction())
+        z = curve.Value((curve.FirstParameter() + curve.LastParameter()) / 2).Z()
+    return Entry(edge, geom_LUT_EDGE[kind], radius, axis, z)
+
+
+def _face_entry(face: cq.Face) -> Entry:
+    from OCP.BRepAdaptor import BRepAdaptor_Surface
+    from OCP.GeomAbs import GeomAbs_Cone, GeomAbs_Cylinder, GeomAbs_Plane
+
+    surface = BRepAdaptor_Surface(face.wrapped)
+    kind = surface.GetType()
+    radius = axis = z = None
+    if kind == GeomAbs_Plane:
+        plane = surface.Plane()
+        axis, z = _axis(plane.Axis().Direction()), plane.Location().Z()
+    elif kind == GeomAbs_Cylinder:
+        cylinder = surface.Cylinder()
+        radius, axis = cylinder.Radius(), _axis(cylinder.Axis().Direction())
+    elif kind == GeomAbs_Cone:
+        cone = surface.Cone()
+        radius, axis = cone.RefRadius(), _axis(cone.Axis().Direction())
+    return Entry(face, geom_LUT_FACE[kind], radius, axis, z)
+
+
+class _Buckets:
+    """Entries by geometry type, and by (type, radius bucket, z bucket)."""
+
+    def __init__(self, entries: Iterable[Entry], bucket: float):
+        self.bucket = bucket
+        self.by_type: Dict[str, List[Entry]] = defaultdict(list)
+        self.by_key: Dict[tuple, List[Entry]] = defaultdict(list)
+        for entry in entries:
+            self.by_type[entry.geom_type].append(entry)
+            self.by_key[(entry.geom_type, self._quantize(entry.radius), self._quantize(entry.z))].append(entry)
+
+    def _quantize(self, value: Optional[float]) -> Optional[int]:
+        return None if value is None else math.floor(value / self.bucket)
+
+    def _candidates(self, geom_type: str, radius: Optional[float], z: Optional[float]) -> Iterable[Entry]:
+        if radius is None or z is None:
+            return self.by_type.get(geom_type, ())
+        # A value within tolerance of the query can sit in a neighbouring bucket
+        r, h = self._quantize(radius), self._quantize(z)
+        return [entry
+                for dr in (-1, 0, 1) for dh in (-1, 0, 1)
+                for entry in self.by_key.get((geom_type, r + dr, h + dh), ())]
+
+    def find(
+        self,
+        geom_type: str,
+        radius: Optional[float],
+        z: Optional[float],
+        axis: Optional[Axis],
+        tolerance: float,
+    ) -> List[cq.Shape]:
+        def close(value, target):
+            return target is None or (value is not None and abs(value - target) <= tolerance)
+
+        if axis is not None:
+            length = math.sqrt(sum(v * v for v in axis))
+            axis = tuple(v / length for v in axis)
+        return [
+            entry.shape for entry in self._candidates(geom_type, radius, z)
+            if close(entry.radius, radius) and close(entry.z, z)
+            and (axis is None or (entry.axis is not None
+                                  and abs(abs(sum(a * b for a, b in zip(entry.axis, axis))) - 1) <= tolerance))
+        ]
+
+
+class TopologyIndex:
+    """Edges and faces of `shape`, read once and bucketed for lookups."""
+
+    def __init__(self, shape: cq.Shape, tolerance: float = DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        box = shape.BoundingBox()
+        self.zmin, self.zmax = box.zmin, box.zmax
+        self._edges = _Buckets((_edge_entry(edge) for edge in shape.Edges()), 10 * tolerance)
+        self._faces = _Buckets((_face_entry(face) for face in shape.Faces()), 10 * tolerance)
+
+    def edges(
+        self,
+        geom_type: str,
+        radius: Optional[float] = None,
+        z: Optional[float] = None,
+        axis: Optional[Axis] = None,
+    ) -> List[cq.Edge]:
+        """Edges of `geom_type` matching every given property within the tolerance."""
+        return self._edges.find(geom_type, radius, z, axis, self.tolerance)
+
+    def faces(
+        self,
+        geom_type: str,
+        radius: Optional[float] = None,
+        z: Optional[float] = None,
+        axis: Optional[Axis] = None,
+    ) -> List[cq.Face]:
+        """Faces of `geom_type` matching every given property within the tolerance."""
+        return self._faces.find(geom_type, radius, z, axis, self.tolerance)
+
+    def circles(self, diameter: float, z: Optional[float] = None, axis: Optional[Axis] = Z_AXIS) -> List[cq.Edge]:
+        """Circular edges of `diameter` (around the Z axis by default), at height `z` if given."""
+        return self.edges("CIRCLE", diameter / 2, z, axis)
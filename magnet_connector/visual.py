@@ -0,0 +1,40 @@
+"""
+Fast path for the meshes of the visual models.
+
+A visual model unions a detailed IsoThread onto (or into) its body and then
+drills the magnet pockets through the merged solid; the B-rep union is by far
+its slowest step. The meshes (STL, 3MF, GLB and the drawing renders) don't
+need it: the body is replayed without its thread steps and tessellated, the
+thread's own tessellation (cached, see `threads.thread_mesh`) is appended,
+and the seam is welded. The union is only done for STEP output.
+
+This relies on the thread steps unioning an IsoThread as it is, at z=0, and on
+no later step cutting into the thread, which holds for every visual model.
+"""
+
+from typing import Sequence
+
+from .export import QUALITY_PRESETS
+from .feature_tree import Feature, replay
+from .mesh import Mesh, concatenate, tessellate, weld
+from .threads import thread_mesh
+
+# Steps whose solid is only unioned for looks
+MESH_ONLY_FEATURES = ("thread",)
+WELD_TOLERANCE = 1e-4
+
+
+def has_mesh_only_features(features: Sequence[Feature]) -> bool:
+    return any(feature.name in MESH_ONLY_FEATURES for feature in features)
+
+
+def composite_mesh(features: Sequence[Feature], quality: str) -> Mesh:
+    """The mesh of replaying `features`, with the mesh-only steps added at mesh level instead."""
+    preset = QUALITY_PRESETS[quality]
+    body = replay([feature for feature in features if feature.name not in MESH_ONLY_FEATURES])
+    meshes = [tessellate(body, preset.tolerance, preset.angular_tolerance)]
+    meshes.extend(
+        thread_mesh(**feature.inputs, tolerance=preset.tolerance, angular_tolerance=preset.angular_tolerance)
+        for feature in features if feature.name in MESH_ONLY_FEATURES
+    )
+    return weld(concatenate(meshes), WELD_TOLERANCE)
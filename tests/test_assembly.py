@@ -0,0 +1,89 @@
+import json
+import struct
+
+import cadquery as cq
+import numpy as np
+import pytest
+
+from magnet_connector.assembly import Connector, assembled_offsets, magnet_gap, placements, write_assembly_glb
+from magnet_connector.features import Magnet
+from magnet_connector.sweep import with_overrides
+
+
+@pytest.fixture(params=[{}, {"magnet.height": 1.8, "male.magnets.count": 8, "female.magnets.count": 8}])
+def connector(request):
+    return with_overrides(Connector(), request.param)
+
+
+def test_assembled_offsets(connector):
+    male, female, sleeve = connector.male, connector.female, connector.sleeve
+    offsets = assembled_offsets(male, female, sleeve, connector.magnet)
+    assert offsets["rangers_guard_sleeve"] == 0
+    # The male body rests on the floor of the male pocket
+    assert offsets["male_thread"] + male.rod_length == pytest.approx(sleeve.cylinder_height - sleeve.male_pocket_depth)
+    # The female piece is one magnet gap above the male piece
+    gap = offsets["female_thread"] - offsets["male_thread"] - male.height
+    assert gap == pytest.approx(magnet_gap(male, female, connector.magnet))
+
+
+def test_default_magnet_gap():
+    assert magnet_gap(Connector().male, Connector().female, Magnet()) == pytest.approx(0.3)
+
+
+def _stacks(connector, magnets):
+    """Top of the male stacks and bottom of the female stacks."""
+    per_ring = connector.male.magnets.count * connector.magnet.per_hole
+    male, female = magnets[:per_ring], magnets[per_ring:]
+    return max(z for *_, z in male) + connector.magnet.height, min(z for *_, z in female)
+
+
+def test_placements(connector):
+    offsets, magnets = placements(connector)
+    assert offsets == assembled_offsets(connector.male, connector.female, connector.sleeve, connector.magnet)
+    per_hole = connector.magnet.per_hole
+    assert len(magnets) == (connector.male.magnets.count + connector.female.magnets.count) * per_hole
+    # The male and female magnet stacks touch
+    male_top, female_bottom = _stacks(connector, magnets)
+    assert male_top == pytest.approx(female_bottom)
+    # The first pocket is on +X
+    x, y, _ = magnets[0]
+    assert (x, y) == pytest.approx((connector.male.magnets.pitch_radius, 0.0))
+
+
+def test_placements_exploded(connector):
+    offsets, magnets = placements(connector)
+    exploded_offsets, exploded = placements(connector, explode=5.0)
+    assert exploded_offsets == pytest.approx({
+        "rangers_guard_sleeve": offsets["rangers_guard_sleeve"],
+        "male_thread": offsets["male_thread"] + 5.0,
+        "female_thread": offsets["female_thread"] + 20.0,
+    })
+    male_top, female_bottom = _stacks(connector, exploded)
+    assert female_bottom - male_top == pytest.approx(5.0)
+
+
+def _glb_document(path):
+    data = path.read_bytes()
+    magic, version, length = struct.unpack("<4sII", data[:12])
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    size = struct.unpack("<I", data[12:16])[0]
+    return json.loads(data[20:20 + size])
+
+
+def test_assembly_glb_instances_shared_shapes(tmp_path):
+    assembly = cq.Assembly()
+    assembly.add(cq.Workplane().box(10, 10, 2), name="base", color=cq.Color(0.2, 0.3, 0.4))
+    disc = cq.Workplane().circle(1).extrude(1).val()
+    for i in range(6):
+        assembly.add(disc, name=f"disc_{i}", loc=cq.Location(cq.Vector(i, 0, 2)), color=cq.Color(0.8, 0.8, 0.8))
+    path = tmp_path / "assembly.glb"
+    write_assembly_glb(assembly, path, "draft")
+
+    document = _glb_document(path)
+    assert len(document["meshes"]) == 2
+    root, *nodes = document["nodes"]
+    assert root["children"] == list(range(1, 8))
+    assert [node["mesh"] for node in nodes] == [0] + [1] * 6
+    assert "matrix" not in nodes[0]
+    np.testing.assert_allclose(np.reshape(nodes[3]["matrix"], (4, 4)).T[:3, 3], (2, 0, 2))
+    assert len(document["materials"]) == 2
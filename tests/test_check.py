@@ -0,0 +1,41 @@
+import cadquery as cq
+import numpy as np
+import pytest
+
+from magnet_connector.check import distances, radial_fits, smallest_distance, surface_points
+from magnet_connector.mesh import Mesh, tessellate
+from magnet_connector.rangers_guard_sleeve import RangersGuardSleeveParams
+
+
+def _mesh(model: cq.Workplane) -> Mesh:
+    mesh = tessellate(model, 0.05, 0.2)
+    return Mesh(mesh.vertices.astype(np.float64), mesh.triangles)
+
+
+@pytest.mark.parametrize("max_distance", [0.2, 1.0, 5.0])
+def test_smallest_distance_matches_distances(max_distance):
+    box = _mesh(cq.Workplane().box(10, 6, 4))
+    ring = _mesh(cq.Workplane().circle(9).circle(7).extrude(3).translate((0, 0, 2.4)))
+    points = surface_points(ring, 2000, np.random.default_rng(0))
+    assert smallest_distance(points, box, max_distance) == pytest.approx(distances(points, box, max_distance).min())
+
+
+def test_smallest_distance_out_of_range():
+    box = _mesh(cq.Workplane().box(2, 2, 2))
+    assert smallest_distance(np.array([[0.0, 0.0, 5.0]]), box, 1.0) == np.inf
+    assert smallest_distance(np.array([[0.0, 0.0, 1.5]]), box, 1.0) == pytest.approx(0.5)
+
+
+def test_radial_fits():
+    fits = {fit.name: fit for fit in radial_fits()}
+    body = fits["male_thread body / sleeve male pocket"]
+    assert (body.clearance, body.length, body.status) == (pytest.approx(0.025), pytest.approx(4.3), "clear")
+    assert fits["female_thread body / sleeve female pocket"].clearance == pytest.approx(0.1)
+    rod = fits["male_thread rod / tapped female_thread"]
+    assert (rod.clearance, rod.length) == (pytest.approx(0.025), pytest.approx(2.0))
+
+
+def test_radial_fits_interference():
+    fits = radial_fits(sleeve=RangersGuardSleeveParams(male_pocket_diameter=23.9))
+    assert fits[0].status == "INTERFERES"
+    assert fits[0].clearance == pytest.approx(-0.05)
@@ -0,0 +1,49 @@
+import sys
+from types import ModuleType
+
+import pytest
+
+from magnet_connector.daemon import _reload_order
+
+PREFIX = "magnet_connector._fake."
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    """base <- middle <- top, base <- threads <- uses_threads, and an unrelated module."""
+    created = {}
+
+    def module(name, *uses):
+        created[PREFIX + name] = fake = ModuleType(PREFIX + name)
+        for used in uses:
+            setattr(fake, used, created[PREFIX + used])
+        monkeypatch.setitem(sys.modules, fake.__name__, fake)
+
+    module("base")
+    module("middle", "base")
+    module("top", "middle")
+    module("threads", "base")
+    module("uses_threads", "threads")
+    module("unrelated")
+    return created
+
+
+def _names(order):
+    return [name[len(PREFIX):] for name in order]
+
+
+def test_reload_order_dependents_after_dependencies(modules):
+    order = _names(_reload_order(modules, [PREFIX + "base"]))
+    # threads is kept loaded, but what uses it still reaches base through it
+    assert sorted(order) == ["base", "middle", "top", "uses_threads"]
+    assert order.index("base") < order.index("middle") < order.index("top")
+    assert order.index("base") < order.index("uses_threads")
+
+
+def test_reload_order_leaf(modules):
+    assert _names(_reload_order(modules, [PREFIX + "top"])) == ["top"]
+    assert _names(_reload_order(modules, [PREFIX + "unrelated"])) == ["unrelated"]
+
+
+def test_reload_order_nothing_changed(modules):
+    assert _reload_order(modules, []) == []
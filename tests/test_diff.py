@@ -0,0 +1,34 @@
+import cadquery as cq
+import numpy as np
+
+from magnet_connector.diff import grid_axes, voxelize
+from magnet_connector.mesh import tessellate
+
+VOXEL = 0.5
+
+
+def _voxels(model: cq.Workplane):
+    mesh = tessellate(model, 0.01, 0.1)
+    axes, voxel = grid_axes(*mesh.bounds, voxel=VOXEL)
+    return axes, voxelize(mesh, axes)
+
+
+def test_voxelize_box():
+    axes, inside = _voxels(cq.Workplane().box(10, 6, 4))
+    assert inside.sum() * VOXEL ** 3 == 240
+    # The grid has a voxel of margin all around
+    assert not inside[[0, -1]].any() and not inside[:, [0, -1]].any() and not inside[:, :, [0, -1]].any()
+    x, y, z = np.meshgrid(*axes, indexing="ij")
+    np.testing.assert_array_equal(inside, (abs(x) < 5) & (abs(y) < 3) & (abs(z) < 2))
+
+
+def test_voxelize_through_hole():
+    axes, inside = _voxels(cq.Workplane().box(10, 6, 4).faces(">Z").workplane().rect(2, 2).cutThruAll())
+    assert inside.sum() * VOXEL ** 3 == 240 - 16
+    x, y, _ = np.meshgrid(*axes, indexing="ij")
+    assert not inside[(abs(x) < 1) & (abs(y) < 1)].any()
+
+
+def test_voxelize_cylinder_volume():
+    axes, inside = _voxels(cq.Workplane().circle(5).extrude(8))
+    np.testing.assert_allclose(inside.sum() * VOXEL ** 3, np.pi * 25 * 8, rtol=0.02)
@@ -0,0 +1,36 @@
+import cadquery as cq
+import pytest
+
+from magnet_connector.fingerprint import fingerprint, load_index, save_index
+
+
+def _ring(start_angle: float) -> cq.Shape:
+    return (cq.Workplane().circle(12).circle(4).extrude(4)
+            .faces(">Z").workplane().polarArray(9.3, start_angle, 360, 12).hole(4.1, 3.3).val())
+
+
+def test_rotated_magnet_ring_drifts():
+    before, after = fingerprint(_ring(0)), fingerprint(_ring(7.5))
+    # Same totals, moved pockets
+    assert after.differences(before) == ["face_signature"]
+
+
+def test_rounding_noise_doesnt_drift():
+    shape = _ring(0)
+    moved = shape.translate(cq.Vector(0, 0, 2e-6))
+    assert fingerprint(moved).differences(fingerprint(shape)) == []
+
+
+def test_seam_position_doesnt_drift():
+    block = cq.Workplane().box(30, 30, 10).faces(">Z").workplane().hole(8)
+    turned = block.val().rotate(cq.Vector(), cq.Vector(0, 0, 1), 90)
+    before, after = fingerprint(block.val()), fingerprint(turned)
+    assert after.differences(before) == []
+    # The box corners are placed vertices, the hole's seam and circle starts are not
+    assert len(before.vertex_signature) == 8
+
+
+def test_index_round_trip(tmp_path):
+    index = {"ring": fingerprint(_ring(0))}
+    save_index(index, tmp_path / "index.json")
+    assert load_index(tmp_path / "index.json") == index
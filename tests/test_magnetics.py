@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from magnet_connector.features import Magnet, MagnetRing
+from magnet_connector.magnetics import MU0, elliptic_ke, loop_field, ring_forces
+
+
+def test_elliptic_ke_known_values():
+    k, e = elliptic_ke(np.array([0.0, 0.5, 0.9]))
+    np.testing.assert_allclose(k, [math.pi / 2, 1.8540746773013719, 2.5780921133481733], rtol=1e-12)
+    np.testing.assert_allclose(e, [math.pi / 2, 1.3506438810476755, 1.1047747327040733], rtol=1e-12)
+
+
+def test_elliptic_ke_legendre_relation():
+    m = np.linspace(0.01, 0.99, 50)
+    k, e = elliptic_ke(m)
+    k1, e1 = elliptic_ke(1 - m)
+    np.testing.assert_allclose(e * k1 + e1 * k - k * k1, math.pi / 2, rtol=1e-12)
+
+
+def test_loop_field_on_axis():
+    radius, current = 0.002, 3.0
+    z = np.array([-0.01, -0.001, 0.0, 0.0005, 0.004])
+    b_rho, b_z = loop_field(radius, np.array(current), np.zeros_like(z), z)
+    np.testing.assert_allclose(b_z, MU0 * current * radius ** 2 / (2 * (radius ** 2 + z ** 2) ** 1.5), rtol=1e-12)
+    np.testing.assert_array_equal(b_rho, 0.0)
+
+
+@pytest.mark.parametrize("rho, z", [(0.001, 0.0005), (0.003, -0.001), (0.0025, 0.002)])
+def test_loop_field_matches_biot_savart(rho, z):
+    radius, current, segments = 0.002, 1.5, 20000
+    phi = (np.arange(segments) + 0.5) * 2 * np.pi / segments
+    points = np.stack([radius * np.cos(phi), radius * np.sin(phi), np.zeros(segments)], axis=1)
+    dl = np.stack([-np.sin(phi), np.cos(phi), np.zeros(segments)], axis=1) * radius * 2 * np.pi / segments
+    r = np.array([rho, 0.0, z]) - points
+    field = MU0 * current / (4 * np.pi) * np.sum(np.cross(dl, r) / np.linalg.norm(r, axis=1)[:, None] ** 3, axis=0)
+
+    b_rho, b_z = loop_field(radius, np.array(current), np.array(rho), np.array(z))
+    np.testing.assert_allclose([b_rho, b_z], [field[0], field[2]], rtol=1e-6)
+
+
+def test_ring_forces_alternating_needs_even_count():
+    with pytest.raises(ValueError):
+        ring_forces(MagnetRing(count=11), Magnet(), [0.0], [0.0], alternating=True)
+
+
+def test_ring_forces_aligned_rings():
+    ring = MagnetRing()
+    half_pitch = 180 / ring.count
+    force, torque = ring_forces(ring, Magnet(), [0.3, 1.0, 3.0], [0.0, half_pitch / 2, half_pitch])
+    # Facing stacks attract, less and less as the rings part
+    assert np.all(force > 0)
+    assert np.all(np.diff(force[:, 0]) < 0)
+    # Aligned and half a pitch off, the rings are balanced; in between they're pulled back into line
+    np.testing.assert_allclose(torque[:, [0, 2]], 0.0, atol=1e-9)
+    assert np.all(torque[:, 1] < 0)
@@ -0,0 +1,50 @@
+import os
+
+import cadquery as cq
+import numpy as np
+import pytest
+
+from magnet_connector.mesh import Mesh, load_stl, read_stl, tessellate, write_stl
+
+
+@pytest.fixture
+def mesh():
+    model = cq.Workplane().box(10, 6, 4).faces(">Z").workplane().hole(3)
+    return tessellate(model, 0.05, 0.2)
+
+
+def _triangles(mesh: Mesh):
+    """The triangles' corners, independent of vertex numbering."""
+    return mesh.triangle_vertices.astype(np.float32)
+
+
+def test_stl_round_trip(tmp_path, mesh):
+    path = tmp_path / "part.stl"
+    write_stl(mesh, path)
+    loaded = read_stl(path)
+    assert os.path.getsize(path) == 84 + 50 * len(mesh.triangles)
+    np.testing.assert_array_equal(_triangles(loaded), _triangles(mesh))
+    # Shared corners are merged back into one vertex each
+    assert len(loaded.vertices) == len(np.unique(mesh.vertices.astype(np.float32), axis=0))
+
+
+def test_read_stl_rejects_ascii(tmp_path):
+    path = tmp_path / "ascii.stl"
+    path.write_text("solid part\nendsolid part\n")
+    with pytest.raises(ValueError):
+        read_stl(path)
+
+
+def test_load_stl_cache(tmp_path, mesh):
+    path = tmp_path / "part.stl"
+    write_stl(mesh, path)
+    first = load_stl(path)
+    cached = tmp_path / "part.stl.npz"
+    assert cached.is_file()
+    np.testing.assert_array_equal(_triangles(load_stl(path)), _triangles(first))
+
+    # A rewritten STL is read again, not served from the stale cache
+    smaller = Mesh(mesh.vertices, mesh.triangles[:10])
+    write_stl(smaller, path)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(cached).st_mtime_ns + 10 ** 9))
+    np.testing.assert_array_equal(_triangles(load_stl(path)), _triangles(smaller))
@@ -0,0 +1,15 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_command_line_records_feature_stages(tmp_path):
+    env = dict(os.environ, MAGNET_CONNECTOR_CACHE=str(tmp_path / "cache"))
+    subprocess.run([sys.executable, "-m", "magnet_connector.profiler", "male_thread", "--formats", "step",
+                    "--out-dir", str(tmp_path)], cwd=REPO_ROOT, env=env, check=True, capture_output=True)
+    stages = {tuple(stage["stack"]) for stage in json.loads((tmp_path / "profile.json").read_text())["stages"]}
+    assert ("male_thread", "build", "feature.body") in stages
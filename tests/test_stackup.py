@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from magnet_connector.assembly import Connector
+from magnet_connector.stackup import DEFAULT_SPREADS, Limits, Pockets, Spread, pilot_hole_note, simulate
+from magnet_connector.sweep import with_overrides
+
+
+@pytest.mark.parametrize("spread", [Spread(0.03), Spread(0.05, "uniform")])
+def test_density_order_statistics(spread):
+    rng = np.random.default_rng(1)
+    density = spread.density(4.0, spread.tolerance / 100)
+    draws = spread.sample(rng, 4.0, (200_000, 3)).astype(np.float64)
+    # The largest of 3 draws, drawn directly
+    np.testing.assert_allclose(np.sort(density.sample_max(rng, 3, 200_000))[500::1000],
+                               np.sort(draws.max(axis=1))[500::1000], atol=spread.tolerance / 50)
+    total = draws.sum(axis=1)
+    assert density.total(3).exceeds(12.0) == pytest.approx(0.5, abs=1e-3)
+    assert density.total(3).exceeds(float(np.quantile(total, 0.9))) == pytest.approx(0.1, abs=5e-3)
+
+
+def test_pockets_match_per_magnet_sampling():
+    connector, limits = Connector(), Limits()
+    pockets = Pockets.tabulate(connector, DEFAULT_SPREADS, limits)
+    rng = np.random.default_rng(2)
+    ring, per_hole = connector.male.magnets, connector.magnet.per_hole
+    pocket = Spread(0.03).sample(rng, ring.hole_diameter, (200_000, ring.count))
+    magnet = Spread(0.03).sample(rng, connector.magnet.diameter, (200_000, ring.count, per_hole))
+    too_wide = np.any(magnet > pocket[..., None] + limits.max_press_fit, axis=(1, 2)).mean()
+    assert pockets.too_wide["male"] == pytest.approx(too_wide, abs=1e-3)
+
+
+def test_pilot_hole_note():
+    connector = Connector()
+    result = simulate(connector, samples=200_000, seed=3)
+    note = pilot_hole_note(connector, DEFAULT_SPREADS, Limits())
+    assert result.notes == [note]
+    expected = float(note.split(" of pilot holes")[0].rsplit(" ", 1)[1].rstrip("%")) / 100
+    assert result.probability("pilot hole out of range") == pytest.approx(expected, abs=3e-3)
+    centred = with_overrides(connector, {"female.pilot_hole_diameter": 10.93})
+    assert pilot_hole_note(centred, DEFAULT_SPREADS, Limits()) is None
@@ -0,0 +1,49 @@
+import pytest
+
+from magnet_connector.features import MagnetRing
+from magnet_connector.male_thread import MaleThreadParams
+from magnet_connector.sweep import parse_values, sweep, with_overrides
+
+
+def test_parse_values_range():
+    assert parse_values("4.06:4.16:0.01") == [4.06, 4.07, 4.08, 4.09, 4.1, 4.11, 4.12, 4.13, 4.14, 4.15, 4.16]
+    assert parse_values("0:2:0.5") == [0.0, 0.5, 1.0, 1.5, 2.0]
+
+
+@pytest.mark.parametrize("text", ["1:2:0", "1:2:-0.5", "2:1:0.5"])
+def test_parse_values_bad_range(text):
+    with pytest.raises(ValueError, match="range"):
+        parse_values(text)
+
+
+def test_parse_values_list():
+    assert parse_values("24.05,24.20") == [24.05, 24.2]
+    assert parse_values("3") == [3.0]
+
+
+def test_with_overrides_nested():
+    params = MaleThreadParams()
+    changed = with_overrides(params, {"body_diameter": 23.9, "magnets.count": 8.0, "magnets.hole_depth": 3.4})
+    assert changed.body_diameter == 23.9
+    assert changed.magnets == MagnetRing(count=8, hole_depth=3.4)
+    # Ints stay ints
+    assert type(changed.magnets.count) is int
+    # The original is left alone
+    assert params == MaleThreadParams()
+
+
+def test_with_overrides_fractional_int():
+    with pytest.raises(ValueError, match="MagnetRing.count is a whole number, got 8.5"):
+        with_overrides(MaleThreadParams(), {"magnets.count": 8.5})
+
+
+def test_sweep_empty_grid(tmp_path):
+    with pytest.raises(ValueError, match="no variants"):
+        sweep("male_thread", {"body_diameter": []}, tmp_path, jobs=1)
+
+
+def test_with_overrides_unknown_parameter():
+    with pytest.raises(ValueError, match="no parameter 'magnet'"):
+        with_overrides(MaleThreadParams(), {"magnet.count": 8})
+    with pytest.raises(ValueError, match="MagnetRing has no parameter 'radius'"):
+        with_overrides(MaleThreadParams(), {"magnets.radius": 9.0})
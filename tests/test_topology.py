@@ -0,0 +1,24 @@
+import cadquery as cq
+import pytest
+
+from magnet_connector.topology import TopologyIndex
+
+
+@pytest.fixture
+def index():
+    return TopologyIndex(cq.Workplane().box(20, 20, 6).faces(">Z").workplane().hole(10.95).findSolid())
+
+
+def test_circles(index):
+    top = index.circles(10.95, z=index.zmax)
+    assert len(top) == 1
+    assert top[0].radius() == pytest.approx(10.95 / 2)
+    assert top[0].Center().z == pytest.approx(3)
+    assert len(index.circles(10.95)) == 2
+    assert index.circles(11.0) == []
+
+
+def test_faces(index):
+    assert len(index.faces("CYLINDER", radius=10.95 / 2)) == 1
+    assert len(index.faces("PLANE", axis=(0, 0, 1))) == 2
+    assert len(index.faces("PLANE", z=-3, axis=(0, 0, 1))) == 1